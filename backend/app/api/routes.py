@@ -1,19 +1,69 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Any, AsyncIterator, Optional, Tuple
+from pydantic_core import to_json
+import asyncio
 import uuid
 from datetime import datetime
 
 from app.models.chat import (
     ChatRequest, ChatResponse, ChatMessage, MessageRole,
-    TripPreferences, TripItinerary, Conversation
+    TripPreferences, TripItinerary, Conversation, ConversationPage
 )
+from app.core.config import settings
+from app.core.metrics import stage
+from app.core.responses import ModelJSONResponse
 from app.services.ai_service import AIService
+from app.models.costs import CostEstimateBatch, CostEstimateBatchRequest
+from app.models.destinations import AutocompleteResponse, DestinationPage, Suggestion
+from app.models.jobs import JobStatus, PlanBatchItem, PlanBatchRequest, PlanJob
+from app.models.routes import RouteOptions
+from app.services.governor import UpstreamOverloadedError
+from app.services.conversation_store import create_conversation_store, InvalidCursorError
+from app.services.destination_catalog import DestinationCatalog, MAX_SUGGESTIONS
+from app.services.jobs import InvalidCallbackURLError, create_job_queue, generate_batch, validate_callback_url
+from app.services.routing import ALL_MODES, MODES, RouteEngine, TransportGraph, describe_routes, mode_mask
+from app.services.preference_extractor import merge_preferences
+
+# Combinations a cost estimate batch may expand to
+MAX_BATCH_ESTIMATES = 5000
 
 api_router = APIRouter()
 ai_service = AIService()
+conversation_store = create_conversation_store()
+job_queue = create_job_queue(ai_service._generate_itinerary)
+destination_catalog = DestinationCatalog.load()
+route_engine = RouteEngine(TransportGraph.load())
+
+def _split_param(value: Optional[str]) -> List[str]:
+    return [part.strip() for part in value.split(",") if part.strip()] if value else []
+
+def _resolve_place(name: str) -> int:
+    """Graph node for a place name or alias, falling back to autocomplete."""
+    node = route_engine.graph.node_id(name)
+    if node is None:
+        suggestions = destination_catalog.suggest(name, 1)
+        if suggestions:
+            node = route_engine.graph.node_id(suggestions[0].name)
+    if node is None:
+        raise HTTPException(status_code=404, detail=f"Unknown location: {name}")
+    return node
+
+async def _roll_summary(conversation: Conversation) -> Tuple[Optional[str], int]:
+    """Fold turns that no longer fit the context budget into the summary.
 
-# In-memory storage for conversations (replace with database in production)
-conversations: Dict[str, Conversation] = {}
+    Messages older than the loaded history that are not summarized yet are
+    loaded first, so they are folded rather than dropped.
+    """
+    earlier: List[ChatMessage] = []
+    gap = ai_service.context_builder.unsummarized_range(conversation)
+    if gap is not None:
+        earlier = await conversation_store.get_messages(conversation.id, *gap)
+    return ai_service.context_builder.roll_summary(conversation, earlier)
+
+def _format_sse(event: str, data: Any) -> str:
+    """Format a single Server-Sent Event; ``data`` may hold models."""
+    return f"event: {event}\ndata: {to_json(data, serialize_unknown=True).decode()}\n\n"
 
 @api_router.post("/chat", response_model=ChatResponse)
 async def chat_endpoint(request: ChatRequest):
@@ -22,28 +72,33 @@ async def chat_endpoint(request: ChatRequest):
         # Generate or retrieve conversation ID
         conversation_id = request.conversation_id or str(uuid.uuid4())
         
-        # Get or create conversation
-        if conversation_id not in conversations:
-            conversations[conversation_id] = Conversation(
-                id=conversation_id,
-                messages=[],
-                preferences=None
+        # Get or create conversation with its most recent messages
+        with stage("conversation_load"):
+            conversation = await conversation_store.get_or_create(
+                conversation_id,
+                message_limit=settings.CONVERSATION_HISTORY_LIMIT,
+                user_id=request.user_id
             )
         
-        conversation = conversations[conversation_id]
-        
-        # Add user message to conversation
         user_message = ChatMessage(
             role=MessageRole.USER,
             content=request.message,
             timestamp=datetime.utcnow()
         )
-        conversation.messages.append(user_message)
         
-        # Process message with AI service
+        # Fold turns that no longer fit the context budget into the summary
+        with stage("context_summary"):
+            summary, summarized_count = await _roll_summary(conversation)
+        
+        # Preferences sent by the client count as known facts for this turn
+        known_preferences = merge_preferences(conversation.preferences, request.preferences)
+        
+        # Process message with AI service; the history excludes the new message
         ai_response_data = await ai_service.process_chat_message(
             request.message, 
-            conversation.messages
+            conversation.messages,
+            summary=summary,
+            known_preferences=known_preferences
         )
         
         # Add AI response to conversation
@@ -52,168 +107,274 @@ async def chat_endpoint(request: ChatRequest):
             content=ai_response_data["message"],
             timestamp=datetime.utcnow()
         )
-        conversation.messages.append(ai_message)
-        
-        # Update conversation preferences if new ones were extracted
-        if ai_response_data.get("preferences"):
-            conversation.preferences = TripPreferences(**ai_response_data["preferences"])
         
-        # Update conversation timestamp
-        conversation.updated_at = datetime.utcnow()
+        # Persist the new turn; only the preferences delta is merged into storage
+        with stage("conversation_save"):
+            preferences = await conversation_store.append_messages(
+                conversation_id,
+                [user_message, ai_message],
+                preferences_update=merge_preferences(request.preferences, ai_response_data["preferences_delta"]),
+                summary=summary,
+                summarized_count=summarized_count
+            )
         
-        # Prepare response
+        # Prepare response; the models are already validated, so they are
+        # reused as-is and serialized once
         response = ChatResponse(
             message=ai_response_data["message"],
             conversation_id=conversation_id,
             suggestions=ai_response_data.get("clarifying_questions", []),
             itinerary=ai_response_data.get("itinerary"),
             cost_estimate=ai_response_data.get("cost_estimate"),
-            next_questions=ai_response_data.get("clarifying_questions", [])
+            next_questions=ai_response_data.get("clarifying_questions", []),
+            preferences=preferences
         )
         
-        return response
+        return ModelJSONResponse(response)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing chat message: {str(e)}")
 
+@api_router.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """Streaming chat endpoint that sends the response as Server-Sent Events."""
+    conversation_id = request.conversation_id or str(uuid.uuid4())
+    with stage("conversation_load"):
+        conversation = await conversation_store.get_or_create(
+            conversation_id,
+            message_limit=settings.CONVERSATION_HISTORY_LIMIT,
+            user_id=request.user_id
+        )
+    
+    user_message = ChatMessage(
+        role=MessageRole.USER,
+        content=request.message,
+        timestamp=datetime.utcnow()
+    )
+    with stage("context_summary"):
+        summary, summarized_count = await _roll_summary(conversation)
+    known_preferences = merge_preferences(conversation.preferences, request.preferences)
+    
+    async def event_stream() -> AsyncIterator[str]:
+        yield _format_sse("conversation", {"conversation_id": conversation_id})
+        
+        try:
+            result = None
+            async for event, data in ai_service.stream_chat_message(
+                request.message,
+                conversation.messages,
+                summary=summary,
+                known_preferences=known_preferences
+            ):
+                if event == "done":
+                    result = data
+                yield _format_sse(event, data)
+        except Exception as e:
+            yield _format_sse("error", {"detail": f"Error processing chat message: {str(e)}"})
+            return
+        
+        # Persist the turn once the stream has completed
+        ai_message = ChatMessage(
+            role=MessageRole.ASSISTANT,
+            content=result["message"],
+            timestamp=datetime.utcnow()
+        )
+        with stage("conversation_save"):
+            await conversation_store.append_messages(
+                conversation_id,
+                [user_message, ai_message],
+                preferences_update=merge_preferences(request.preferences, result["preferences_delta"]),
+                summary=summary,
+                summarized_count=summarized_count
+            )
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @api_router.get("/conversations/{conversation_id}", response_model=Conversation)
-async def get_conversation(conversation_id: str):
-    """Get conversation history."""
-    if conversation_id not in conversations:
+async def get_conversation(conversation_id: str, limit: Optional[int] = None):
+    """Get conversation history, optionally only the latest ``limit`` messages."""
+    conversation = await conversation_store.get(conversation_id, message_limit=limit)
+    if conversation is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
-    return conversations[conversation_id]
+    return conversation
 
-@api_router.get("/conversations", response_model=List[Dict[str, Any]])
-async def list_conversations():
-    """List all conversations."""
-    return [
-        {
-            "id": conv.id,
-            "created_at": conv.created_at,
-            "updated_at": conv.updated_at,
-            "message_count": len(conv.messages)
-        }
-        for conv in conversations.values()
-    ]
+@api_router.get("/conversations", response_model=ConversationPage)
+async def list_conversations(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    user_id: Optional[str] = None,
+    updated_after: Optional[datetime] = None,
+    updated_before: Optional[datetime] = None
+):
+    """List conversations, most recently updated first.
+    
+    Pass the returned ``next_cursor`` back as ``cursor`` to fetch the next page.
+    """
+    try:
+        return await conversation_store.list_conversations(
+            limit=limit,
+            cursor=cursor,
+            user_id=user_id,
+            updated_after=updated_after,
+            updated_before=updated_before
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-@api_router.post("/plan", response_model=TripItinerary)
-async def generate_trip_plan(preferences: TripPreferences):
-    """Generate a complete trip itinerary."""
+@api_router.post("/plan", response_model=TripItinerary, responses={202: {"model": PlanJob}})
+async def generate_trip_plan(
+    preferences: TripPreferences,
+    bypass_cache: bool = False,
+    background: bool = False,
+    callback_url: Optional[str] = None
+):
+    """Generate a complete trip itinerary.
+    
+    With ``background=true`` the itinerary is generated by the job queue and a
+    job is returned immediately; poll ``/plan/{job_id}`` or pass a
+    ``callback_url`` to be notified when it finishes.
+    """
+    if background:
+        if callback_url:
+            try:
+                await validate_callback_url(callback_url)
+            except InvalidCallbackURLError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        job = await job_queue.enqueue(preferences, callback_url=callback_url)
+        return ModelJSONResponse(job, status_code=202)
+    
     try:
-        itinerary = ai_service._generate_itinerary(preferences)
+        itinerary = await ai_service._generate_itinerary(preferences, bypass_cache=bypass_cache)
         if not itinerary:
             raise HTTPException(status_code=400, detail="Could not generate itinerary with provided preferences")
-        return itinerary
+        return ModelJSONResponse(itinerary)
+    except UpstreamOverloadedError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating trip plan: {str(e)}")
 
-@api_router.get("/destinations")
+@api_router.post("/plan/batch", responses={200: {"model": PlanBatchItem, "content": {"application/x-ndjson": {}}}})
+async def generate_trip_plan_batch(request: PlanBatchRequest):
+    """Generate itineraries for several preference sets, streamed as NDJSON.
+    
+    Each line is a ``PlanBatchItem`` sent as soon as its itinerary is ready,
+    so lines arrive in completion order; use ``index`` to match them to the
+    request. Identical preference sets are generated once, and failed items
+    carry an ``error`` instead of failing the batch.
+    """
+    async def generate(preferences: TripPreferences) -> Optional[TripItinerary]:
+        return await ai_service._generate_itinerary(preferences, bypass_cache=request.bypass_cache)
+    
+    async def lines() -> AsyncIterator[bytes]:
+        async for indices, itinerary, error in generate_batch(
+            generate, request.preferences, settings.PLAN_BATCH_CONCURRENCY
+        ):
+            status = JobStatus.FAILED if error else JobStatus.SUCCEEDED
+            for index in indices:
+                yield to_json(PlanBatchItem(index=index, status=status, result=itinerary, error=error)) + b"\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers={"X-Accel-Buffering": "no"})
+
+@api_router.get("/plan/{job_id}", response_model=PlanJob)
+async def get_trip_plan_job(job_id: str):
+    """Get the status and result of a background plan job."""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@api_router.get("/destinations", response_model=DestinationPage)
 async def get_destination_suggestions(
-    query: str = None,
-    budget: str = None,
-    interests: str = None
+    query: Optional[str] = None,
+    budget: Optional[str] = Query(None, description="Comma-separated budget levels"),
+    interests: Optional[str] = Query(None, description="Comma-separated interests or highlights"),
+    month: Optional[str] = Query(None, description="Comma-separated travel months, 1-12"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0)
 ):
-    """Get destination suggestions based on criteria."""
+    """Search the destination catalog, ranked by relevance and popularity."""
     try:
-        # This would typically integrate with external APIs like Google Places, TripAdvisor, etc.
-        # For now, return sample data
-        sample_destinations = [
-            {
-                "name": "Bali, Indonesia",
-                "country": "Indonesia",
-                "description": "Tropical paradise with rich culture and beautiful beaches",
-                "budget_level": "medium",
-                "best_time": "April-October",
-                "highlights": ["Beaches", "Temples", "Rice Terraces", "Culture"]
-            },
-            {
-                "name": "Santorini, Greece",
-                "country": "Greece",
-                "description": "Stunning volcanic island with iconic white architecture",
-                "budget_level": "high",
-                "best_time": "June-September",
-                "highlights": ["Sunset Views", "Beaches", "Wine", "Architecture"]
-            },
-            {
-                "name": "Tokyo, Japan",
-                "country": "Japan",
-                "description": "Modern metropolis blending tradition with innovation",
-                "budget_level": "high",
-                "best_time": "March-May, September-November",
-                "highlights": ["Technology", "Culture", "Food", "Shopping"]
-            }
-        ]
-        
-        # Filter based on query parameters
-        if query:
-            sample_destinations = [
-                d for d in sample_destinations 
-                if query.lower() in d["name"].lower() or query.lower() in d["country"].lower()
-            ]
-        
-        if budget:
-            sample_destinations = [
-                d for d in sample_destinations 
-                if d["budget_level"] == budget.lower()
-            ]
-        
-        return {
-            "destinations": sample_destinations,
-            "total": len(sample_destinations)
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching destinations: {str(e)}")
+        months = [int(m) for m in _split_param(month)]
+    except ValueError:
+        raise HTTPException(status_code=422, detail="month must be comma-separated numbers 1-12")
+    return destination_catalog.search(
+        query=query,
+        budgets=_split_param(budget),
+        interests=_split_param(interests),
+        months=months,
+        limit=limit,
+        offset=offset
+    )
 
-@api_router.get("/routes")
+@api_router.get("/autocomplete", response_model=AutocompleteResponse)
+async def autocomplete(
+    response: Response,
+    query: str = Query(..., min_length=1, max_length=64),
+    limit: int = Query(8, ge=1, le=MAX_SUGGESTIONS)
+):
+    """Typeahead over place names and aliases, most popular first."""
+    # The catalog only changes on deploy, so browsers and proxies may reuse answers
+    response.headers["Cache-Control"] = f"public, max-age={settings.AUTOCOMPLETE_CACHE_SECONDS}"
+    suggestions = [
+        Suggestion(
+            name=destination.name,
+            country=destination.country,
+            lat=destination.lat,
+            lon=destination.lon,
+            popularity=destination.popularity
+        )
+        for destination in destination_catalog.suggest(query, limit)
+    ]
+    return AutocompleteResponse(query=query, suggestions=suggestions)
+
+@api_router.get("/routes", response_model=RouteOptions)
 async def get_travel_routes(
     from_location: str,
     to_location: str,
-    transport_type: str = None
+    transport_type: Optional[str] = Query(None, description="flight, train or bus"),
+    optimize: str = Query("all", pattern="^(all|fastest|cheapest)$")
 ):
-    """Get travel route options between two locations."""
+    """Route options between two places over the offline transport graph.
+
+    ``optimize=all`` returns the duration/cost trade-offs (Pareto set).
+    """
+    source, target = _resolve_place(from_location), _resolve_place(to_location)
     try:
-        # This would typically integrate with Google Maps, Skyscanner, etc.
-        # For now, return sample data
-        sample_routes = [
-            {
-                "transport_type": "flight",
-                "duration": "2h 30m",
-                "cost": "$150-300",
-                "description": "Direct flight",
-                "airline": "Sample Airlines"
-            },
-            {
-                "transport_type": "train",
-                "duration": "4h 15m",
-                "cost": "$50-120",
-                "description": "High-speed rail",
-                "operator": "Sample Railways"
-            },
-            {
-                "transport_type": "bus",
-                "duration": "6h 30m",
-                "cost": "$25-60",
-                "description": "Express bus service",
-                "operator": "Sample Bus Co."
-            }
-        ]
-        
-        if transport_type:
-            sample_routes = [
-                r for r in sample_routes 
-                if r["transport_type"] == transport_type.lower()
-            ]
-        
-        return {
-            "from": from_location,
-            "to": to_location,
-            "routes": sample_routes,
-            "total": len(sample_routes)
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching routes: {str(e)}")
+        allowed = mode_mask([transport_type]) if transport_type else ALL_MODES
+    except ValueError:
+        raise HTTPException(status_code=422, detail=f"transport_type must be one of: {', '.join(MODES)}")
+
+    plans = route_engine.cached(source, target, optimize, allowed)
+    if plans is None:
+        # Searches on a cache miss are CPU-bound; keep them off the event loop
+        plans = await asyncio.to_thread(route_engine.routes, source, target, optimize, allowed)
+    routes = describe_routes(route_engine.graph, plans, optimize)
+    return RouteOptions(
+        from_location=route_engine.graph.names[source],
+        to_location=route_engine.graph.names[target],
+        routes=routes,
+        total=len(routes)
+    )
+
+@api_router.post("/cost-estimate/batch", response_model=CostEstimateBatch)
+async def estimate_costs_batch(request: CostEstimateBatchRequest):
+    """Estimate costs for every combination of destination, days, party size and budget."""
+    size = len(request.destinations) * len(request.days) * len(request.people) * len(request.budgets)
+    if size > MAX_BATCH_ESTIMATES:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Batch expands to {size} estimates; the limit is {MAX_BATCH_ESTIMATES}"
+        )
+    # Building thousands of estimates is CPU-bound; keep it off the event loop
+    estimates = await asyncio.to_thread(
+        ai_service.cost_model.estimate_grid,
+        request.destinations, request.days, request.people, request.budgets
+    )
+    return CostEstimateBatch(estimates=estimates, total=len(estimates))
 
 @api_router.get("/budget-tips")
 async def get_budget_tips(destination: str = None):
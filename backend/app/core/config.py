@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List, Optional
 import os
 
 class Settings(BaseSettings):
@@ -15,18 +15,111 @@ class Settings(BaseSettings):
         "http://127.0.0.1:8000"
     ]
     
+    # LLM provider: "openai" or "stub" (deterministic, offline; for load tests)
+    LLM_PROVIDER: str = "openai"
+    LLM_STUB_PROFILE: str = "fast"  # instant, fast, gpt-3.5 or gpt-4
+    LLM_STUB_FIRST_TOKEN_LATENCY: Optional[float] = None  # overrides the profile
+    LLM_STUB_TOKENS_PER_SECOND: Optional[float] = None  # overrides the profile
+    
     # OpenAI Configuration
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
+    OPENAI_BASE_URL: Optional[str] = os.getenv("OPENAI_BASE_URL") or None
     OPENAI_MODEL: str = "gpt-4"
     OPENAI_MAX_TOKENS: int = 2000
     OPENAI_TEMPERATURE: float = 0.7
+    OPENAI_TIMEOUT: float = 60.0
+    OPENAI_MAX_RETRIES: int = 2
+    PREFERENCE_TIMEOUT: float = 15.0
+    ITINERARY_TIMEOUT: float = 90.0
+    STRUCTURED_OUTPUT_RETRIES: int = 1
+    
+    # Upstream governor; OPENAI_MAX_RETRIES transient errors are retried here
+    UPSTREAM_MAX_CONCURRENCY: int = 8
+    UPSTREAM_TOKENS_PER_MINUTE: int = 0  # 0 disables the token budget
+    UPSTREAM_MAX_QUEUE: int = 32
+    UPSTREAM_SHED_TPM_RATIO: float = 0.8
+    UPSTREAM_RETRY_BASE_DELAY: float = 0.5
+    UPSTREAM_RETRY_MAX_DELAY: float = 8.0
+    
+    # Local itinerary optimization: reorder activities by travel time within these hours
+    ITINERARY_OPTIMIZER_ENABLED: bool = True
+    ITINERARY_DAY_START: str = "09:00"
+    ITINERARY_DAY_END: str = "22:00"
+    
+    # Local preference extraction; the LLM is only used below this confidence
+    PREFERENCE_RULES_ENABLED: bool = True
+    PREFERENCE_CONFIDENCE_THRESHOLD: float = 0.8
     
     # Database Configuration
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./trip_mate.db")
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_RECYCLE: int = 1800
+    
+    # Conversation storage ("sql" or "memory")
+    CONVERSATION_STORE: str = "sql"
+    # Maximum number of recent messages loaded per chat turn
+    CONVERSATION_HISTORY_LIMIT: int = 50
+    # Token budget for history sent with each chat turn, including the summary
+    CONTEXT_MAX_TOKENS: int = 3000
+    CONTEXT_SUMMARY_MAX_TOKENS: int = 500
     
     # Redis Configuration
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
     
+    # LLM response cache
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_ENTRIES: int = 1024
+    LLM_CACHE_REDIS_ENABLED: bool = False
+    # TTL in seconds per call type; 0 disables caching for that call type
+    LLM_CACHE_TTLS: Dict[str, int] = {
+        "preferences": 3600,
+        "itinerary": 86400,
+        "chat": 0
+    }
+    # Share one upstream call between concurrent identical requests
+    LLM_SINGLE_FLIGHT_ENABLED: bool = True
+    
+    # Semantic cache: reuse answers to near-duplicate requests with equal trip preferences
+    SEMANTIC_CACHE_ENABLED: bool = True
+    SEMANTIC_CACHE_THRESHOLD: float = 0.85  # cosine similarity; see benchmarks/semantic_cache.py
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 4096
+    SEMANTIC_CACHE_DIMENSIONS: int = 512
+    # TTL in seconds per call type; 0 disables semantic caching for that call type
+    SEMANTIC_CACHE_TTLS: Dict[str, int] = {
+        "chat": 3600,
+        "itinerary": 86400
+    }
+    
+    # Background itinerary jobs ("inprocess" or "celery")
+    JOB_BACKEND: str = "inprocess"
+    JOB_WORKER_CONCURRENCY: int = 4
+    JOB_RESULT_TTL: int = 3600
+    JOB_WEBHOOK_TIMEOUT: float = 10.0
+    # Hosts webhooks may be sent to; empty allows any host resolving to public addresses
+    JOB_WEBHOOK_ALLOWED_HOSTS: List[str] = []
+    # Itineraries generated at once per /plan/batch request
+    PLAN_BATCH_CONCURRENCY: int = 4
+    CELERY_BROKER_URL: str = os.getenv("CELERY_BROKER_URL", "")
+    CELERY_RESULT_BACKEND: str = os.getenv("CELERY_RESULT_BACKEND", "")
+    
+    # Outbound HTTP connection pools shared by the LLM provider and webhooks
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    
+    # Production server (serve.py); 0 workers means one per CPU. More than one
+    # needs JOB_BACKEND=celery and the sql conversation store, since workers share no memory
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 1
+    # Keep idle client connections longer than load balancers do (often 60s)
+    SERVER_KEEPALIVE_TIMEOUT: int = 75
+    SERVER_BACKLOG: int = 2048
+    SERVER_GRACEFUL_TIMEOUT: int = 30
+    # Warm indexes and caches in the background; /ready answers 503 until done
+    STARTUP_WARMUP_ENABLED: bool = True
+    
     # Security
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-here")
     ALGORITHM: str = "HS256"
@@ -36,8 +129,28 @@ class Settings(BaseSettings):
     GOOGLE_MAPS_API_KEY: str = os.getenv("GOOGLE_MAPS_API_KEY", "")
     WEATHER_API_KEY: str = os.getenv("WEATHER_API_KEY", "")
     
+    # Observability; tracing needs the optional OpenTelemetry SDK and OTLP exporter
+    OTEL_ENABLED: bool = False
+    OTEL_SERVICE_NAME: str = "tripmate-backend"
+    
+    # Browser/proxy cache lifetime for autocomplete responses, in seconds
+    AUTOCOMPLETE_CACHE_SECONDS: int = 3600
+    
+    # Rendered GET responses cached in-process with ETags and compressed variants;
+    # max-age in seconds per path
+    HTTP_CACHE_ENABLED: bool = True
+    HTTP_CACHE_MAX_ENTRIES: int = 2048
+    HTTP_CACHE_MIN_COMPRESS_SIZE: int = 512
+    HTTP_CACHE_PATHS: Dict[str, int] = {
+        "/api/destinations": 3600,
+        "/api/routes": 3600,
+        "/api/budget-tips": 86400,
+        "/api/hidden-gems": 86400
+    }
+    
     # Rate Limiting
-    RATE_LIMIT_PER_MINUTE: int = 60
+    RATE_LIMIT_PER_MINUTE: int = 60  # per client on /api; 0 disables
+    RATE_LIMIT_BURST: int = 0  # defaults to RATE_LIMIT_PER_MINUTE
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,203 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+import gzip
+import hashlib
+import time
+
+from prometheus_client import Counter
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; responses fall back to gzip
+    brotli = None
+
+HTTP_CACHE_REQUESTS = Counter(
+    "tripmate_http_cache_requests",
+    "Requests to cached endpoints by outcome",
+    ["outcome"]
+)
+
+# Responses are stored uncompressed-plus-variants, so skip very large bodies
+MAX_BODY_SIZE = 1 << 20
+# Headers recomputed per response from the cached entry
+ENTRY_HEADERS = {b"content-length", b"content-encoding", b"etag", b"cache-control", b"vary"}
+
+class CachedResponse(NamedTuple):
+    headers: List[Tuple[bytes, bytes]]
+    bodies: Dict[str, bytes]
+    etag: bytes
+    cache_control: bytes
+    endpoint: Any
+    expires_at: float
+
+def compress(body: bytes, min_size: int) -> Dict[str, bytes]:
+    """The body per content coding; compressed variants only where they are smaller."""
+    bodies = {"identity": body}
+    if len(body) < min_size:
+        return bodies
+    variants = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(body, quality=9)
+    bodies.update((coding, data) for coding, data in variants.items() if len(data) < len(body))
+    return bodies
+
+def negotiate(accept_encoding: str, available: Dict[str, bytes]) -> str:
+    """Best content coding in ``available`` for an Accept-Encoding header.
+
+    The highest quality value wins and brotli beats gzip on a tie. Identity
+    is used unless the client accepts a compressed coding at least as much.
+    """
+    qualities: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if coding:
+            qualities[coding] = q
+    wildcard = qualities.get("*", 0.0)
+    q, _, coding = max(
+        ((qualities.get(coding, wildcard), coding == "br", coding) for coding in ("br", "gzip") if coding in available),
+        default=(0.0, False, "identity")
+    )
+    return coding if q > 0 and q >= qualities.get("identity", 0.0) else "identity"
+
+def etag_matches(if_none_match: str, etag: bytes) -> bool:
+    """Weak comparison of If-None-Match against an ETag, as for GET."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.decode("latin-1").removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+class ResponseCacheMiddleware:
+    """ASGI middleware caching rendered GET responses of deterministic endpoints.
+
+    ``paths`` maps each cached path to its ``max-age`` in seconds. Successful
+    JSON responses are stored once, keyed by path and sorted query
+    parameters, with a content-hash ETag and gzip/brotli variants, and served
+    from an in-process LRU until they expire. Requests with a matching
+    ``If-None-Match`` get ``304 Not Modified``. Implemented as plain ASGI
+    like the rate limiter, so other paths pass through untouched.
+    """
+
+    def __init__(
+        self,
+        app: Callable,
+        paths: Dict[str, int],
+        max_entries: int = 1024,
+        min_compress_size: int = 512,
+        enabled: bool = True
+    ):
+        self.app = app
+        self.paths = paths
+        self.max_entries = max_entries
+        self.min_compress_size = min_compress_size
+        self.enabled = enabled
+        self._entries: "OrderedDict[Tuple[str, str], CachedResponse]" = OrderedDict()
+
+    @staticmethod
+    def _key(scope: Dict[str, Any]) -> Tuple[str, str]:
+        params = parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True)
+        return scope["path"], urlencode(sorted(params))
+
+    def _get(self, key: Tuple[str, str]) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _set(self, key: Tuple[str, str], entry: CachedResponse) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if (
+            not self.enabled
+            or scope["type"] != "http"
+            or scope.get("method") != "GET"
+            or scope["path"] not in self.paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = {name.decode("latin-1").lower(): value.decode("latin-1") for name, value in scope.get("headers", [])}
+        key = self._key(scope)
+        entry = self._get(key)
+        if entry is not None:
+            HTTP_CACHE_REQUESTS.labels("hit").inc()
+            # Let the metrics middleware label the request by its route
+            scope["endpoint"] = entry.endpoint
+            await self._send_entry(entry, request_headers, send, b"HIT")
+            return
+
+        messages: List[Dict[str, Any]] = []
+
+        async def capture(message: Dict[str, Any]) -> None:
+            messages.append(message)
+
+        await self.app(scope, receive, capture)
+        entry = self._render(scope, messages)
+        if entry is None:
+            HTTP_CACHE_REQUESTS.labels("uncacheable").inc()
+            for message in messages:
+                await send(message)
+            return
+        HTTP_CACHE_REQUESTS.labels("miss").inc()
+        self._set(key, entry)
+        await self._send_entry(entry, request_headers, send, b"MISS")
+
+    def _render(self, scope: Dict[str, Any], messages: List[Dict[str, Any]]) -> Optional[CachedResponse]:
+        """Build a cache entry from a captured response, if it may be cached."""
+        start = messages[0] if messages else {}
+        if start.get("status") != 200:
+            return None
+        headers = [(name.lower(), value) for name, value in start.get("headers", [])]
+        names = {name for name, _ in headers}
+        if b"set-cookie" in names or b"content-encoding" in names:
+            return None
+        body = b"".join(message.get("body", b"") for message in messages[1:])
+        if len(body) > MAX_BODY_SIZE:
+            return None
+        max_age = self.paths[scope["path"]]
+        cache_control = dict(headers).get(b"cache-control") or f"public, max-age={max_age}".encode("latin-1")
+        return CachedResponse(
+            headers=[(name, value) for name, value in headers if name not in ENTRY_HEADERS],
+            bodies=compress(body, self.min_compress_size),
+            etag=f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'.encode("latin-1"),
+            cache_control=cache_control,
+            endpoint=scope.get("endpoint"),
+            expires_at=time.monotonic() + max_age
+        )
+
+    async def _send_entry(self, entry: CachedResponse, request_headers: Dict[str, str], send: Callable, outcome: bytes) -> None:
+        headers = [
+            *entry.headers,
+            (b"etag", entry.etag),
+            (b"cache-control", entry.cache_control),
+            (b"vary", b"Accept-Encoding"),
+            (b"x-cache", outcome),
+        ]
+        if etag_matches(request_headers.get("if-none-match", ""), entry.etag):
+            HTTP_CACHE_REQUESTS.labels("not_modified").inc()
+            headers = [(name, value) for name, value in headers if name != b"content-type"]
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        coding = negotiate(request_headers.get("accept-encoding", ""), entry.bodies)
+        body = entry.bodies[coding]
+        if coding != "identity":
+            headers.append((b"content-encoding", coding.encode("latin-1")))
+        headers.append((b"content-length", str(len(body)).encode("latin-1")))
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,52 @@
+from typing import Any, Dict
+import logging
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class HTTPClientPool:
+    """Shared pooled ``httpx.AsyncClient`` instances, one per name.
+
+    Clients are created on first use, so importing the app opens no
+    connections, and reused for the life of the process so connections are
+    kept alive between requests. ``aclose`` closes them all at shutdown.
+    """
+
+    def __init__(self, max_connections: int = 100, max_keepalive_connections: int = 20, keepalive_expiry: float = 30.0):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    @classmethod
+    def from_settings(cls, settings: Any) -> "HTTPClientPool":
+        return cls(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+        )
+
+    def get(self, name: str = "default", timeout: float = 5.0) -> httpx.AsyncClient:
+        """The client for ``name``; ``timeout`` only applies when it is created."""
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._clients[name] = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=timeout
+            )
+        return client
+
+    async def aclose(self) -> None:
+        for name, client in list(self._clients.items()):
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Closing HTTP client {name} failed: {e}")
+        self._clients.clear()
+
+http_clients = HTTPClientPool.from_settings(settings)
@@ -0,0 +1,172 @@
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+from app.core.tracing import start_span
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "tripmate_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "tripmate_http_requests_in_progress",
+    "HTTP requests currently being served",
+    multiprocess_mode="livesum"
+)
+STAGE_DURATION = Histogram(
+    "tripmate_stage_duration_seconds",
+    "Time spent in each stage of handling a request",
+    ["stage"],
+    buckets=LATENCY_BUCKETS
+)
+LLM_REQUEST_DURATION = Histogram(
+    "tripmate_llm_request_duration_seconds",
+    "Upstream LLM call latency, including governor queueing and retries",
+    ["call_type", "outcome"],
+    buckets=LATENCY_BUCKETS
+)
+LLM_TOKENS = Counter(
+    "tripmate_llm_tokens",
+    "Upstream LLM tokens used; streamed calls are estimated",
+    ["call_type", "kind"]
+)
+CONVERSATIONS_STORED = Gauge(
+    "tripmate_conversations_stored",
+    "Conversations in the conversation store",
+    multiprocess_mode="mostrecent"
+)
+
+@contextmanager
+def stage(name: str, **attributes: Any) -> Iterator[None]:
+    """Time a stage into ``tripmate_stage_duration_seconds`` and trace it."""
+    start = time.perf_counter()
+    with start_span(name, attributes):
+        try:
+            yield
+        finally:
+            STAGE_DURATION.labels(name).observe(time.perf_counter() - start)
+
+def record_tokens(call_type: str, prompt_tokens: Optional[int], completion_tokens: Optional[int]) -> None:
+    if prompt_tokens:
+        LLM_TOKENS.labels(call_type, "prompt").inc(prompt_tokens)
+    if completion_tokens:
+        LLM_TOKENS.labels(call_type, "completion").inc(completion_tokens)
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency per route template.
+
+    Routes are labelled by their path template (``/api/plan/{job_id}``) so
+    label cardinality stays bounded; unmatched paths share one label.
+    """
+
+    def __init__(self, app: Callable, exclude_paths: tuple = ("/metrics",)):
+        self.app = app
+        self.exclude_paths = exclude_paths
+        self._templates: Dict[Any, str] = {}
+
+    def _route_template(self, scope: Dict[str, Any]) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if endpoint not in self._templates:
+            for route in scope["app"].routes:
+                target = getattr(route, "endpoint", None) or getattr(route, "app", None)
+                if target is not None:
+                    self._templates.setdefault(target, route.path)
+        return self._templates.get(endpoint, "unmatched")
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        HTTP_REQUESTS_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_PROGRESS.dec()
+            HTTP_REQUEST_DURATION.labels(
+                scope["method"], self._route_template(scope), str(status)
+            ).observe(time.perf_counter() - start)
+
+class ServiceCollector(Collector):
+    """Expose AIService counters (cache, coalescing, governor, parsing) at scrape time."""
+
+    def __init__(self, ai_service: Any):
+        self.ai_service = ai_service
+
+    def collect(self) -> Iterator[Any]:
+        cache = self.ai_service.cache.stats()
+        hits = CounterMetricFamily("tripmate_llm_cache_hits", "LLM cache hits", labels=["call_type", "tier"])
+        misses = CounterMetricFamily("tripmate_llm_cache_misses", "LLM cache misses", labels=["call_type"])
+        ratio = GaugeMetricFamily("tripmate_llm_cache_hit_ratio", "LLM cache hit ratio since start", labels=["call_type"])
+        for call_type, counters in cache["call_types"].items():
+            hits.add_metric([call_type, "memory"], counters["memory_hits"])
+            hits.add_metric([call_type, "redis"], counters["redis_hits"])
+            misses.add_metric([call_type], counters["misses"])
+            lookups = counters["hits"] + counters["misses"]
+            ratio.add_metric([call_type], counters["hits"] / lookups if lookups else 0.0)
+        yield hits
+        yield misses
+        yield ratio
+        yield GaugeMetricFamily("tripmate_llm_cache_entries", "Entries in the in-memory LLM cache", value=cache["memory_entries"])
+
+        semantic = self.ai_service.semantic_cache.stats()
+        hits = CounterMetricFamily("tripmate_semantic_cache_hits", "Semantic cache hits", labels=["call_type"])
+        misses = CounterMetricFamily("tripmate_semantic_cache_misses", "Semantic cache misses", labels=["call_type"])
+        ratio = GaugeMetricFamily("tripmate_semantic_cache_hit_ratio", "Semantic cache hit ratio since start", labels=["call_type"])
+        for call_type, counters in semantic["call_types"].items():
+            hits.add_metric([call_type], counters["hits"])
+            misses.add_metric([call_type], counters["misses"])
+            lookups = counters["hits"] + counters["misses"]
+            ratio.add_metric([call_type], counters["hits"] / lookups if lookups else 0.0)
+        yield hits
+        yield misses
+        yield ratio
+        yield GaugeMetricFamily("tripmate_semantic_cache_entries", "Entries in the semantic cache", value=semantic["entries"])
+        for name in ("evictions", "expirations"):
+            yield CounterMetricFamily(f"tripmate_semantic_cache_{name}", f"Semantic cache {name}", value=semantic[name])
+
+        flights = self.ai_service.single_flight.stats()
+        coalesced = CounterMetricFamily(
+            "tripmate_llm_coalesced_calls", "LLM calls served by an identical in-flight call", labels=["call_type"]
+        )
+        waiting = GaugeMetricFamily(
+            "tripmate_llm_inflight_waiters", "Callers waiting on in-flight LLM calls", labels=["call_type"]
+        )
+        for call_type, counters in flights["call_types"].items():
+            coalesced.add_metric([call_type], counters["coalesced"])
+            waiting.add_metric([call_type], counters["waiting"])
+        yield coalesced
+        yield waiting
+
+        governor = self.ai_service.governor.stats()
+        for name in ("retries", "rate_limited", "shed"):
+            yield CounterMetricFamily(f"tripmate_upstream_{name}", f"Upstream calls {name.replace('_', ' ')}", value=governor[name])
+        for name in ("active", "waiting", "concurrency_limit", "tokens_in_window"):
+            yield GaugeMetricFamily(f"tripmate_upstream_{name}", f"Upstream governor {name.replace('_', ' ')}", value=governor[name])
+
+        parses = CounterMetricFamily(
+            "tripmate_structured_output_parses", "Structured output parse outcomes", labels=["call_type", "outcome"]
+        )
+        for call_type, counters in self.ai_service.parse_stats().items():
+            for outcome, count in counters.items():
+                parses.add_metric([call_type, outcome], count)
+        yield parses
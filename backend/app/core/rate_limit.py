@@ -0,0 +1,99 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+import json
+import math
+import time
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``rate`` tokens per second."""
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self, tokens: float = 1.0) -> float:
+        """Take tokens if available; otherwise return seconds until they are."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return 0.0
+        return (tokens - self.tokens) / self.rate
+
+class RateLimiter:
+    """Per-client token buckets, keeping at most ``max_clients`` buckets."""
+
+    def __init__(self, per_minute: int, burst: Optional[int] = None, max_clients: int = 10000):
+        self.capacity = float(burst or per_minute)
+        self.rate = per_minute / 60.0
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def check(self, client: str) -> float:
+        """Consume one request for ``client``; return 0 or the seconds to wait."""
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(self.capacity, self.rate)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+        return bucket.take()
+
+def client_key(scope: Dict[str, Any]) -> str:
+    """Identify the client by its address."""
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+class RateLimitMiddleware:
+    """ASGI middleware answering 429 once a client exceeds its request rate.
+
+    Only paths under ``path_prefix`` are limited, so health checks and docs
+    stay reachable; ``exempt_paths`` opts out cheap endpoints such as
+    per-keystroke autocomplete. Implemented as plain ASGI so streaming responses pass
+    through untouched.
+    """
+
+    def __init__(
+        self,
+        app: Callable,
+        per_minute: int,
+        burst: Optional[int] = None,
+        path_prefix: str = "/api",
+        exempt_paths: Tuple[str, ...] = (),
+        key_func: Callable[[Dict[str, Any]], str] = client_key
+    ):
+        self.app = app
+        self.enabled = per_minute > 0
+        self.limiter = RateLimiter(per_minute, burst) if self.enabled else None
+        self.path_prefix = path_prefix
+        self.exempt_paths = exempt_paths
+        self.key_func = key_func
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if (
+            not self.enabled
+            or scope["type"] != "http"
+            or scope.get("method") == "OPTIONS"
+            or not scope["path"].startswith(self.path_prefix)
+            or scope["path"] in self.exempt_paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        wait = self.limiter.check(self.key_func(scope))
+        if not wait:
+            await self.app(scope, receive, send)
+            return
+
+        body = json.dumps({"detail": "Rate limit exceeded"}).encode("utf-8")
+        headers: Tuple[Tuple[bytes, bytes], ...] = (
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("latin-1")),
+            (b"retry-after", str(math.ceil(wait)).encode("latin-1")),
+        )
+        await send({"type": "http.response.start", "status": 429, "headers": list(headers)})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,16 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+class ModelJSONResponse(JSONResponse):
+    """JSON response serialized straight to bytes by pydantic-core.
+
+    Models are encoded in one pass, without the intermediate dicts of
+    ``jsonable_encoder`` and the stdlib encoder. FastAPI does not validate
+    returned responses against ``response_model``, so build the content from
+    validated models; the decorator's model still documents the endpoint.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content, serialize_unknown=True)
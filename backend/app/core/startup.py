@@ -0,0 +1,76 @@
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+import asyncio
+import logging
+import time
+
+from prometheus_client import Gauge
+
+logger = logging.getLogger(__name__)
+
+STARTUP_SECONDS = Gauge(
+    "tripmate_startup_seconds",
+    "Time this process spent in each startup phase",
+    ["phase"]
+)
+
+class Readiness:
+    """Startup progress of this process, for the readiness probe.
+
+    ``started`` is a ``time.perf_counter()`` reading taken as early as
+    possible, before the app is imported. Each phase is timed into
+    ``tripmate_startup_seconds``; the ``ready`` phase covers the whole cold
+    start. The process is ready once it is serving and every step has
+    finished. Failed steps are logged but do not block readiness, since
+    warm-up only makes the first requests faster.
+    """
+
+    def __init__(self, started: float):
+        self.started = started
+        self.phases: Dict[str, float] = {}
+        self.pending: Set[str] = set()
+        self.errors: Dict[str, str] = {}
+        self._serving = False
+
+    def record(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = round(seconds, 4)
+        STARTUP_SECONDS.labels(phase).set(seconds)
+
+    def serving(self) -> None:
+        """Mark the process as accepting requests, after the required startup steps."""
+        self._serving = True
+        self.record("serving", time.perf_counter() - self.started)
+        self._check_ready()
+
+    def start(self, steps: Dict[str, Callable[[], Awaitable[Any]]]) -> "asyncio.Future[Any]":
+        """Run ``steps`` concurrently in the background; not ready until all finish."""
+        self.pending.update(steps)
+        return asyncio.gather(*(self._run(name, step) for name, step in steps.items()))
+
+    async def _run(self, name: str, step: Callable[[], Awaitable[Any]]) -> None:
+        start = time.perf_counter()
+        try:
+            await step()
+        except Exception as e:
+            logger.warning(f"Startup step {name} failed: {e}")
+            self.errors[name] = str(e)
+        finally:
+            self.record(name, time.perf_counter() - start)
+            self.pending.discard(name)
+            self._check_ready()
+
+    def _check_ready(self) -> None:
+        if self.ready and "ready" not in self.phases:
+            self.record("ready", time.perf_counter() - self.started)
+            logger.info(f"Ready after {self.phases['ready']:.2f}s: {self.phases}")
+
+    @property
+    def ready(self) -> bool:
+        return self._serving and not self.pending
+
+    def status(self) -> Dict[str, Optional[Any]]:
+        return {
+            "status": "ready" if self.ready else "starting",
+            "pending": sorted(self.pending),
+            "errors": self.errors,
+            "startup_seconds": self.phases
+        }
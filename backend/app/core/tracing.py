@@ -0,0 +1,54 @@
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    from opentelemetry import trace
+except ImportError:  # OpenTelemetry is optional
+    trace = None
+
+_tracer: Optional[Any] = None
+
+def configure_tracing(settings: Any, app: Any = None) -> bool:
+    """Export traces over OTLP when ``OTEL_ENABLED`` and the SDK is installed.
+
+    Needs ``opentelemetry-sdk`` and ``opentelemetry-exporter-otlp``; the
+    endpoint comes from the standard ``OTEL_EXPORTER_OTLP_ENDPOINT``. If
+    ``opentelemetry-instrumentation-fastapi`` is installed, ``app`` gets a
+    server span per request that the stage spans nest under.
+    """
+    global _tracer
+    if not settings.OTEL_ENABLED:
+        return False
+    try:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    except ImportError:
+        logger.warning("OTEL_ENABLED is set but the OpenTelemetry SDK/exporter is not installed")
+        return False
+
+    provider = TracerProvider(resource=Resource.create({"service.name": settings.OTEL_SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    trace.set_tracer_provider(provider)
+    _tracer = trace.get_tracer("tripmate")
+
+    if app is not None:
+        try:
+            from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+            FastAPIInstrumentor.instrument_app(app, excluded_urls="metrics,health")
+        except ImportError:
+            pass
+    return True
+
+@contextmanager
+def start_span(name: str, attributes: Optional[Dict[str, Any]] = None) -> Iterator[None]:
+    """Open a span when tracing is configured; otherwise do nothing."""
+    if _tracer is None:
+        yield
+        return
+    with _tracer.start_as_current_span(name, attributes=attributes or None):
+        yield
@@ -0,0 +1 @@
+# Bundled datasets
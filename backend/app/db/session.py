@@ -0,0 +1,46 @@
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.db.models import Base
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+def get_async_database_url(url: str) -> str:
+    """Map a plain database URL onto its async driver."""
+    scheme, sep, rest = url.partition("://")
+    if "+" in scheme or scheme not in ASYNC_DRIVERS:
+        return url
+    return f"{ASYNC_DRIVERS[scheme]}{sep}{rest}"
+
+def create_engine(url: str = None) -> AsyncEngine:
+    """Create a pooled async engine for the configured database."""
+    url = get_async_database_url(url or settings.DATABASE_URL)
+    engine_options = {"pool_pre_ping": True}
+    if not url.startswith("sqlite"):
+        engine_options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_recycle=settings.DB_POOL_RECYCLE
+        )
+    return create_async_engine(url, **engine_options)
+
+def create_session_factory(engine: AsyncEngine) -> async_sessionmaker:
+    return async_sessionmaker(engine, expire_on_commit=False)
+
+async def init_db(engine: AsyncEngine) -> None:
+    """Create tables and indexes that do not exist yet.
+
+    Server workers start together and race to create the schema; a worker
+    that loses sees "already exists" and retries, finding the tables there.
+    """
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    except DBAPIError:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
@@ -3,6 +3,8 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime
 from enum import Enum
 
+from app.models.costs import CostEstimate
+
 class MessageRole(str, Enum):
     USER = "user"
     ASSISTANT = "assistant"
@@ -26,17 +28,10 @@ class ChatMessage(BaseModel):
 class ChatRequest(BaseModel):
     message: str
     conversation_id: Optional[str] = Field(None, description="Conversation ID for context")
+    user_id: Optional[str] = Field(None, description="User that owns a new conversation")
     preferences: Optional[TripPreferences] = Field(None, description="User trip preferences")
     context: Optional[List[ChatMessage]] = Field(None, description="Previous conversation context")
 
-class ChatResponse(BaseModel):
-    message: str
-    conversation_id: str
-    suggestions: Optional[List[str]] = Field(None, description="Suggested follow-up questions")
-    itinerary: Optional[Dict[str, Any]] = Field(None, description="Generated trip itinerary")
-    cost_estimate: Optional[Dict[str, Any]] = Field(None, description="Cost estimates")
-    next_questions: Optional[List[str]] = Field(None, description="Clarifying questions to ask")
-
 class TripItinerary(BaseModel):
     destination: str
     duration: str
@@ -48,10 +43,34 @@ class TripItinerary(BaseModel):
     hidden_gems: List[str]
     tips: List[str]
 
+class ChatResponse(BaseModel):
+    message: str
+    conversation_id: str
+    suggestions: Optional[List[str]] = Field(None, description="Suggested follow-up questions")
+    itinerary: Optional[TripItinerary] = Field(None, description="Generated trip itinerary")
+    cost_estimate: Optional[CostEstimate] = Field(None, description="Cost estimates")
+    next_questions: Optional[List[str]] = Field(None, description="Clarifying questions to ask")
+    preferences: Optional[TripPreferences] = Field(None, description="Preferences merged across the conversation")
+
 class Conversation(BaseModel):
     id: str
     user_id: Optional[str] = None
     messages: List[ChatMessage]
     preferences: Optional[TripPreferences] = None
+    preferences_version: int = Field(0, description="Incremented whenever the merged preferences change")
+    message_count: int = Field(0, description="Total messages, including ones not loaded")
+    summary: Optional[str] = Field(None, description="Rolling summary of turns outside the context window")
+    summarized_count: int = Field(0, description="Number of leading messages covered by the summary")
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class ConversationSummary(BaseModel):
+    id: str
+    user_id: Optional[str] = None
+    message_count: int
+    created_at: datetime
+    updated_at: datetime
+
+class ConversationPage(BaseModel):
+    items: List[ConversationSummary]
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page, if any")
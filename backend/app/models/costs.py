@@ -0,0 +1,30 @@
+from pydantic import BaseModel, Field
+from typing import Annotated, Dict, List, Literal, Optional
+
+BudgetLevel = Literal["low", "medium", "high"]
+
+class CostEstimate(BaseModel):
+    destination: Optional[str] = Field(None, description="Destination as requested")
+    matched: Optional[str] = Field(None, description="Catalog destination whose prices were used; None for average prices")
+    days: int
+    people: int
+    budget_level: BudgetLevel
+    currency: str = "USD"
+    total: float
+    per_day: float
+    per_person: float
+    low: float = Field(..., description="Lower end of the likely range")
+    high: float = Field(..., description="Upper end of the likely range")
+    breakdown: Dict[str, float] = Field(..., description="Total per category")
+    shares: Dict[str, float] = Field(..., description="Percentage of the total per category")
+
+class CostEstimateBatchRequest(BaseModel):
+    """Every combination of destination, days, party size and budget is estimated."""
+    destinations: List[str] = Field(..., min_length=1, max_length=500)
+    days: List[Annotated[int, Field(ge=1, le=365)]] = Field([7], min_length=1, max_length=60)
+    people: List[Annotated[int, Field(ge=1, le=50)]] = Field([2], min_length=1, max_length=20)
+    budgets: List[BudgetLevel] = Field(["medium"], min_length=1, max_length=3)
+
+class CostEstimateBatch(BaseModel):
+    estimates: List[CostEstimate]
+    total: int
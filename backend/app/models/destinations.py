@@ -0,0 +1,33 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+class Destination(BaseModel):
+    name: str
+    country: str
+    description: str = ""
+    budget_level: str = Field(..., description="Budget level (low, medium, high)")
+    best_time: str = Field("", description="Best months to travel, e.g. 'April-October'")
+    best_months: List[int] = Field(default_factory=list, description="Best travel months, 1-12")
+    interests: List[str] = Field(default_factory=list)
+    highlights: List[str] = Field(default_factory=list)
+    aliases: List[str] = Field(default_factory=list)
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+    popularity: int = Field(0, description="Relative popularity, 0-100")
+
+class DestinationPage(BaseModel):
+    destinations: List[Destination]
+    total: int = Field(..., description="Matches across all pages")
+    limit: int
+    offset: int
+
+class Suggestion(BaseModel):
+    name: str
+    country: str
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+    popularity: int = 0
+
+class AutocompleteResponse(BaseModel):
+    query: str
+    suggestions: List[Suggestion]
@@ -0,0 +1,32 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+from enum import Enum
+
+from app.models.chat import TripItinerary, TripPreferences
+
+class JobStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+class PlanJob(BaseModel):
+    job_id: str
+    status: JobStatus = JobStatus.PENDING
+    result: Optional[TripItinerary] = Field(None, description="Generated itinerary once succeeded")
+    error: Optional[str] = Field(None, description="Failure reason once failed")
+    callback_url: Optional[str] = Field(None, description="Webhook notified when the job finishes")
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class PlanBatchRequest(BaseModel):
+    preferences: List[TripPreferences] = Field(..., min_length=1, max_length=100)
+    bypass_cache: bool = False
+
+class PlanBatchItem(BaseModel):
+    """One NDJSON line of a batch plan response."""
+    index: int = Field(..., description="Position of the preference set in the request")
+    status: JobStatus
+    result: Optional[TripItinerary] = None
+    error: Optional[str] = None
@@ -0,0 +1,29 @@
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Optional
+
+class RouteLeg(BaseModel):
+    from_location: str
+    to_location: str
+    mode: str = Field(..., description="flight, train or bus")
+    operator: Optional[str] = None
+    duration_minutes: int
+    cost_usd: float
+
+class TravelRoute(BaseModel):
+    transport_type: str = Field(..., description="Mode of every leg, or 'mixed'")
+    duration: str = Field(..., description="Human-readable duration, e.g. '4h 15m'")
+    cost: str = Field(..., description="Human-readable cost, e.g. '$57'")
+    description: str
+    operator: Optional[str] = None
+    duration_minutes: int
+    cost_usd: float
+    labels: List[str] = Field(default_factory=list, description="'fastest' and/or 'cheapest'")
+    legs: List[RouteLeg]
+
+class RouteOptions(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    from_location: str = Field(..., alias="from")
+    to_location: str = Field(..., alias="to")
+    routes: List[TravelRoute]
+    total: int
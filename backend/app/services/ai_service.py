@@ -1,16 +1,217 @@
-import openai
-from typing import List, Dict, Any, Optional
+import asyncio
+import json
+import time
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple, Callable, Type
 from app.core.config import settings
+from app.core.metrics import LLM_REQUEST_DURATION, record_tokens, stage
 from app.models.chat import ChatMessage, TripPreferences, TripItinerary
-import json
+from app.models.costs import CostEstimate
+from app.services.cache import LLMCache
+from app.services.context_builder import ContextBuilder, get_token_counter
+from app.services.cost_model import BUDGET_LEVELS, DEFAULT_DAYS, CostModel, parse_days
+from app.services.itinerary_optimizer import ItineraryOptimizer
+from app.services.llm import create_provider
+from app.services.governor import (
+    PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, UpstreamGovernor, UpstreamOverloadedError, is_retryable
+)
+from app.services.single_flight import SingleFlight
+from app.services.preference_extractor import RuleBasedPreferenceExtractor, merge_preferences
+from app.services.semantic_cache import SemanticCache
+from app.services.structured_output import (
+    JSONArrayStreamParser, ModelT, StructuredOutputError, coerce_number, parse_json, validate_partial
+)
 import logging
 
 logger = logging.getLogger(__name__)
 
+FALLBACK_RESPONSE = "I'm having trouble processing your request right now. Please try again in a moment."
+
+# Call types shed first when the upstream is under pressure
+BACKGROUND_CALL_TYPES = {"itinerary"}
+
 class AIService:
     def __init__(self):
-        self.client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
-        self.model = settings.OPENAI_MODEL
+        self.provider = create_provider(settings)
+        self.model = self.provider.model
+        self.governor = UpstreamGovernor.from_settings(settings)
+        self.cache = LLMCache.from_settings(settings)
+        self.single_flight = SingleFlight()
+        self.context_builder = ContextBuilder(
+            max_tokens=settings.CONTEXT_MAX_TOKENS,
+            summary_max_tokens=settings.CONTEXT_SUMMARY_MAX_TOKENS,
+            count_tokens=get_token_counter(self.model)
+        )
+        self.preference_extractor = RuleBasedPreferenceExtractor()
+        self.itinerary_optimizer = ItineraryOptimizer.from_settings(settings)
+        self.cost_model = CostModel.load()
+        self.semantic_cache = SemanticCache.from_settings(settings)
+        self._parse_stats: Dict[str, Dict[str, int]] = {}
+
+    async def close(self) -> None:
+        await self.provider.close()
+
+    async def _create_completion(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float,
+        timeout: Optional[float] = None,
+        call_type: str = "chat",
+        bypass_cache: bool = False,
+        parse: Optional[Callable[[str], Any]] = None,
+        on_delta: Optional[Callable[[str], None]] = None,
+        coalesce: bool = True,
+        json_mode: bool = False
+    ) -> Any:
+        """Run a chat completion, bounded by a per-call timeout.
+        
+        Completions are cached per call type. When ``parse`` is given, the
+        parsed result is returned and the raw content is only cached if it
+        parses successfully. When ``on_delta`` is given, the completion is
+        streamed and each chunk is passed to it as it arrives; cache hits
+        produce no deltas.
+        
+        Concurrent identical calls share one upstream request unless
+        ``bypass_cache`` is set or ``coalesce`` is False. Only the caller
+        that started the request receives deltas.
+        """
+        ttl = settings.LLM_CACHE_TTLS.get(call_type, 0)
+        use_cache = self.cache.enabled and ttl > 0 and not bypass_cache
+        coalesce = coalesce and settings.LLM_SINGLE_FLIGHT_ENABLED and not bypass_cache
+        
+        key = None
+        if use_cache or coalesce:
+            key = LLMCache.make_key(self.model, messages, temperature, max_tokens)
+        if use_cache:
+            cached = await self.cache.get(key, call_type)
+            if cached is not None:
+                return parse(cached) if parse else cached
+        
+        async def request() -> str:
+            return await asyncio.wait_for(
+                self._request_completion(messages, max_tokens, temperature, call_type, on_delta, json_mode),
+                timeout=timeout or settings.OPENAI_TIMEOUT
+            )
+        
+        if coalesce:
+            content = await self.single_flight.do(key, request, call_type)
+        else:
+            content = await request()
+        result = parse(content) if parse else content
+        
+        if use_cache:
+            await self.cache.set(key, content, ttl)
+        return result
+
+    async def _request_completion(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float,
+        call_type: str = "chat",
+        on_delta: Optional[Callable[[str], None]] = None,
+        json_mode: bool = False
+    ) -> str:
+        """Call the provider through the governor and return the content."""
+        priority = PRIORITY_BACKGROUND if call_type in BACKGROUND_CALL_TYPES else PRIORITY_INTERACTIVE
+        streamed = False
+        
+        async def call() -> str:
+            nonlocal streamed
+            if on_delta is None:
+                completion = await self.provider.complete(messages, max_tokens, temperature, json_mode)
+                content = completion.content
+                prompt_tokens, completion_tokens = completion.prompt_tokens, completion.completion_tokens
+                if prompt_tokens is None or completion_tokens is None:
+                    prompt_tokens, completion_tokens = self._estimate_tokens(messages, content)
+            else:
+                parts = []
+                async for delta in self.provider.stream(messages, max_tokens, temperature, json_mode):
+                    streamed = True
+                    parts.append(delta)
+                    on_delta(delta)
+                content = "".join(parts)
+                prompt_tokens, completion_tokens = self._estimate_tokens(messages, content)
+            self.governor.record_usage(prompt_tokens + completion_tokens)
+            record_tokens(call_type, prompt_tokens, completion_tokens)
+            return content
+        
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            # Once deltas have been passed on, a retry would repeat them
+            content = await self.governor.run(
+                call,
+                priority,
+                retryable=lambda e: not streamed and is_retryable(e)
+            )
+            outcome = "ok"
+            return content
+        except UpstreamOverloadedError:
+            outcome = "shed"
+            raise
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        finally:
+            LLM_REQUEST_DURATION.labels(call_type, outcome).observe(time.perf_counter() - start)
+
+    def _estimate_tokens(self, messages: List[Dict[str, str]], content: str) -> Tuple[int, int]:
+        """Estimate (prompt, completion) tokens for calls that report no usage."""
+        count = self.context_builder.count_tokens
+        return sum(count(message["content"]) for message in messages), count(content)
+
+    async def _create_structured_completion(self, call_type: str, bypass_cache: bool = False, **kwargs: Any) -> Any:
+        """Run a completion whose ``parse`` may reject the output.
+        
+        Unusable output is retried up to ``STRUCTURED_OUTPUT_RETRIES`` times,
+        bypassing the cache. Retries are not streamed to ``on_delta``.
+        """
+        attempts = settings.STRUCTURED_OUTPUT_RETRIES + 1
+        for attempt in range(attempts):
+            try:
+                return await self._create_completion(
+                    call_type=call_type,
+                    bypass_cache=bypass_cache or attempt > 0,
+                    **kwargs
+                )
+            except StructuredOutputError as e:
+                self._record_parse(call_type, "failed")
+                if attempt + 1 == attempts:
+                    raise
+                self._record_parse(call_type, "retries")
+                logger.warning(f"Retrying {call_type} completion after unusable output: {e}")
+                kwargs.pop("on_delta", None)
+
+    def _parse_structured(
+        self,
+        content: str,
+        model: Type[ModelT],
+        call_type: str,
+        defaults: Optional[Dict[str, Any]] = None,
+        normalize: Optional[Callable[[Any], Any]] = None
+    ) -> ModelT:
+        """Parse model output into ``model``, repairing it where possible."""
+        with stage("parsing", call_type=call_type):
+            parsed = parse_json(content)
+            data = normalize(parsed.data) if normalize else parsed.data
+            result, invalid = validate_partial(model, data, defaults)
+        if invalid:
+            logger.warning(f"Defaulted missing or invalid {call_type} fields: {', '.join(invalid)}")
+            self._record_parse(call_type, "partial")
+        else:
+            self._record_parse(call_type, "repaired" if parsed.repaired else "ok")
+        return result
+
+    def _record_parse(self, call_type: str, outcome: str) -> None:
+        counters = self._parse_stats.setdefault(
+            call_type, {"ok": 0, "repaired": 0, "partial": 0, "failed": 0, "retries": 0}
+        )
+        counters[outcome] += 1
+
+    def parse_stats(self) -> Dict[str, Dict[str, int]]:
+        """Return structured-output parse outcomes per call type."""
+        return {name: dict(counters) for name, counters in self._parse_stats.items()}
         
     def _build_system_prompt(self) -> str:
         """Build the system prompt for TripMate AI assistant."""
@@ -33,27 +234,40 @@ Your goal is to act like a personal travel planner + local guide + budget manage
 
 Format your responses as JSON when providing structured data like itineraries or cost estimates."""
 
-    def _extract_preferences(self, message: str) -> TripPreferences:
+    async def _extract_preferences(self, message: str, bypass_cache: bool = False) -> TripPreferences:
+        """Extract the travel preferences stated in this message only.
+        
+        The local rule-based extractor runs first; the LLM is only asked when
+        its confidence is below ``PREFERENCE_CONFIDENCE_THRESHOLD``.
+        """
+        with stage("preference_extraction"):
+            extracted = None
+            if settings.PREFERENCE_RULES_ENABLED:
+                result = self.preference_extractor.extract(message)
+                extracted = result.preferences
+                if result.confidence < settings.PREFERENCE_CONFIDENCE_THRESHOLD:
+                    llm_preferences = await self._extract_preferences_with_llm(message, bypass_cache)
+                    extracted = merge_preferences(extracted, llm_preferences)
+            else:
+                extracted = await self._extract_preferences_with_llm(message, bypass_cache)
+            return extracted
+
+    async def _extract_preferences_with_llm(self, message: str, bypass_cache: bool = False) -> TripPreferences:
         """Extract travel preferences from user message using AI."""
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
+            return await self._create_structured_completion(
                 messages=[
                     {"role": "system", "content": "Extract travel preferences from this message. Return only a JSON object with keys: budget, dates, people, interests, destination, duration, transport_preference. Use null for missing values."},
                     {"role": "user", "content": message}
                 ],
                 max_tokens=500,
-                temperature=0.1
+                temperature=0.1,
+                timeout=settings.PREFERENCE_TIMEOUT,
+                call_type="preferences",
+                bypass_cache=bypass_cache,
+                json_mode=True,
+                parse=lambda content: self._parse_structured(content, TripPreferences, "preferences")
             )
-            
-            content = response.choices[0].message.content
-            if content.startswith("```json"):
-                content = content[7:-3]
-            elif content.startswith("```"):
-                content = content[3:-3]
-                
-            preferences_data = json.loads(content)
-            return TripPreferences(**preferences_data)
         except Exception as e:
             logger.error(f"Error extracting preferences: {e}")
             return TripPreferences()
@@ -79,128 +293,420 @@ Format your responses as JSON when providing structured data like itineraries or
             
         return questions
 
-    def _generate_travel_response(self, message: str, context: List[ChatMessage], preferences: TripPreferences) -> str:
+    def _build_travel_messages(self, message: str, context: List[ChatMessage], summary: Optional[str] = None) -> List[Dict[str, str]]:
+        """Build the prompt messages for a travel planning response."""
+        messages = [
+            {"role": "system", "content": self._build_system_prompt()}
+        ]
+        
+        # Add the rolling summary and as many recent turns as the budget allows
+        messages.extend(self.context_builder.build(context, summary))
+        
+        # Add current message
+        messages.append({"role": "user", "content": message})
+        return messages
+
+    async def _generate_travel_response(self, message: str, context: List[ChatMessage], summary: Optional[str] = None) -> str:
         """Generate intelligent travel planning response."""
+        cache_key = self._chat_cache_key(message, context, summary)
+        if cache_key and (cached := self.semantic_cache.get("chat", *cache_key)) is not None:
+            return cached
         try:
-            # Build conversation context
-            messages = [
-                {"role": "system", "content": self._build_system_prompt()}
-            ]
-            
-            # Add conversation history
-            for msg in context[-10:]:  # Last 10 messages for context
-                messages.append({"role": msg.role.value, "content": msg.content})
-            
-            # Add current message
-            messages.append({"role": "user", "content": message})
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                max_tokens=settings.OPENAI_MAX_TOKENS,
-                temperature=settings.OPENAI_TEMPERATURE
-            )
-            
-            return response.choices[0].message.content
+            with stage("response_generation"):
+                response = await self._create_completion(
+                    messages=self._build_travel_messages(message, context, summary),
+                    max_tokens=settings.OPENAI_MAX_TOKENS,
+                    temperature=settings.OPENAI_TEMPERATURE
+                )
         except Exception as e:
             logger.error(f"Error generating AI response: {e}")
-            return "I'm having trouble processing your request right now. Please try again in a moment."
+            return FALLBACK_RESPONSE
+        if cache_key:
+            self.semantic_cache.set("chat", *cache_key, response)
+        return response
 
-    def _generate_itinerary(self, preferences: TripPreferences) -> Optional[TripItinerary]:
-        """Generate a detailed trip itinerary using AI."""
+    async def _stream_travel_response(self, message: str, context: List[ChatMessage], summary: Optional[str] = None) -> AsyncIterator[str]:
+        """Stream the travel planning response token by token."""
+        cache_key = self._chat_cache_key(message, context, summary)
+        if cache_key and (cached := self.semantic_cache.get("chat", *cache_key)) is not None:
+            yield cached
+            return
+        deltas: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+        
+        async def generate() -> str:
+            with stage("response_generation"):
+                return await self._create_completion(
+                    messages=self._build_travel_messages(message, context, summary),
+                    max_tokens=settings.OPENAI_MAX_TOKENS,
+                    temperature=settings.OPENAI_TEMPERATURE,
+                    on_delta=deltas.put_nowait,
+                    coalesce=False
+                )
+        
+        completion = asyncio.create_task(generate())
+        completion.add_done_callback(lambda _: deltas.put_nowait(None))
+        
+        streamed = False
         try:
-            prompt = f"""Create a detailed travel itinerary based on these preferences:
-            Destination: {preferences.destination or 'Not specified'}
-            Duration: {preferences.duration or 'Not specified'}
-            Budget: {preferences.budget or 'Not specified'}
-            People: {preferences.people or 'Not specified'}
-            Interests: {', '.join(preferences.interests) if preferences.interests else 'Not specified'}
-            
-            Return a JSON object with this structure:
-            {{
-                "destination": "string",
-                "duration": "string",
-                "daily_plans": [{{"day": "string", "activities": ["string"], "cost": "float"}}],
-                "total_cost": {{"accommodation": "float", "transport": "float", "food": "float", "activities": "float"}},
-                "transport_options": [{{"type": "string", "cost": "float", "duration": "string"}}],
-                "accommodation_suggestions": [{{"type": "string", "cost_per_night": "float", "description": "string"}}],
-                "food_recommendations": [{{"name": "string", "type": "string", "cost": "string", "description": "string"}}],
-                "hidden_gems": ["string"],
-                "tips": ["string"]
-            }}"""
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a travel expert. Generate detailed itineraries in JSON format."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=2000,
-                temperature=0.3
-            )
-            
-            content = response.choices[0].message.content
-            if content.startswith("```json"):
-                content = content[7:-3]
-            elif content.startswith("```"):
-                content = content[3:-3]
-                
-            itinerary_data = json.loads(content)
-            return TripItinerary(**itinerary_data)
+            while (delta := await deltas.get()) is not None:
+                streamed = True
+                yield delta
+            response = await completion
+            if cache_key:
+                self.semantic_cache.set("chat", *cache_key, response)
+        except Exception as e:
+            logger.error(f"Error streaming AI response: {e}")
+            if not streamed:
+                yield FALLBACK_RESPONSE
+        finally:
+            completion.cancel()
+
+    def _build_itinerary_messages(self, preferences: TripPreferences) -> List[Dict[str, str]]:
+        """Build the prompt messages for an itinerary."""
+        prompt = f"""Create a detailed travel itinerary based on these preferences:
+        Destination: {preferences.destination or 'Not specified'}
+        Duration: {preferences.duration or 'Not specified'}
+        Budget: {preferences.budget or 'Not specified'}
+        People: {preferences.people or 'Not specified'}
+        Interests: {', '.join(preferences.interests) if preferences.interests else 'Not specified'}
+        
+        Return a JSON object with this structure:
+        {{
+            "destination": "string",
+            "duration": "string",
+            "daily_plans": [{{"day": "string", "activities": ["string"], "cost": "float"}}],
+            "total_cost": {{"accommodation": "float", "transport": "float", "food": "float", "activities": "float"}},
+            "transport_options": [{{"type": "string", "cost": "float", "duration": "string"}}],
+            "accommodation_suggestions": [{{"type": "string", "cost_per_night": "float", "description": "string"}}],
+            "food_recommendations": [{{"name": "string", "type": "string", "cost": "string", "description": "string"}}],
+            "hidden_gems": ["string"],
+            "tips": ["string"]
+        }}"""
+        return [
+            {"role": "system", "content": "You are a travel expert. Generate detailed itineraries in JSON format."},
+            {"role": "user", "content": prompt}
+        ]
+
+    def _parse_itinerary(self, content: str, preferences: TripPreferences) -> TripItinerary:
+        """Parse an itinerary, keeping the valid parts of truncated or sloppy output."""
+        def normalize(data: Any) -> Any:
+            if isinstance(data, dict) and isinstance(data.get("total_cost"), dict):
+                costs = {name: coerce_number(value) for name, value in data["total_cost"].items()}
+                data["total_cost"] = {name: value for name, value in costs.items() if value is not None}
+            return data
+        
+        itinerary = self._parse_structured(
+            content,
+            TripItinerary,
+            "itinerary",
+            defaults={
+                "destination": preferences.destination or "",
+                "duration": preferences.duration or "",
+                "daily_plans": [],
+                "total_cost": {},
+                "transport_options": [],
+                "accommodation_suggestions": [],
+                "food_recommendations": [],
+                "hidden_gems": [],
+                "tips": []
+            },
+            normalize=normalize
+        )
+        if not itinerary.daily_plans:
+            raise StructuredOutputError("Itinerary has no daily plans")
+        return itinerary
+
+    async def _generate_itinerary(
+        self,
+        preferences: TripPreferences,
+        bypass_cache: bool = False,
+        on_delta: Optional[Callable[[str], None]] = None
+    ) -> Optional[TripItinerary]:
+        """Generate a detailed trip itinerary using AI, then order it by travel time.
+        
+        Itineraries for the same trip with similar interests are served from
+        the semantic cache unless ``bypass_cache`` is set.
+        """
+        cache_key = None if bypass_cache else self._itinerary_cache_key(preferences)
+        if cache_key and (cached := self.semantic_cache.get("itinerary", *cache_key)) is not None:
+            return self._optimize_itinerary(cached, preferences)
+        try:
+            with stage("itinerary_generation"):
+                itinerary = await self._create_structured_completion(
+                    messages=self._build_itinerary_messages(preferences),
+                    max_tokens=2000,
+                    temperature=0.3,
+                    timeout=settings.ITINERARY_TIMEOUT,
+                    call_type="itinerary",
+                    bypass_cache=bypass_cache,
+                    json_mode=True,
+                    parse=lambda content: self._parse_itinerary(content, preferences),
+                    on_delta=on_delta
+                )
+        except UpstreamOverloadedError:
+            raise
         except Exception as e:
             logger.error(f"Error generating itinerary: {e}")
             return None
+        if cache_key:
+            self.semantic_cache.set("itinerary", *cache_key, itinerary)
+        return self._optimize_itinerary(itinerary, preferences)
+
+    def _trip_key(self, preferences: TripPreferences) -> Dict[str, Any]:
+        """The preferences that define a trip, in canonical form."""
+        row = self.cost_model.resolve(preferences.destination)
+        return {
+            "destination": self.cost_model.names[row] if row is not None else (preferences.destination or "").lower(),
+            "days": parse_days(preferences.duration),
+            "budget": (preferences.budget or "").lower(),
+            "people": preferences.people
+        }
+
+    def _chat_cache_key(
+        self,
+        message: str,
+        context: List[ChatMessage],
+        summary: Optional[str] = None
+    ) -> Optional[Tuple[str, str]]:
+        """Semantic cache key and text for a travel response, if it can be cached.
+        
+        Only opening messages are cached, since later replies depend on the
+        conversation. The key holds every preference the rules find in the
+        message; the rest of the message is compared by similarity.
+        """
+        if context or summary or not self.semantic_cache.caches("chat"):
+            return None
+        preferences = self.preference_extractor.extract(message).preferences
+        key = {
+            **self._trip_key(preferences),
+            "interests": sorted(preferences.interests or []),
+            "dates": (preferences.dates or "").lower(),
+            "transport": preferences.transport_preference
+        }
+        return json.dumps(key, sort_keys=True), self.preference_extractor.residual(message)
+
+    def _itinerary_cache_key(self, preferences: TripPreferences) -> Optional[Tuple[str, str]]:
+        """Semantic cache key and text for an itinerary; interests, dates and transport are compared by similarity."""
+        if not self.semantic_cache.caches("itinerary"):
+            return None
+        text = " ".join([*(preferences.interests or []), preferences.dates or "", preferences.transport_preference or ""])
+        return json.dumps(self._trip_key(preferences), sort_keys=True), text
+
+    def _optimize_itinerary(self, itinerary: TripItinerary, preferences: TripPreferences) -> TripItinerary:
+        """Reorder the daily plans and check the costs locally; the model's output is kept on failure."""
+        try:
+            with stage("itinerary_optimization"):
+                itinerary = self.itinerary_optimizer.optimize(itinerary)
+            with stage("cost_validation"):
+                estimate = self._estimate_costs(
+                    preferences, itinerary.destination or None, parse_days(itinerary.duration)
+                )
+                total_cost = self.cost_model.check_total(itinerary.total_cost, estimate)
+            if total_cost != itinerary.total_cost:
+                logger.info(f"Corrected itinerary costs for {itinerary.destination}: {itinerary.total_cost} -> {total_cost}")
+                itinerary = itinerary.model_copy(update={"total_cost": total_cost})
+        except Exception as e:
+            logger.error(f"Error optimizing itinerary: {e}")
+        return itinerary
+
+    async def _stream_itinerary(
+        self,
+        preferences: TripPreferences,
+        on_day: Callable[[Dict[str, Any]], None]
+    ) -> Optional[TripItinerary]:
+        """Generate an itinerary, passing each daily plan to ``on_day`` as it arrives.
+        
+        Days are parsed out of the streamed output incrementally and are
+        only a preview: the returned itinerary may reorder them, or replace
+        them after a retry, and cache hits stream no days at all.
+        """
+        parser = JSONArrayStreamParser("daily_plans")
+        
+        def on_delta(delta: str) -> None:
+            for day in parser.feed(delta):
+                if isinstance(day, dict):
+                    on_day(day)
+        
+        return await self._generate_itinerary(preferences, on_delta=on_delta)
 
-    async def process_chat_message(self, message: str, context: List[ChatMessage] = None) -> Dict[str, Any]:
-        """Process a chat message and return AI response with suggestions."""
+    async def process_chat_message(
+        self,
+        message: str,
+        context: List[ChatMessage] = None,
+        summary: Optional[str] = None,
+        known_preferences: Optional[TripPreferences] = None
+    ) -> Dict[str, Any]:
+        """Process a chat message and return AI response with suggestions.
+        
+        ``context`` holds the previous messages, not including ``message``.
+        Only the new message is extracted; the result is merged into
+        ``known_preferences`` and returned both merged and as a delta.
+        Results are returned as validated models, ready to be serialized.
+        """
         if context is None:
             context = []
             
-        # Extract preferences from the message
-        preferences = self._extract_preferences(message)
+        # Preference extraction and the travel response are independent,
+        # so both upstream calls are in flight at the same time
+        preferences_task = asyncio.create_task(self._extract_preferences(message))
+        response_task = asyncio.create_task(self._generate_travel_response(message, context, summary))
+        tasks = [preferences_task, response_task]
+        
+        try:
+            preferences_delta = await preferences_task
+            preferences = merge_preferences(known_preferences, preferences_delta)
+            
+            # Start the itinerary as soon as the preferences are sufficient,
+            # without waiting for the travel response to finish
+            itinerary_task = None
+            if self._can_generate_itinerary(preferences):
+                itinerary_task = asyncio.create_task(self._generate_itinerary(preferences))
+                tasks.append(itinerary_task)
+            
+            ai_response = await response_task
+            itinerary = None
+            if itinerary_task:
+                try:
+                    itinerary = await itinerary_task
+                except UpstreamOverloadedError as e:
+                    logger.info(f"Skipped itinerary: {e}")
+        finally:
+            # Propagate cancellation (e.g. client disconnect) to pending calls
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
         
         # Generate clarifying questions if needed
         clarifying_questions = self._generate_clarifying_questions(preferences)
         
-        # Generate AI response
-        ai_response = self._generate_travel_response(message, context, preferences)
-        
-        # Generate itinerary if we have enough information
-        itinerary = None
-        if (preferences.destination and preferences.duration and 
-            preferences.budget and preferences.people):
-            itinerary = self._generate_itinerary(preferences)
-        
-        # Generate cost estimates if we have budget info
-        cost_estimate = None
-        if preferences.budget:
-            cost_estimate = {
-                "budget_level": preferences.budget,
-                "estimated_total": self._estimate_costs(preferences),
-                "breakdown": {
-                    "accommodation": "20-40%",
-                    "transport": "15-30%",
-                    "food": "20-30%",
-                    "activities": "10-25%"
-                }
-            }
-        
         return {
             "message": ai_response,
             "clarifying_questions": clarifying_questions,
-            "itinerary": itinerary.dict() if itinerary else None,
-            "cost_estimate": cost_estimate,
-            "preferences": preferences.dict()
+            "itinerary": itinerary,
+            "cost_estimate": self._build_cost_estimate(preferences),
+            "preferences": preferences,
+            "preferences_delta": preferences_delta
         }
 
-    def _estimate_costs(self, preferences: TripPreferences) -> Dict[str, str]:
-        """Estimate costs based on budget level and destination."""
-        budget_levels = {
-            "low": {"daily": "$30-80", "weekly": "$200-560"},
-            "medium": {"daily": "$80-200", "weekly": "$560-1400"},
-            "high": {"daily": "$200-500+", "weekly": "$1400-3500+"}
-        }
+    async def stream_chat_message(
+        self,
+        message: str,
+        context: List[ChatMessage] = None,
+        summary: Optional[str] = None,
+        known_preferences: Optional[TripPreferences] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """Process a chat message, yielding (event, data) pairs as results become ready.
+        
+        Response tokens are yielded first as ``token`` events, followed by the
+        ``questions``, ``cost_estimate`` and ``itinerary`` events and a final
+        ``done`` event carrying the full message, the merged preferences and
+        the preferences delta extracted from this message. Daily plans are
+        yielded as ``itinerary_day`` previews as soon as they are parsed,
+        which may be while tokens are still streaming. The ``itinerary`` event
+        replaces all of them: its days may be reordered, come from a retry or
+        the cache, and are never followed by more ``itinerary_day`` events.
+        Estimates, itineraries and preferences are yielded as models.
+        """
+        if context is None:
+            context = []
+        
+        days: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue()
+        preferences_task = asyncio.create_task(self._extract_preferences(message))
+        itinerary_task = asyncio.create_task(
+            self._generate_itinerary_when_ready(preferences_task, known_preferences, days)
+        )
+        tasks = [preferences_task, itinerary_task]
+        
+        try:
+            parts = []
+            days_done = False
+            async for delta in self._stream_travel_response(message, context, summary):
+                parts.append(delta)
+                yield "token", {"content": delta}
+                while not days.empty():
+                    day = days.get_nowait()
+                    if day is None:
+                        days_done = True
+                    else:
+                        yield "itinerary_day", day
+            
+            preferences_delta = await preferences_task
+            preferences = merge_preferences(known_preferences, preferences_delta)
+            yield "questions", self._generate_clarifying_questions(preferences)
+            yield "cost_estimate", self._build_cost_estimate(preferences)
+            
+            # The itinerary task puts None once it has no more days
+            while not days_done:
+                day = await days.get()
+                if day is None:
+                    days_done = True
+                else:
+                    yield "itinerary_day", day
+            
+            itinerary = await itinerary_task
+            yield "itinerary", itinerary
+            
+            yield "done", {
+                "message": "".join(parts),
+                "preferences": preferences,
+                "preferences_delta": preferences_delta
+            }
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _generate_itinerary_when_ready(
+        self,
+        preferences_task: "asyncio.Task[TripPreferences]",
+        known_preferences: Optional[TripPreferences] = None,
+        days: Optional["asyncio.Queue[Optional[Dict[str, Any]]]"] = None
+    ) -> Optional[TripItinerary]:
+        """Generate an itinerary once the merged preferences are sufficient.
+        
+        With ``days``, daily plans are streamed into the queue, followed by
+        None when generation finishes.
+        """
+        try:
+            preferences = merge_preferences(known_preferences, await preferences_task)
+            if not self._can_generate_itinerary(preferences):
+                return None
+            if days is None:
+                return await self._generate_itinerary(preferences)
+            return await self._stream_itinerary(preferences, days.put_nowait)
+        except UpstreamOverloadedError as e:
+            logger.info(f"Skipped itinerary: {e}")
+            return None
+        finally:
+            if days is not None:
+                days.put_nowait(None)
+
+    def _build_cost_estimate(self, preferences: TripPreferences) -> Optional[CostEstimate]:
+        """Build the cost estimate if we have budget info."""
+        if not preferences.budget:
+            return None
+        return self._estimate_costs(preferences)
+
+    def _can_generate_itinerary(self, preferences: TripPreferences) -> bool:
+        """Check whether the preferences are complete enough for an itinerary."""
+        return bool(preferences.destination and preferences.duration and
+                    preferences.budget and preferences.people)
+
+    def _estimate_costs(
+        self,
+        preferences: TripPreferences,
+        destination: Optional[str] = None,
+        days: Optional[int] = None
+    ) -> CostEstimate:
+        """Estimate trip costs from the local price indices.
         
-        if preferences.budget in budget_levels:
-            return budget_levels[preferences.budget]
-        return {"daily": "Varies", "weekly": "Varies"}
+        Missing preferences fall back to a week for one person at the
+        medium tier; budgets other than low/medium/high count as medium.
+        """
+        budget = (preferences.budget or "").lower()
+        return self.cost_model.estimate(
+            destination or preferences.destination,
+            days=days or parse_days(preferences.duration) or DEFAULT_DAYS,
+            people=max(preferences.people or 1, 1),
+            budget=budget if budget in BUDGET_LEVELS else "medium"
+        )
@@ -0,0 +1,159 @@
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import time
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # pragma: no cover - redis is optional at runtime
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+# Entries promoted from Redis are kept locally for a short time only
+PROMOTED_TTL = 300
+
+class MemoryCache:
+    """In-process LRU cache with per-entry expiry."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class RedisCache:
+    """Shared cache tier backed by Redis.
+
+    Any client exposing the async ``get``/``set``/``delete`` commands can be
+    passed in, e.g. a ``fakeredis.aioredis.FakeRedis`` instance.
+    """
+
+    def __init__(self, client: Any, prefix: str = "tripmate:llm:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisCache":
+        if aioredis is None:
+            raise RuntimeError("The redis package is required for the Redis cache tier")
+        return cls(aioredis.from_url(url, decode_responses=True))
+
+    async def get(self, key: str) -> Optional[str]:
+        try:
+            return await self.client.get(self.prefix + key)
+        except Exception as e:
+            logger.warning(f"Redis cache read failed: {e}")
+            return None
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        try:
+            await self.client.set(self.prefix + key, value, ex=ttl)
+        except Exception as e:
+            logger.warning(f"Redis cache write failed: {e}")
+
+    async def delete(self, key: str) -> None:
+        try:
+            await self.client.delete(self.prefix + key)
+        except Exception as e:
+            logger.warning(f"Redis cache delete failed: {e}")
+
+class LLMCache:
+    """Two-tier (memory, then Redis) cache for LLM completions."""
+
+    def __init__(self, memory: MemoryCache, redis: Optional[RedisCache] = None, enabled: bool = True):
+        self.memory = memory
+        self.redis = redis
+        self.enabled = enabled
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    @classmethod
+    def from_settings(cls, settings: Any) -> "LLMCache":
+        redis = None
+        if settings.LLM_CACHE_REDIS_ENABLED:
+            redis = RedisCache.from_url(settings.REDIS_URL)
+        return cls(
+            MemoryCache(max_entries=settings.LLM_CACHE_MAX_ENTRIES),
+            redis=redis,
+            enabled=settings.LLM_CACHE_ENABLED
+        )
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> str:
+        """Build a content-addressed key from the canonical request."""
+        canonical = json.dumps(
+            {
+                "model": model,
+                "messages": messages,
+                "temperature": temperature,
+                "max_tokens": max_tokens
+            },
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _record(self, call_type: str, outcome: str) -> None:
+        counters = self._stats.setdefault(call_type, {"hits": 0, "misses": 0, "memory_hits": 0, "redis_hits": 0})
+        counters[outcome] += 1
+
+    async def get(self, key: str, call_type: str = "default") -> Optional[str]:
+        value = await self.memory.get(key)
+        if value is not None:
+            self._record(call_type, "hits")
+            self._record(call_type, "memory_hits")
+            return value
+
+        if self.redis is not None:
+            value = await self.redis.get(key)
+            if value is not None:
+                await self.memory.set(key, value, PROMOTED_TTL)
+                self._record(call_type, "hits")
+                self._record(call_type, "redis_hits")
+                return value
+
+        self._record(call_type, "misses")
+        return None
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        await self.memory.set(key, value, ttl)
+        if self.redis is not None:
+            await self.redis.set(key, value, ttl)
+
+    async def delete(self, key: str) -> None:
+        await self.memory.delete(key)
+        if self.redis is not None:
+            await self.redis.delete(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters per call type."""
+        return {
+            "enabled": self.enabled,
+            "memory_entries": len(self.memory),
+            "redis_enabled": self.redis is not None,
+            "call_types": {name: dict(counters) for name, counters in self._stats.items()}
+        }
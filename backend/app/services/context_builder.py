@@ -0,0 +1,134 @@
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import logging
+import math
+import re
+
+from app.models.chat import ChatMessage, Conversation
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - tiktoken is optional
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Approximate per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+def approximate_tokens(text: str) -> int:
+    """Estimate tokens as roughly four characters per token."""
+    return math.ceil(len(text) / 4)
+
+def get_token_counter(model: str) -> Callable[[str], int]:
+    """Return a token counter for the model, falling back to an approximation."""
+    if tiktoken is not None:
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+            return lambda text: len(encoding.encode(text))
+        except Exception as e:
+            logger.warning(f"Falling back to approximate token counts: {e}")
+    return approximate_tokens
+
+class ContextBuilder:
+    """Pack conversation history into a token budget.
+
+    The most recent turns that fit into ``max_tokens`` are sent verbatim.
+    Older turns are folded into a rolling summary stored on the
+    conversation, so each message is summarized only once.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int,
+        summary_max_tokens: int,
+        count_tokens: Callable[[str], int] = approximate_tokens,
+        line_max_chars: int = 200
+    ):
+        self.max_tokens = max_tokens
+        self.summary_max_tokens = summary_max_tokens
+        self.count_tokens = count_tokens
+        self.line_max_chars = line_max_chars
+
+    def message_tokens(self, message: ChatMessage) -> int:
+        return self.count_tokens(message.content) + MESSAGE_OVERHEAD_TOKENS
+
+    def select_recent(self, history: List[ChatMessage]) -> int:
+        """Return how many trailing messages fit into the history budget."""
+        budget = self.max_tokens - self.summary_max_tokens
+        used = 0
+        count = 0
+        for message in reversed(history):
+            used += self.message_tokens(message)
+            if used > budget:
+                break
+            count += 1
+        return count
+
+    def build(self, history: List[ChatMessage], summary: Optional[str] = None) -> List[Dict[str, str]]:
+        """Build prompt messages from the summary and the most recent turns."""
+        messages = []
+        if summary:
+            messages.append({"role": "system", "content": SUMMARY_PREFIX + summary})
+        keep = self.select_recent(history)
+        for msg in history[len(history) - keep:]:
+            messages.append({"role": msg.role.value, "content": msg.content})
+        return messages
+
+    def _summarize_message(self, message: ChatMessage) -> str:
+        text = " ".join(message.content.split())
+        sentence = re.split(r"(?<=[.!?])\s", text, maxsplit=1)[0]
+        if len(sentence) > self.line_max_chars:
+            sentence = sentence[:self.line_max_chars - 3].rstrip() + "..."
+        return f"{message.role.value.capitalize()}: {sentence}"
+
+    def fold(self, summary: Optional[str], messages: List[ChatMessage]) -> Optional[str]:
+        """Fold messages into the summary, dropping the oldest lines over budget."""
+        lines = summary.splitlines() if summary else []
+        lines.extend(self._summarize_message(message) for message in messages)
+        while lines and self.count_tokens("\n".join(lines)) > self.summary_max_tokens:
+            lines.pop(0)
+        return "\n".join(lines) or None
+
+    def unsummarized_range(self, conversation: Conversation) -> Optional[Tuple[int, int]]:
+        """Positions of messages not in the summary that were not loaded.
+
+        ``conversation.messages`` may only hold the latest messages; any gap
+        between the summary and the first loaded message must be loaded
+        and passed to ``roll_summary`` so it is folded, not dropped.
+        """
+        offset = conversation.message_count - len(conversation.messages)
+        if conversation.summarized_count >= offset:
+            return None
+        return conversation.summarized_count, offset
+
+    def roll_summary(
+        self,
+        conversation: Conversation,
+        earlier: Sequence[ChatMessage] = ()
+    ) -> Tuple[Optional[str], int]:
+        """Fold turns that fell out of the window into the conversation summary.
+
+        ``conversation.messages`` may only hold the latest messages, so
+        positions are tracked against ``message_count``. ``earlier`` holds
+        the messages in ``unsummarized_range``. Returns the new summary and
+        the number of leading messages it covers, which never goes past
+        what was actually folded.
+        """
+        history = conversation.messages
+        offset = conversation.message_count - len(history)
+        window_start = offset + len(history) - self.select_recent(history)
+
+        if window_start <= conversation.summarized_count:
+            return conversation.summary, conversation.summarized_count
+
+        gap = self.unsummarized_range(conversation)
+        if gap is not None and len(earlier) < gap[1] - gap[0]:
+            # Messages that were not loaded cannot be skipped, so the summary
+            # only advances over the ones that were
+            return self.fold(conversation.summary, list(earlier)), gap[0] + len(earlier)
+
+        start = max(conversation.summarized_count, offset) - offset
+        folded = [*earlier, *history[start:window_start - offset]]
+        return self.fold(conversation.summary, folded), window_start
@@ -0,0 +1,433 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import base64
+import json
+import logging
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.db.models import ConversationRecord, MessageRecord
+from app.db.session import create_engine, create_session_factory, init_db
+from app.models.chat import (
+    ChatMessage, Conversation, ConversationPage, ConversationSummary,
+    MessageRole, TripPreferences
+)
+from app.services.preference_extractor import merge_preferences
+
+logger = logging.getLogger(__name__)
+
+# Attempts at the optimistic preferences update before giving up
+PREFERENCES_UPDATE_ATTEMPTS = 5
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+class PreferencesConflictError(RuntimeError):
+    """Raised when concurrent writers keep changing the preferences."""
+
+def encode_cursor(updated_at: datetime, conversation_id: str) -> str:
+    """Encode the (updated_at, id) keyset position as an opaque cursor."""
+    raw = json.dumps([updated_at.isoformat(), conversation_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        updated_at, conversation_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(updated_at), str(conversation_id)
+    except Exception as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor}") from e
+
+class ConversationStore(ABC):
+    """Repository interface for conversations and their messages."""
+
+    async def init(self) -> None:
+        """Prepare the backing storage."""
+
+    async def close(self) -> None:
+        """Release any held resources."""
+
+    @abstractmethod
+    async def get(self, conversation_id: str, message_limit: Optional[int] = None) -> Optional[Conversation]:
+        """Load a conversation with at most ``message_limit`` of its latest messages."""
+
+    @abstractmethod
+    async def get_messages(self, conversation_id: str, start: int, end: int) -> List[ChatMessage]:
+        """Load the messages at positions ``start`` to ``end`` (exclusive), oldest first."""
+
+    @abstractmethod
+    async def get_or_create(
+        self,
+        conversation_id: str,
+        message_limit: Optional[int] = None,
+        user_id: Optional[str] = None
+    ) -> Conversation:
+        """Load a conversation like ``get``, creating it if it does not exist."""
+
+    @abstractmethod
+    async def append_messages(
+        self,
+        conversation_id: str,
+        messages: List[ChatMessage],
+        preferences_update: Optional[TripPreferences] = None,
+        summary: Optional[str] = None,
+        summarized_count: Optional[int] = None
+    ) -> Optional[TripPreferences]:
+        """Append messages to a conversation without rewriting earlier ones.
+        
+        ``preferences_update`` holds only what the new messages changed. It is
+        merged into the stored preferences, whose version is bumped when they
+        change. Returns the merged preferences. The rolling summary is only
+        updated when ``summarized_count`` is given.
+        """
+
+    @abstractmethod
+    async def list_conversations(
+        self,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        user_id: Optional[str] = None,
+        updated_after: Optional[datetime] = None,
+        updated_before: Optional[datetime] = None
+    ) -> ConversationPage:
+        """List conversations, most recently updated first, one page at a time."""
+
+    @abstractmethod
+    async def count(self) -> int:
+        """Return the number of stored conversations."""
+
+def _build_page(summaries: List[ConversationSummary], limit: int) -> ConversationPage:
+    """Build a page from up to ``limit + 1`` summaries."""
+    next_cursor = None
+    if len(summaries) > limit:
+        summaries = summaries[:limit]
+        last = summaries[-1]
+        next_cursor = encode_cursor(last.updated_at, last.id)
+    return ConversationPage(items=summaries, next_cursor=next_cursor)
+
+class InMemoryConversationStore(ConversationStore):
+    """Process-local store, useful for development and tests."""
+
+    def __init__(self):
+        self._conversations: Dict[str, Conversation] = {}
+
+    async def count(self) -> int:
+        return len(self._conversations)
+
+    def _copy(self, conversation: Conversation, message_limit: Optional[int]) -> Conversation:
+        messages = conversation.messages
+        if message_limit is not None:
+            messages = messages[-message_limit:] if message_limit > 0 else []
+        return conversation.copy(update={"messages": list(messages)})
+
+    async def get(self, conversation_id: str, message_limit: Optional[int] = None) -> Optional[Conversation]:
+        conversation = self._conversations.get(conversation_id)
+        if conversation is None:
+            return None
+        return self._copy(conversation, message_limit)
+
+    async def get_messages(self, conversation_id: str, start: int, end: int) -> List[ChatMessage]:
+        conversation = self._conversations.get(conversation_id)
+        if conversation is None:
+            return []
+        return list(conversation.messages[start:end])
+
+    async def get_or_create(
+        self,
+        conversation_id: str,
+        message_limit: Optional[int] = None,
+        user_id: Optional[str] = None
+    ) -> Conversation:
+        if conversation_id not in self._conversations:
+            self._conversations[conversation_id] = Conversation(
+                id=conversation_id,
+                user_id=user_id,
+                messages=[]
+            )
+        return self._copy(self._conversations[conversation_id], message_limit)
+
+    async def append_messages(
+        self,
+        conversation_id: str,
+        messages: List[ChatMessage],
+        preferences_update: Optional[TripPreferences] = None,
+        summary: Optional[str] = None,
+        summarized_count: Optional[int] = None
+    ) -> Optional[TripPreferences]:
+        conversation = self._conversations.setdefault(
+            conversation_id, Conversation(id=conversation_id, messages=[])
+        )
+        conversation.messages.extend(messages)
+        conversation.message_count += len(messages)
+        if preferences_update is not None:
+            merged = merge_preferences(conversation.preferences, preferences_update)
+            if merged != conversation.preferences:
+                conversation.preferences = merged
+                conversation.preferences_version += 1
+        if summarized_count is not None:
+            conversation.summary = summary
+            conversation.summarized_count = summarized_count
+        conversation.updated_at = datetime.utcnow()
+        return conversation.preferences
+
+    async def list_conversations(
+        self,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        user_id: Optional[str] = None,
+        updated_after: Optional[datetime] = None,
+        updated_before: Optional[datetime] = None
+    ) -> ConversationPage:
+        position = decode_cursor(cursor) if cursor else None
+        conversations = [
+            conv for conv in self._conversations.values()
+            if (user_id is None or conv.user_id == user_id)
+            and (updated_after is None or conv.updated_at >= updated_after)
+            and (updated_before is None or conv.updated_at < updated_before)
+            and (position is None or (conv.updated_at, conv.id) < position)
+        ]
+        conversations.sort(key=lambda conv: (conv.updated_at, conv.id), reverse=True)
+        return _build_page(
+            [
+                ConversationSummary(
+                    id=conv.id,
+                    user_id=conv.user_id,
+                    message_count=conv.message_count,
+                    created_at=conv.created_at,
+                    updated_at=conv.updated_at
+                )
+                for conv in conversations[:limit + 1]
+            ],
+            limit
+        )
+
+class SQLConversationStore(ConversationStore):
+    """SQLAlchemy-backed store; SQLite in development, Postgres in production."""
+
+    def __init__(self, database_url: Optional[str] = None):
+        self.engine = create_engine(database_url)
+        self.session_factory = create_session_factory(self.engine)
+
+    async def init(self) -> None:
+        await init_db(self.engine)
+
+    async def close(self) -> None:
+        await self.engine.dispose()
+
+    async def count(self) -> int:
+        async with self.session_factory() as session:
+            return await session.scalar(select(func.count()).select_from(ConversationRecord))
+
+    @staticmethod
+    def _to_messages(records: List[MessageRecord]) -> List[ChatMessage]:
+        return [
+            ChatMessage(
+                role=MessageRole(record.role),
+                content=record.content,
+                timestamp=record.timestamp,
+                metadata=record.message_metadata
+            )
+            for record in records
+        ]
+
+    def _to_conversation(self, record: ConversationRecord, messages: List[MessageRecord]) -> Conversation:
+        return Conversation(
+            id=record.id,
+            user_id=record.user_id,
+            messages=self._to_messages(messages),
+            preferences=TripPreferences(**record.preferences) if record.preferences else None,
+            preferences_version=record.preferences_version,
+            message_count=record.message_count,
+            summary=record.summary,
+            summarized_count=record.summarized_count,
+            created_at=record.created_at,
+            updated_at=record.updated_at
+        )
+
+    async def get(self, conversation_id: str, message_limit: Optional[int] = None) -> Optional[Conversation]:
+        async with self.session_factory() as session:
+            record = await session.get(ConversationRecord, conversation_id)
+            if record is None:
+                return None
+
+            # Only the latest messages are loaded, newest first, then reversed
+            query = (
+                select(MessageRecord)
+                .where(MessageRecord.conversation_id == conversation_id)
+                .order_by(MessageRecord.id.desc())
+            )
+            if message_limit is not None:
+                query = query.limit(message_limit)
+            messages = list((await session.scalars(query)).all())
+            messages.reverse()
+            return self._to_conversation(record, messages)
+
+    async def get_messages(self, conversation_id: str, start: int, end: int) -> List[ChatMessage]:
+        if end <= start:
+            return []
+        async with self.session_factory() as session:
+            query = (
+                select(MessageRecord)
+                .where(MessageRecord.conversation_id == conversation_id)
+                .order_by(MessageRecord.id)
+                .offset(start)
+                .limit(end - start)
+            )
+            records = (await session.scalars(query)).all()
+        return self._to_messages(records)
+
+    async def get_or_create(
+        self,
+        conversation_id: str,
+        message_limit: Optional[int] = None,
+        user_id: Optional[str] = None
+    ) -> Conversation:
+        conversation = await self.get(conversation_id, message_limit)
+        if conversation is not None:
+            return conversation
+
+        now = datetime.utcnow()
+        async with self.session_factory() as session:
+            session.add(ConversationRecord(
+                id=conversation_id,
+                user_id=user_id,
+                created_at=now,
+                updated_at=now
+            ))
+            try:
+                await session.commit()
+            except IntegrityError:
+                # Another worker created it concurrently
+                await session.rollback()
+                return await self.get(conversation_id, message_limit)
+        return Conversation(
+            id=conversation_id,
+            user_id=user_id,
+            messages=[],
+            created_at=now,
+            updated_at=now
+        )
+
+    async def append_messages(
+        self,
+        conversation_id: str,
+        messages: List[ChatMessage],
+        preferences_update: Optional[TripPreferences] = None,
+        summary: Optional[str] = None,
+        summarized_count: Optional[int] = None
+    ) -> Optional[TripPreferences]:
+        values: Dict[str, Any] = {
+            "message_count": ConversationRecord.message_count + len(messages),
+            "updated_at": datetime.utcnow()
+        }
+        if summarized_count is not None:
+            values["summary"] = summary
+            values["summarized_count"] = summarized_count
+
+        async with self.session_factory() as session:
+            async with session.begin():
+                session.add_all([
+                    MessageRecord(
+                        conversation_id=conversation_id,
+                        role=message.role.value,
+                        content=message.content,
+                        timestamp=message.timestamp,
+                        message_metadata=message.metadata
+                    )
+                    for message in messages
+                ])
+                if preferences_update is None:
+                    await session.execute(
+                        update(ConversationRecord)
+                        .where(ConversationRecord.id == conversation_id)
+                        .values(**values)
+                    )
+                    return None
+                return await self._merge_preferences(session, conversation_id, preferences_update, values)
+
+    async def _merge_preferences(
+        self,
+        session: Any,
+        conversation_id: str,
+        preferences_update: TripPreferences,
+        values: Dict[str, Any]
+    ) -> Optional[TripPreferences]:
+        """Merge a preferences delta using an optimistic version check."""
+        for _ in range(PREFERENCES_UPDATE_ATTEMPTS):
+            row = (await session.execute(
+                select(ConversationRecord.preferences, ConversationRecord.preferences_version)
+                .where(ConversationRecord.id == conversation_id)
+            )).one_or_none()
+            if row is None:
+                return None
+
+            current = TripPreferences(**row.preferences) if row.preferences else None
+            merged = merge_preferences(current, preferences_update)
+            update_values = dict(values)
+            if merged != current:
+                update_values["preferences"] = merged.dict()
+                update_values["preferences_version"] = row.preferences_version + 1
+
+            result = await session.execute(
+                update(ConversationRecord)
+                .where(
+                    ConversationRecord.id == conversation_id,
+                    ConversationRecord.preferences_version == row.preferences_version
+                )
+                .values(**update_values)
+            )
+            if result.rowcount:
+                return merged
+        raise PreferencesConflictError(f"Could not update preferences of conversation {conversation_id}")
+
+    async def list_conversations(
+        self,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        user_id: Optional[str] = None,
+        updated_after: Optional[datetime] = None,
+        updated_before: Optional[datetime] = None
+    ) -> ConversationPage:
+        # Only summary columns are selected; message rows are never touched
+        query = select(
+            ConversationRecord.id,
+            ConversationRecord.user_id,
+            ConversationRecord.message_count,
+            ConversationRecord.created_at,
+            ConversationRecord.updated_at
+        )
+        if user_id is not None:
+            query = query.where(ConversationRecord.user_id == user_id)
+        if updated_after is not None:
+            query = query.where(ConversationRecord.updated_at >= updated_after)
+        if updated_before is not None:
+            query = query.where(ConversationRecord.updated_at < updated_before)
+        if cursor:
+            cursor_updated_at, cursor_id = decode_cursor(cursor)
+            query = query.where(or_(
+                ConversationRecord.updated_at < cursor_updated_at,
+                and_(
+                    ConversationRecord.updated_at == cursor_updated_at,
+                    ConversationRecord.id < cursor_id
+                )
+            ))
+        query = query.order_by(
+            ConversationRecord.updated_at.desc(),
+            ConversationRecord.id.desc()
+        ).limit(limit + 1)
+
+        async with self.session_factory() as session:
+            rows = await session.execute(query)
+            return _build_page(
+                [ConversationSummary(**row._mapping) for row in rows],
+                limit
+            )
+
+def create_conversation_store() -> ConversationStore:
+    """Create the conversation store selected in settings."""
+    if settings.CONVERSATION_STORE == "memory":
+        return InMemoryConversationStore()
+    return SQLConversationStore()
@@ -0,0 +1,152 @@
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+import csv
+import json
+import re
+
+import numpy as np
+
+from app.models.costs import CostEstimate
+from app.services.preference_extractor import DEFAULT_GAZETTEER
+
+DEFAULT_PRICES = Path(__file__).resolve().parent.parent / "data" / "price_indices.csv"
+CATEGORIES = ("accommodation", "food", "transport", "activities")
+BUDGET_LEVELS = ("low", "medium", "high")
+
+# Price indices are mid-range daily USD: accommodation per room, the rest per
+# person. Tiers scale each category differently, in CATEGORIES order.
+TIER_MULTIPLIERS = np.array([
+    [0.45, 0.55, 0.7, 0.5],
+    [1.0, 1.0, 1.0, 1.0],
+    [2.8, 2.2, 2.0, 2.0],
+])
+PEOPLE_PER_ROOM = 2
+DEFAULT_DAYS = 7
+# Likely range around an estimate, as factors of the total
+ESTIMATE_RANGE = (0.8, 1.25)
+# Itinerary cost figures further than this factor from the estimate are replaced
+TOTAL_COST_TOLERANCE = 2.0
+
+DURATION_PATTERN = re.compile(r"(\d+)\s*(day|night|week|month)?", re.I)
+DAYS_PER_UNIT = {"day": 1, "night": 1, "week": 7, "month": 30}
+WORD_PATTERN = re.compile(r"\w+")
+
+def _normalize(text: str) -> str:
+    return " ".join(WORD_PATTERN.findall(text.lower()))
+
+def parse_days(duration: Optional[str]) -> Optional[int]:
+    """Trip length in days for durations like "5 days", "2 weeks" or "3 nights"."""
+    m = DURATION_PATTERN.search(duration or "")
+    if not m or not int(m.group(1)):
+        return None
+    unit = (m.group(2) or "day").lower()
+    # Three nights away is a four-day trip
+    return int(m.group(1)) * DAYS_PER_UNIT[unit] + (unit == "night")
+
+class CostModel:
+    """Trip cost estimates from per-destination price indices.
+
+    Estimates are evaluated as arrays: destination rows, trip lengths, party
+    sizes and tiers of any number of trips are combined in one pass, so
+    comparing hundreds of destinations costs about as much as one. Unknown
+    destinations use the median prices across the catalog.
+    """
+
+    def __init__(self, names: List[str], prices: np.ndarray, aliases: Optional[Dict[str, str]] = None):
+        self.names = names
+        # The extra last row holds the median prices for unknown destinations
+        self._prices = np.vstack([prices, np.median(prices, axis=0)])
+        self._rows: Dict[str, int] = {_normalize(name): row for row, name in enumerate(names)}
+        for alias, name in (aliases or {}).items():
+            if _normalize(name) in self._rows:
+                self._rows.setdefault(_normalize(alias), self._rows[_normalize(name)])
+        self._pattern = re.compile(r"\b(?:%s)\b" % "|".join(
+            re.escape(key) for key in sorted(self._rows, key=len, reverse=True)
+        ))
+
+    @classmethod
+    def load(cls, path: Path = DEFAULT_PRICES, gazetteer_path: Path = DEFAULT_GAZETTEER) -> "CostModel":
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        with open(gazetteer_path, encoding="utf-8") as f:
+            places = json.load(f)
+        aliases = {alias: place["name"] for place in places for alias in place.get("aliases", [])}
+        prices = np.array([[float(row[category]) for category in CATEGORIES] for row in rows])
+        return cls([row["name"] for row in rows], prices, aliases)
+
+    def resolve(self, destination: Optional[str]) -> Optional[int]:
+        """Price row for a destination name or alias, also within text like "Paris, France"."""
+        if not destination:
+            return None
+        key = _normalize(destination)
+        row = self._rows.get(key)
+        if row is None:
+            match = self._pattern.search(key)
+            row = self._rows[match.group()] if match else None
+        return row
+
+    def amounts(self, rows: np.ndarray, days: np.ndarray, people: np.ndarray, tiers: np.ndarray) -> np.ndarray:
+        """Cost per category, one row per trip; a row of -1 prices at the median."""
+        prices = self._prices[rows] * TIER_MULTIPLIERS[tiers]
+        nights = np.maximum(days - 1, 1)
+        rooms = -(-people // PEOPLE_PER_ROOM)
+        person_days = people * days
+        quantities = np.stack([rooms * nights, person_days, person_days, person_days], axis=1)
+        return prices * quantities
+
+    def estimate(self, destination: Optional[str], days: int, people: int, budget: str) -> CostEstimate:
+        return self.estimate_grid([destination], [days], [people], [budget])[0]
+
+    def estimate_grid(
+        self,
+        destinations: Sequence[Optional[str]],
+        days: Sequence[int],
+        people: Sequence[int],
+        budgets: Sequence[str]
+    ) -> List[CostEstimate]:
+        """Estimate every combination, destinations varying slowest."""
+        resolved = [self.resolve(destination) for destination in destinations]
+        rows = np.array([-1 if row is None else row for row in resolved])
+        tiers = np.array([BUDGET_LEVELS.index(budget) for budget in budgets])
+        destination_index, trip_days, party, tier = (axis.ravel() for axis in np.meshgrid(
+            np.arange(len(destinations)), np.asarray(days), np.asarray(people), tiers, indexing="ij"
+        ))
+        amounts = self.amounts(rows[destination_index], trip_days, party, tier)
+        totals = amounts.sum(axis=1)
+        columns = zip(
+            destination_index.tolist(), trip_days.tolist(), party.tolist(), tier.tolist(),
+            totals.round(2).tolist(), (totals / trip_days).round(2).tolist(), (totals / party).round(2).tolist(),
+            amounts.round(2).tolist(), (100 * amounts / totals[:, None]).round(1).tolist()
+        )
+        estimates = []
+        for index, trip_length, size, level, total, per_day, per_person, breakdown, shares in columns:
+            row = resolved[index]
+            estimates.append(CostEstimate(
+                destination=destinations[index],
+                matched=None if row is None else self.names[row],
+                days=trip_length,
+                people=size,
+                budget_level=BUDGET_LEVELS[level],
+                total=total,
+                per_day=per_day,
+                per_person=per_person,
+                low=round(total * ESTIMATE_RANGE[0], 2),
+                high=round(total * ESTIMATE_RANGE[1], 2),
+                breakdown=dict(zip(CATEGORIES, breakdown)),
+                shares=dict(zip(CATEGORIES, shares))
+            ))
+        return estimates
+
+    def check_total(self, total_cost: Dict[str, float], estimate: CostEstimate) -> Dict[str, float]:
+        """Replace missing or implausible category costs with the estimate.
+
+        Figures within ``TOTAL_COST_TOLERANCE`` of the estimate are kept, as
+        are categories the model does not know about.
+        """
+        checked = dict(total_cost)
+        for category in CATEGORIES:
+            expected = estimate.breakdown[category]
+            value = total_cost.get(category)
+            if value is None or not expected / TOTAL_COST_TOLERANCE <= value <= expected * TOTAL_COST_TOLERANCE:
+                checked[category] = expected
+        return checked
@@ -0,0 +1,325 @@
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import calendar
+import csv
+import json
+import re
+
+import numpy as np
+
+from app.models.destinations import Destination, DestinationPage
+from app.services.preference_extractor import DEFAULT_GAZETTEER, INTEREST_KEYWORDS
+
+DEFAULT_CATALOG = Path(__file__).resolve().parent.parent / "data" / "destinations.csv"
+BUDGET_LEVELS = ("low", "medium", "high")
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+# Text scores by how a query matched; trigram similarity fills in below these
+EXACT_SCORE = 1.0
+PREFIX_SCORE = 0.9
+WORD_PREFIX_SCORE = 0.75
+TERM_SCORE = 0.5
+MIN_TRIGRAM_SIMILARITY = 0.3
+INTEREST_WEIGHT = 0.3
+POPULARITY_WEIGHT = 0.15
+MAX_SUGGESTIONS = 20
+SHORT_PREFIX_LENGTH = 2
+
+EMPTY_IDS = np.empty(0, dtype=np.int32)
+INTEREST_BITS = {interest: bit for bit, interest in enumerate(INTEREST_KEYWORDS)}
+
+# "temples" or "hiking" also selects the interest it belongs to
+INTEREST_ALIASES = {
+    keyword: interest for interest, keywords in INTEREST_KEYWORDS.items() for keyword in keywords
+}
+
+def _normalize(text: str) -> str:
+    return " ".join(WORD_PATTERN.findall(text.lower()))
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def parse_months(spec: str) -> List[int]:
+    """Expand ``"4-10;12-2"`` into month numbers; ranges may wrap the year."""
+    months: List[int] = []
+    for part in filter(None, (p.strip() for p in spec.split(";"))):
+        start, _, end = part.partition("-")
+        first, last = int(start), int(end or start)
+        month = first
+        while True:
+            if month not in months:
+                months.append(month)
+            if month == last:
+                break
+            month = month % 12 + 1
+    return months
+
+def format_months(spec: str) -> str:
+    """``"3-5;9-11"`` -> ``"March-May, September-November"``."""
+    ranges = []
+    for part in filter(None, (p.strip() for p in spec.split(";"))):
+        names = [calendar.month_name[int(m)] for m in part.split("-")]
+        ranges.append("-".join(names))
+    return ", ".join(ranges)
+
+def load_destinations(path: Path = DEFAULT_CATALOG, gazetteer_path: Path = DEFAULT_GAZETTEER) -> List[Destination]:
+    """Read the bundled catalog, joining coordinates and aliases from the gazetteer."""
+    with open(gazetteer_path, encoding="utf-8") as f:
+        places = {place["name"]: place for place in json.load(f)}
+    destinations = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            place = places.get(row["name"], {})
+            destinations.append(Destination(
+                name=row["name"],
+                country=row["country"],
+                description=row["description"],
+                budget_level=row["budget_level"],
+                best_time=format_months(row["best_months"]),
+                best_months=parse_months(row["best_months"]),
+                interests=[i for i in row["interests"].split(";") if i],
+                highlights=[h for h in row["highlights"].split(";") if h],
+                aliases=place.get("aliases", []),
+                lat=place.get("lat"),
+                lon=place.get("lon"),
+                popularity=place.get("popularity", 0)
+            ))
+    return destinations
+
+class _PrefixIndex:
+    """Sorted keys with a parallel array of entry ids, for prefix lookups by bisection."""
+
+    def __init__(self, pairs: Iterable[Tuple[str, int]]):
+        ordered = sorted(pairs)
+        self.keys = [key for key, _ in ordered]
+        self.ids = np.fromiter((entry for _, entry in ordered), dtype=np.int32, count=len(ordered))
+
+    def prefix(self, text: str) -> np.ndarray:
+        lo = bisect_left(self.keys, text)
+        hi = bisect_left(self.keys, text + "\uffff", lo)
+        return self.ids[lo:hi]
+
+    def exact(self, text: str) -> np.ndarray:
+        lo = bisect_left(self.keys, text)
+        return self.ids[lo:bisect_right(self.keys, text, lo)]
+
+class DestinationCatalog:
+    """In-memory destination index built once and queried per request.
+
+    Names, aliases and countries are searchable by prefix (sorted keys) and
+    fuzzily by trigram similarity; interests and highlight words form an
+    inverted index; budget levels and travel months are bitmaps. Every query
+    is a handful of NumPy operations over arrays of entry ids, so latency
+    stays flat as the catalog grows.
+    """
+
+    def __init__(self, destinations: Sequence[Destination]):
+        self.destinations = list(destinations)
+        n = len(self.destinations)
+
+        labels: List[Tuple[str, int]] = []
+        words: List[Tuple[str, int]] = []
+        names: List[Tuple[str, int]] = []
+        terms: Dict[str, Set[int]] = defaultdict(set)
+        for entry, destination in enumerate(self.destinations):
+            for label in {_normalize(text) for text in [destination.name, destination.country, *destination.aliases]}:
+                labels.append((label, entry))
+                words.extend((word, entry) for word in label.split()[1:])
+            for label in {_normalize(text) for text in [destination.name, *destination.aliases]}:
+                names.append((label, entry))
+                names.extend((word, entry) for word in label.split()[1:])
+            for text in [*destination.interests, *destination.highlights]:
+                for term in _normalize(text).split():
+                    terms[term].add(entry)
+        for keyword, interest in INTEREST_ALIASES.items():
+            if interest in terms and " " not in keyword:
+                terms[keyword] |= terms[interest]
+        self._labels = _PrefixIndex(labels)
+        self._words = _PrefixIndex(words)
+        self._names = _PrefixIndex(names)
+        self._terms = {term: np.array(sorted(ids), dtype=np.int32) for term, ids in terms.items()}
+
+        # Trigram postings run over labels, not entries, so aliases don't dilute similarity
+        self._label_entries = self._labels.ids
+        grams: Dict[str, List[int]] = defaultdict(list)
+        gram_counts = np.empty(len(self._labels.keys), dtype=np.float32)
+        for label_id, label in enumerate(self._labels.keys):
+            label_grams = _trigrams(label)
+            gram_counts[label_id] = len(label_grams)
+            for gram in label_grams:
+                grams[gram].append(label_id)
+        self._grams = {gram: np.array(ids, dtype=np.int32) for gram, ids in grams.items()}
+        self._gram_counts = gram_counts
+
+        self._budgets = {
+            level: np.fromiter((d.budget_level == level for d in self.destinations), dtype=bool, count=n)
+            for level in BUDGET_LEVELS
+        }
+        self._month_bits = np.fromiter(
+            (sum(1 << month for month in d.best_months) for d in self.destinations), dtype=np.uint16, count=n
+        )
+        self._interest_bits = np.fromiter(
+            (sum(1 << INTEREST_BITS[i] for i in set(d.interests) if i in INTEREST_BITS) for d in self.destinations),
+            dtype=np.uint16, count=n
+        )
+        popularity = np.fromiter((d.popularity for d in self.destinations), dtype=np.float32, count=n)
+        # Pre-weighted so ranking only adds the other signals
+        self._popularity = popularity * np.float32(POPULARITY_WEIGHT / max(float(popularity.max(initial=0)), 1.0))
+        self._by_popularity = np.argsort(-self._popularity, kind="stable").astype(np.int32)
+
+        # One- and two-letter prefixes match too much of the catalog to rank per keystroke
+        short_prefixes = {key[:length] for key in self._names.keys for length in range(1, SHORT_PREFIX_LENGTH + 1)}
+        self._short_prefixes = {
+            prefix: self._most_popular(self._names.prefix(prefix), MAX_SUGGESTIONS) for prefix in short_prefixes
+        }
+
+    @classmethod
+    def load(cls, path: Path = DEFAULT_CATALOG, gazetteer_path: Path = DEFAULT_GAZETTEER) -> "DestinationCatalog":
+        return cls(load_destinations(path, gazetteer_path))
+
+    def __len__(self) -> int:
+        return len(self.destinations)
+
+    def suggest(self, prefix: str, limit: int = 8) -> List[Destination]:
+        """Most popular destinations whose name, alias or a word of either starts with ``prefix``."""
+        prefix = _normalize(prefix)
+        if not prefix:
+            return []
+        if len(prefix) <= SHORT_PREFIX_LENGTH and limit <= MAX_SUGGESTIONS:
+            ids = self._short_prefixes.get(prefix, EMPTY_IDS)[:limit]
+        else:
+            ids = self._most_popular(self._names.prefix(prefix), limit)
+        return [self.destinations[i] for i in ids.tolist()]
+
+    def _most_popular(self, ids: np.ndarray, limit: int) -> np.ndarray:
+        if len(ids) > 1:
+            ids = np.unique(ids)
+        if len(ids) > limit:
+            # Keep the lowest ids among entries tied at the cutoff, as the final sort would
+            popularity = self._popularity[ids]
+            cutoff = -np.partition(-popularity, limit - 1)[limit - 1]
+            above = ids[popularity > cutoff]
+            ids = np.concatenate((above, ids[popularity == cutoff][:limit - len(above)]))
+        return ids[np.lexsort((ids, -self._popularity[ids]))]
+
+    def _text_scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(len(self.destinations), dtype=np.float32)
+        for term in query.split():
+            scores[self._term_ids(term)] = TERM_SCORE
+        word_hits = self._words.prefix(query)
+        label_hits = self._labels.prefix(query)
+        scores[word_hits] = WORD_PREFIX_SCORE
+        scores[label_hits] = PREFIX_SCORE
+        scores[self._labels.exact(query)] = EXACT_SCORE
+
+        # Fuzzy matching is the fallback for names that match no prefix, e.g. typos
+        if not len(word_hits) and not len(label_hits) and len(query) >= 3:
+            query_grams = _trigrams(query)
+            postings = [self._grams[g] for g in query_grams if g in self._grams]
+            if postings:
+                hits = np.concatenate(postings)
+                labels, shared = np.unique(hits, return_counts=True)
+                similarity = shared / (len(query_grams) + self._gram_counts[labels] - shared)
+                close = similarity >= MIN_TRIGRAM_SIMILARITY
+                # Order ascending so the best label of each entry is written last
+                labels, similarity = labels[close], similarity[close].astype(np.float32)
+                order = np.argsort(similarity, kind="stable")
+                entries = self._label_entries[labels[order]]
+                scores[entries] = np.maximum(scores[entries], similarity[order])
+        return scores
+
+    def _term_ids(self, term: str) -> np.ndarray:
+        return self._terms.get(term, EMPTY_IDS)
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        budgets: Sequence[str] = (),
+        interests: Sequence[str] = (),
+        months: Sequence[int] = (),
+        limit: int = 20,
+        offset: int = 0
+    ) -> DestinationPage:
+        """Rank destinations matching every given filter.
+
+        Within a filter, any listed value matches: ``budgets=["low", "medium"]``
+        keeps both levels. Text match weighs most in the ranking, then the
+        share of requested interests matched, then popularity.
+        """
+        n = len(self.destinations)
+        mask: Optional[np.ndarray] = None
+
+        def narrow(selected: np.ndarray) -> None:
+            nonlocal mask
+            mask = selected if mask is None else mask & selected
+
+        if budgets:
+            selected = np.zeros(n, dtype=bool)
+            for level in budgets:
+                if level.lower() in self._budgets:
+                    selected |= self._budgets[level.lower()]
+            narrow(selected)
+        if months:
+            bits = sum(1 << month for month in months if 1 <= month <= 12)
+            narrow((self._month_bits & np.uint16(bits)) != 0)
+
+        overlap = None
+        if interests:
+            overlap = self._interest_overlap(interests)
+            narrow(overlap > 0)
+
+        query = _normalize(query or "")
+        text_scores = None
+        if query:
+            text_scores = self._text_scores(query)
+            narrow(text_scores > 0)
+        elif overlap is None:
+            # Popularity alone decides the order, which is precomputed
+            ordered = self._by_popularity if mask is None else self._by_popularity[mask[self._by_popularity]]
+            return self._page(ordered[offset:offset + limit], len(ordered), limit, offset)
+
+        # Score only the survivors of the filters
+        candidates = np.flatnonzero(mask)
+        end = offset + limit
+        if end <= 0 or not len(candidates):
+            return self._page(candidates[:0], len(candidates), limit, offset)
+        scores = self._popularity[candidates]
+        if overlap is not None:
+            scores += np.float32(INTEREST_WEIGHT / len(interests)) * overlap[candidates]
+        if text_scores is not None:
+            scores += text_scores[candidates]
+
+        if end < len(candidates):
+            top = np.argpartition(-scores, end - 1)[:end]
+        else:
+            top = np.arange(len(candidates))
+        # Highest score first; ties fall back to catalog order
+        ranked = top[np.lexsort((candidates[top], -scores[top]))]
+        return self._page(candidates[ranked[offset:end]], len(candidates), limit, offset)
+
+    def _interest_overlap(self, interests: Sequence[str]) -> np.ndarray:
+        """Count how many of ``interests`` each entry matches.
+
+        Known interests (and their keywords, like "hiking") test the per-entry
+        interest bits; anything else is looked up among highlight words.
+        """
+        overlap = np.zeros(len(self.destinations), dtype=np.uint8)
+        for interest in interests:
+            term = _normalize(interest)
+            canonical = term if term in INTEREST_BITS else INTEREST_ALIASES.get(term)
+            if canonical in INTEREST_BITS:
+                overlap += (self._interest_bits & np.uint16(1 << INTEREST_BITS[canonical])) != 0
+            else:
+                overlap[self._term_ids(term)] += 1
+        return overlap
+
+    def _page(self, ids: np.ndarray, total: int, limit: int, offset: int) -> DestinationPage:
+        return DestinationPage(
+            destinations=[self.destinations[i] for i in ids.tolist()],
+            total=total,
+            limit=limit,
+            offset=offset
+        )
@@ -0,0 +1,206 @@
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+import asyncio
+import heapq
+import logging
+import random
+import time
+
+import openai
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Lower values are served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+TOKEN_WINDOW_SECONDS = 60.0
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+class UpstreamOverloadedError(Exception):
+    """Raised when low-priority upstream work is shed under load."""
+
+def is_retryable(exc: BaseException) -> bool:
+    """Whether an upstream error is transient (rate limits, 5xx, connection errors)."""
+    if isinstance(exc, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    status_code = getattr(exc, "status_code", None)
+    return status_code is not None and (status_code in RETRYABLE_STATUS_CODES or status_code >= 500)
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+class UpstreamGovernor:
+    """Backpressure for upstream LLM calls.
+
+    Caps concurrent calls with a priority queue, halving the cap on 429s
+    and growing it back by one per window of successful calls. Tokens used
+    in the last minute are tracked against ``tokens_per_minute``;
+    interactive calls wait for budget while background calls are shed once
+    usage passes ``shed_ratio`` of it, or when the queue is saturated.
+    Transient errors are retried with full-jitter exponential backoff.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        tokens_per_minute: int = 0,
+        max_queue: int = 32,
+        shed_ratio: float = 0.8,
+        max_retries: int = 2,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0
+    ):
+        self.max_concurrency = max_concurrency
+        self.tokens_per_minute = tokens_per_minute
+        self.max_queue = max_queue
+        self.shed_ratio = shed_ratio
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self.limit = float(max_concurrency)
+        self._active = 0
+        self._waiters: List[Tuple[int, int, "asyncio.Future[None]"]] = []
+        self._sequence = 0
+        self._usage: Deque[Tuple[float, int]] = deque()
+        self._stats = {"calls": 0, "retries": 0, "rate_limited": 0, "shed": 0, "errors": 0}
+
+    @classmethod
+    def from_settings(cls, settings: Any) -> "UpstreamGovernor":
+        return cls(
+            max_concurrency=settings.UPSTREAM_MAX_CONCURRENCY,
+            tokens_per_minute=settings.UPSTREAM_TOKENS_PER_MINUTE,
+            max_queue=settings.UPSTREAM_MAX_QUEUE,
+            shed_ratio=settings.UPSTREAM_SHED_TPM_RATIO,
+            max_retries=settings.OPENAI_MAX_RETRIES,
+            base_delay=settings.UPSTREAM_RETRY_BASE_DELAY,
+            max_delay=settings.UPSTREAM_RETRY_MAX_DELAY
+        )
+
+    async def run(
+        self,
+        call: Callable[[], Awaitable[T]],
+        priority: int = PRIORITY_INTERACTIVE,
+        retryable: Callable[[BaseException], bool] = is_retryable
+    ) -> T:
+        """Run ``call`` under the governor, retrying transient failures."""
+        attempt = 0
+        while True:
+            async with self.slot(priority):
+                try:
+                    result = await call()
+                except Exception as e:
+                    if getattr(e, "status_code", None) == 429:
+                        self._stats["rate_limited"] += 1
+                        self.limit = max(1.0, self.limit / 2)
+                    if attempt >= self.max_retries or not retryable(e):
+                        self._stats["errors"] += 1
+                        raise
+                    delay = _retry_after(e)
+                else:
+                    self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+                    self._wake()
+                    return result
+            if delay is None:
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+            else:
+                # A large server-supplied Retry-After must not outlast the caller's timeout
+                delay = min(self.max_delay, delay)
+            attempt += 1
+            self._stats["retries"] += 1
+            logger.warning(f"Retrying upstream call in {delay:.2f}s (attempt {attempt})")
+            await asyncio.sleep(delay)
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_INTERACTIVE) -> AsyncIterator[None]:
+        """Hold one upstream concurrency slot."""
+        await self._acquire(priority)
+        self._stats["calls"] += 1
+        try:
+            yield
+        finally:
+            self._release()
+
+    def record_usage(self, tokens: int) -> None:
+        """Record tokens consumed by a finished call."""
+        if tokens > 0:
+            self._usage.append((time.monotonic(), tokens))
+
+    def tokens_in_window(self) -> int:
+        cutoff = time.monotonic() - TOKEN_WINDOW_SECONDS
+        while self._usage and self._usage[0][0] < cutoff:
+            self._usage.popleft()
+        return sum(tokens for _, tokens in self._usage)
+
+    def _waiting(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    def _shed_reason(self) -> Optional[str]:
+        if self.tokens_per_minute and self.tokens_in_window() >= self.shed_ratio * self.tokens_per_minute:
+            return "token budget nearly exhausted"
+        if self._active >= int(self.limit):
+            if any(p == PRIORITY_INTERACTIVE and not f.done() for p, _, f in self._waiters):
+                return "interactive calls are waiting"
+            if self._waiting() >= self.max_queue:
+                return "upstream queue is full"
+        return None
+
+    async def _wait_for_tokens(self) -> None:
+        while self.tokens_per_minute and self.tokens_in_window() >= self.tokens_per_minute:
+            oldest = self._usage[0][0]
+            await asyncio.sleep(max(0.05, oldest + TOKEN_WINDOW_SECONDS - time.monotonic()))
+
+    async def _acquire(self, priority: int) -> None:
+        if priority != PRIORITY_INTERACTIVE:
+            reason = self._shed_reason()
+            if reason:
+                self._stats["shed"] += 1
+                raise UpstreamOverloadedError(f"Upstream busy: {reason}")
+        await self._wait_for_tokens()
+
+        if self._active < int(self.limit) and not self._waiting():
+            self._active += 1
+            return
+
+        future: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        self._sequence += 1
+        heapq.heappush(self._waiters, (priority, self._sequence, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we were cancelled
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        self._active -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        # The limit may have grown since the last release, so fill every free slot
+        while self._waiters and self._active < int(self.limit):
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self._active += 1
+                future.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "active": self._active,
+            "waiting": self._waiting(),
+            "concurrency_limit": int(self.limit),
+            "tokens_in_window": self.tokens_in_window(),
+        }
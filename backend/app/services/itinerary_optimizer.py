@@ -0,0 +1,363 @@
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+import json
+import re
+import unicodedata
+
+import numpy as np
+
+from app.models.chat import TripItinerary
+from app.services.preference_extractor import DEFAULT_GAZETTEER
+from app.services.routing import haversine_km
+
+DEFAULT_ATTRACTIONS = Path(__file__).resolve().parent.parent / "data" / "attractions.json"
+
+# Time budgeted for activities that could not be geocoded
+DEFAULT_VISIT_MINUTES = 90
+# Travel time model: a fixed transfer overhead, then road distance covered at
+# city speed for the first few kilometres and regional speed beyond
+TRANSFER_MINUTES = 10.0
+DETOUR_FACTOR = 1.3
+URBAN_RADIUS_KM = 5.0
+URBAN_SPEED_KMH = 15.0
+REGIONAL_SPEED_KMH = 60.0
+
+# Times of day an activity may ask for, as (earliest start, latest end);
+# ignored when they leave no time within the attraction's opening hours
+TIME_OF_DAY = {
+    "breakfast": ("07:00", "10:30"),
+    "morning": ("00:00", "12:00"),
+    "lunch": ("11:30", "14:30"),
+    "afternoon": ("12:00", "24:00"),
+    "sunset": ("17:00", "24:00"),
+    "evening": ("17:00", "24:00"),
+    "dinner": ("18:00", "24:00"),
+    "night": ("19:00", "24:00"),
+}
+
+NON_WORD_PATTERN = re.compile(r"[^a-z0-9]+")
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return NON_WORD_PATTERN.sub(" ", text.lower()).strip()
+
+def parse_clock(value: str) -> int:
+    """Minutes since midnight for ``"HH:MM"``; ``"24:00"`` is allowed."""
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+def format_clock(minutes: float) -> str:
+    minutes = int(round(minutes)) % (24 * 60)
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+def travel_minutes(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Pairwise travel time matrix between points, in minutes."""
+    km = DETOUR_FACTOR * haversine_km(lat[:, None], lon[:, None], lat[None, :], lon[None, :])
+    urban = np.minimum(km, URBAN_RADIUS_KM)
+    minutes = TRANSFER_MINUTES + 60 * (urban / URBAN_SPEED_KMH + (km - urban) / REGIONAL_SPEED_KMH)
+    np.fill_diagonal(minutes, 0.0)
+    return minutes
+
+def nearest_neighbor(matrix: np.ndarray) -> List[int]:
+    """Greedy tour over every node of ``matrix``, starting from node 0."""
+    n = len(matrix)
+    visited = np.zeros(n, dtype=bool)
+    visited[0] = True
+    tour = [0]
+    for _ in range(n - 1):
+        distances = np.where(visited, np.inf, matrix[tour[-1]])
+        node = int(np.argmin(distances))
+        visited[node] = True
+        tour.append(node)
+    return tour
+
+def two_opt(matrix: np.ndarray, tour: Sequence[int]) -> List[int]:
+    """Improve a closed tour by segment reversals until none shortens it.
+
+    The first node stays in place. For each segment start, the gain of every
+    segment end is computed at once and the best reversal is applied.
+    """
+    tour = np.asarray(tour)
+    n = len(tour)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, n - 1):
+            a, b = tour[i - 1], tour[i]
+            ends = tour[i + 1:]
+            after = np.append(tour[i + 2:], tour[0])
+            gain = matrix[a, b] + matrix[ends, after] - matrix[a, ends] - matrix[b, after]
+            j = int(np.argmax(gain))
+            if gain[j] > 1e-9:
+                j += i + 1
+                tour[i:j + 1] = tour[i:j + 1][::-1].copy()
+                improved = True
+    return tour.tolist()
+
+class Attraction(NamedTuple):
+    name: str
+    lat: float
+    lon: float
+    opens: int  # minutes since midnight
+    closes: int  # after opens; may run past midnight
+    visit_minutes: int
+
+class _Stops(NamedTuple):
+    """Stops of one itinerary; node 0 is the day's start and end point."""
+    travel: np.ndarray
+    opens: np.ndarray
+    closes: np.ndarray
+    visit: np.ndarray
+
+class ItineraryOptimizer:
+    """Reorders and re-buckets itinerary activities by travel time.
+
+    Activities are geocoded against a bundled gazetteer of attractions, by
+    name or alias first and by tag ("museum", "old town") otherwise. The
+    located activities are ordered into one tour with nearest neighbour and
+    2-opt, the tour is split into days of similar length, and each day is
+    re-ordered so that every stop is visited within its opening hours and
+    the day fits between ``day_start`` and ``day_end``. Activities that
+    cannot be geocoded stay on their original day, after the routed stops.
+    """
+
+    def __init__(
+        self,
+        attractions: List[Dict[str, Any]],
+        places: Sequence[Dict[str, Any]] = (),
+        day_start: int = 9 * 60,
+        day_end: int = 22 * 60,
+        enabled: bool = True
+    ):
+        self.day_start = day_start
+        self.day_end = day_end
+        self.enabled = enabled
+        self.attractions: List[Attraction] = []
+        self._cities: Dict[str, Tuple[re.Pattern, Dict[str, Tuple[int, bool]], Tuple[float, float]]] = {}
+        by_city: Dict[str, List[Dict[str, Any]]] = {}
+        for entry in attractions:
+            by_city.setdefault(entry["city"], []).append(entry)
+        for city, entries in by_city.items():
+            phrases: Dict[str, Tuple[int, bool]] = {}
+            for entry in entries:
+                index = len(self.attractions)
+                opens, closes = (parse_clock(value) for value in entry["hours"] or ("00:00", "24:00"))
+                if closes <= opens:
+                    closes += 24 * 60
+                self.attractions.append(Attraction(
+                    entry["name"], entry["lat"], entry["lon"], opens, closes, entry["visit_minutes"]
+                ))
+                for name in [entry["name"], *entry.get("aliases", [])]:
+                    phrases.setdefault(_normalize(name), (index, True))
+                for tag in entry.get("tags", []):
+                    phrases.setdefault(_normalize(tag), (index, False))
+            pattern = re.compile(r"\b(?:%s)\b" % "|".join(
+                re.escape(phrase) for phrase in sorted(phrases, key=len, reverse=True)
+            ))
+            # The median point stands in for the hotel; day trips barely move it
+            center = (
+                float(np.median([entry["lat"] for entry in entries])),
+                float(np.median([entry["lon"] for entry in entries]))
+            )
+            self._cities[_normalize(city)] = (pattern, phrases, center)
+        self._city_names: Dict[str, str] = {key: key for key in self._cities}
+        for place in places:
+            key = _normalize(place["name"])
+            if key in self._cities:
+                for alias in place.get("aliases", []):
+                    self._city_names.setdefault(_normalize(alias), key)
+        self._city_pattern = re.compile(r"\b(?:%s)\b" % "|".join(
+            re.escape(name) for name in sorted(self._city_names, key=len, reverse=True)
+        ))
+
+    @classmethod
+    def load(cls, path: Path = DEFAULT_ATTRACTIONS, gazetteer_path: Path = DEFAULT_GAZETTEER, **kwargs: Any) -> "ItineraryOptimizer":
+        with open(path, encoding="utf-8") as f:
+            attractions = json.load(f)
+        with open(gazetteer_path, encoding="utf-8") as f:
+            places = json.load(f)
+        return cls(attractions, places, **kwargs)
+
+    @classmethod
+    def from_settings(cls, settings: Any) -> "ItineraryOptimizer":
+        return cls.load(
+            day_start=parse_clock(settings.ITINERARY_DAY_START),
+            day_end=parse_clock(settings.ITINERARY_DAY_END),
+            enabled=settings.ITINERARY_OPTIMIZER_ENABLED
+        )
+
+    def city(self, destination: str) -> Optional[str]:
+        """Key of the gazetteer city named in ``destination``, e.g. "Paris, France"."""
+        match = self._city_pattern.search(_normalize(destination))
+        return self._city_names[match.group()] if match else None
+
+    def geocode(self, city: str, activity: str) -> Optional[int]:
+        """Index of the attraction ``activity`` refers to, preferring names over tags."""
+        pattern, phrases, _ = self._cities[city]
+        best = None
+        for match in pattern.finditer(_normalize(activity)):
+            index, is_name = phrases[match.group()]
+            rank = (is_name, len(match.group()))
+            if best is None or rank > best[0]:
+                best = (rank, index)
+        return best[1] if best else None
+
+    def optimize(self, itinerary: TripItinerary) -> TripItinerary:
+        """Return ``itinerary`` with its daily plans reordered; unchanged if nothing can be located."""
+        days = itinerary.daily_plans
+        if not self.enabled or not days:
+            return itinerary
+        if not all(isinstance(day, dict) and isinstance(day.get("activities"), list) for day in days):
+            return itinerary
+        city = self.city(itinerary.destination)
+        if city is None:
+            return itinerary
+
+        # Each attraction is routed once; repeat visits keep their day
+        located: List[Tuple[int, str]] = []
+        unlocated: List[List[Any]] = [[] for _ in days]
+        for day, plan in enumerate(days):
+            for activity in plan["activities"]:
+                index = self.geocode(city, activity) if isinstance(activity, str) else None
+                if index is None or any(index == seen for seen, _ in located):
+                    unlocated[day].append(activity)
+                else:
+                    located.append((index, activity))
+        if len(located) < 2:
+            return itinerary
+
+        stops = self._stops(city, located)
+        routes = self._plan(stops, [DEFAULT_VISIT_MINUTES * len(activities) for activities in unlocated])
+
+        daily_plans = []
+        for day, (plan, route) in enumerate(zip(days, routes)):
+            slots, _ = self._timeline(stops, route)
+            schedule = [
+                {
+                    "activity": located[node - 1][1],
+                    "place": self.attractions[located[node - 1][0]].name,
+                    "start": format_clock(start),
+                    "end": format_clock(end)
+                }
+                for node, (start, end) in zip(route, slots)
+            ]
+            path = [0, *route, 0]
+            daily_plans.append({
+                **plan,
+                "activities": [entry["activity"] for entry in schedule] + unlocated[day],
+                "schedule": schedule,
+                "travel_minutes": int(round(stops.travel[path[:-1], path[1:]].sum())) if route else 0
+            })
+        return itinerary.model_copy(update={"daily_plans": daily_plans})
+
+    def _stops(self, city: str, located: List[Tuple[int, str]]) -> _Stops:
+        center = self._cities[city][2]
+        attractions = [self.attractions[index] for index, _ in located]
+        windows = [self._window(attraction, activity) for attraction, (_, activity) in zip(attractions, located)]
+        lat = np.array([center[0], *(attraction.lat for attraction in attractions)])
+        lon = np.array([center[1], *(attraction.lon for attraction in attractions)])
+        return _Stops(
+            travel=travel_minutes(lat, lon),
+            opens=np.array([0, *(opens for opens, _ in windows)]),
+            closes=np.array([48 * 60, *(closes for _, closes in windows)]),
+            visit=np.array([0, *(attraction.visit_minutes for attraction in attractions)])
+        )
+
+    def _window(self, attraction: Attraction, activity: str) -> Tuple[int, int]:
+        """Opening hours, narrowed by a time of day the activity asks for."""
+        words = set(_normalize(activity).split())
+        for word, (earliest, latest) in TIME_OF_DAY.items():
+            if word in words:
+                opens = max(attraction.opens, parse_clock(earliest))
+                closes = min(attraction.closes, parse_clock(latest))
+                if closes - opens >= attraction.visit_minutes:
+                    return opens, closes
+        return attraction.opens, attraction.closes
+
+    def _plan(self, stops: _Stops, fixed: List[int]) -> List[List[int]]:
+        """Assign stops (nodes 1..n) to days and order each day.
+
+        ``fixed`` is the time already taken on each day by activities that
+        are not routed.
+        """
+        tour = two_opt(stops.travel, nearest_neighbor(stops.travel))[1:]
+        day_ends = [self.day_end - minutes for minutes in fixed]
+
+        # Split the tour into consecutive days of similar length
+        work = stops.visit[tour] + stops.travel[[0, *tour[:-1]], tour]
+        target = (work.sum() + sum(fixed)) / len(fixed)
+        routes: List[List[int]] = [[] for _ in fixed]
+        day = 0
+        load = fixed[0]
+        for node, cost in zip(tour, work):
+            if routes[day] and day < len(routes) - 1 and load + cost / 2 > target:
+                day += 1
+                load = fixed[day]
+            routes[day].append(node)
+            load += cost
+
+        # Order each day within opening hours; stops that do not fit move on
+        leftovers: List[Tuple[int, int]] = []
+        for day, route in enumerate(routes):
+            candidates = [route]
+            if len(route) > 2:
+                sub = np.array([0, *route])
+                order = two_opt(stops.travel[np.ix_(sub, sub)], nearest_neighbor(stops.travel[np.ix_(sub, sub)]))
+                candidates.append([int(sub[i]) for i in order[1:]])
+            feasible = [
+                candidate for candidate in candidates if self._timeline(stops, candidate, day_ends[day])[1]
+            ]
+            if feasible:
+                routes[day] = min(feasible, key=lambda candidate: self._length(stops, candidate))
+                continue
+            routes[day] = []
+            for node in sorted(route, key=lambda node: stops.closes[node]):
+                inserted = self._insert(stops, routes[day], node, day_ends[day])
+                if inserted is None:
+                    leftovers.append((day, node))
+                else:
+                    routes[day] = inserted
+
+        for home, node in leftovers:
+            for day in sorted(range(len(routes)), key=lambda day: abs(day - home)):
+                inserted = self._insert(stops, routes[day], node, day_ends[day])
+                if inserted is not None:
+                    routes[day] = inserted
+                    break
+            else:
+                # Nowhere fits; keep it on its day rather than drop it
+                routes[home].append(node)
+        return routes
+
+    def _timeline(
+        self, stops: _Stops, route: List[int], day_end: Optional[int] = None
+    ) -> Tuple[List[Tuple[float, float]], bool]:
+        """Visit times along ``route`` and whether it keeps to opening hours and is back by ``day_end``."""
+        slots = []
+        feasible = True
+        time, previous = float(self.day_start), 0
+        for node in route:
+            start = max(time + stops.travel[previous, node], stops.opens[node])
+            time = start + stops.visit[node]
+            feasible = feasible and time <= stops.closes[node]
+            slots.append((start, time))
+            previous = node
+        if day_end is not None:
+            # The day ends back at the start point
+            feasible = feasible and time + stops.travel[previous, 0] <= day_end
+        return slots, feasible
+
+    def _length(self, stops: _Stops, route: List[int]) -> float:
+        path = [0, *route, 0]
+        return float(stops.travel[path[:-1], path[1:]].sum())
+
+    def _insert(self, stops: _Stops, route: List[int], node: int, day_end: int) -> Optional[List[int]]:
+        """Cheapest feasible insertion of ``node`` into ``route``, or None."""
+        best = None
+        for position in range(len(route) + 1):
+            candidate = route[:position] + [node] + route[position:]
+            if self._timeline(stops, candidate, day_end)[1]:
+                length = self._length(stops, candidate)
+                if best is None or length < best[0]:
+                    best = (length, candidate)
+        return best[1] if best else None
@@ -0,0 +1,343 @@
+from abc import ABC, abstractmethod
+from contextlib import AsyncExitStack
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+import asyncio
+import hashlib
+import ipaddress
+import json
+import logging
+import socket
+import uuid
+
+import httpx
+
+from app.core.config import settings
+from app.core.http_clients import http_clients
+from app.models.chat import TripItinerary, TripPreferences
+from app.models.jobs import JobStatus, PlanJob
+
+logger = logging.getLogger(__name__)
+
+ItineraryGenerator = Callable[[TripPreferences], Awaitable[Optional[TripItinerary]]]
+
+GENERATION_FAILED = "Could not generate itinerary with provided preferences"
+
+def preferences_key(preferences: TripPreferences) -> str:
+    """Canonical hash used to deduplicate jobs for identical preferences."""
+    canonical = json.dumps(preferences.dict(), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class InvalidCallbackURLError(ValueError):
+    """Raised for webhook URLs that are malformed or not allowed."""
+
+async def validate_callback_url(url: str) -> None:
+    """Reject webhook URLs that could reach internal services.
+    
+    Only http(s) URLs are accepted. If ``JOB_WEBHOOK_ALLOWED_HOSTS`` is set
+    the host must be listed there; otherwise every address it resolves to
+    must be public.
+    """
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        raise InvalidCallbackURLError("callback_url is not a valid URL")
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise InvalidCallbackURLError("callback_url must be an absolute http(s) URL")
+
+    host = parts.hostname.lower()
+    if settings.JOB_WEBHOOK_ALLOWED_HOSTS:
+        if host not in {allowed.lower() for allowed in settings.JOB_WEBHOOK_ALLOWED_HOSTS}:
+            raise InvalidCallbackURLError(f"callback_url host {host} is not allowed")
+        return
+
+    try:
+        addresses = await asyncio.get_running_loop().getaddrinfo(
+            host, port or (443 if parts.scheme == "https" else 80), type=socket.SOCK_STREAM
+        )
+    except socket.gaierror:
+        raise InvalidCallbackURLError(f"callback_url host {host} does not resolve")
+    for *_, sockaddr in addresses:
+        # Strip any IPv6 zone id before parsing
+        if not ipaddress.ip_address(sockaddr[0].split("%")[0]).is_global:
+            raise InvalidCallbackURLError(f"callback_url host {host} is not a public address")
+
+async def notify_webhook(
+    job: PlanJob,
+    callback_urls: Iterable[str],
+    client: Optional[httpx.AsyncClient] = None
+) -> None:
+    """POST the finished job to each callback URL.
+    
+    Every webhook receives the job with only its own URL as
+    ``callback_url``. Uses ``client`` if given, e.g. a shared pooled client,
+    and otherwise a client for this call only.
+    """
+    callback_urls = sorted(callback_urls)
+    if not callback_urls:
+        return
+    async with AsyncExitStack() as stack:
+        if client is None:
+            client = await stack.enter_async_context(httpx.AsyncClient(timeout=settings.JOB_WEBHOOK_TIMEOUT))
+        for url in callback_urls:
+            try:
+                await client.post(
+                    url,
+                    content=job.model_copy(update={"callback_url": url}).model_dump_json(),
+                    headers={"Content-Type": "application/json"}
+                )
+            except Exception as e:
+                logger.warning(f"Webhook for job {job.job_id} failed: {e}")
+
+CALLBACKS_PREFIX = "tripmate:plan-job-callbacks:"
+FINISHED_PREFIX = "tripmate:plan-job-finished:"
+
+async def register_callback(redis: Any, job_id: str, callback_url: str, ttl: int) -> Optional[PlanJob]:
+    """Add a webhook to a Celery job.
+    
+    Returns the finished job if the worker has already notified its
+    webhooks, in which case the caller must notify ``callback_url`` itself.
+    """
+    key = CALLBACKS_PREFIX + job_id
+    await redis.sadd(key, callback_url)
+    await redis.expire(key, ttl)
+    finished = await redis.get(FINISHED_PREFIX + job_id)
+    # The worker drains the set atomically, so whoever removes the URL owns it
+    if finished is not None and await redis.srem(key, callback_url):
+        return PlanJob.model_validate_json(finished)
+    return None
+
+async def claim_callbacks(redis: Any, job: PlanJob, ttl: int) -> Set[str]:
+    """Mark a Celery job finished and take the webhooks added so far."""
+    key = CALLBACKS_PREFIX + job.job_id
+    await redis.set(FINISHED_PREFIX + job.job_id, job.model_dump_json(), ex=ttl)
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.smembers(key)
+        pipe.delete(key)
+        callbacks, _ = await pipe.execute()
+    return set(callbacks)
+
+async def generate_batch(
+    generate: ItineraryGenerator,
+    batch: List[TripPreferences],
+    concurrency: int
+) -> AsyncIterator[Tuple[List[int], Optional[TripItinerary], Optional[str]]]:
+    """Generate itineraries for a batch, yielding results in completion order.
+    
+    Identical preference sets are generated once; each result carries the
+    positions in ``batch`` it answers. At most ``concurrency`` generations
+    run at a time, and failures are yielded as an error instead of raised.
+    """
+    positions: Dict[str, List[int]] = {}
+    unique: Dict[str, TripPreferences] = {}
+    for index, preferences in enumerate(batch):
+        key = preferences_key(preferences)
+        positions.setdefault(key, []).append(index)
+        unique.setdefault(key, preferences)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(key: str) -> Tuple[str, Optional[TripItinerary], Optional[str]]:
+        async with semaphore:
+            try:
+                itinerary = await generate(unique[key])
+            except Exception as e:
+                logger.error(f"Batch plan for {unique[key].destination} failed: {e}")
+                return key, None, str(e)
+        return key, itinerary, None if itinerary else GENERATION_FAILED
+
+    tasks = [asyncio.create_task(run(key)) for key in unique]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            key, itinerary, error = await next_done
+            yield positions[key], itinerary, error
+    finally:
+        # The client went away or the batch finished; stop pending generations
+        for task in tasks:
+            task.cancel()
+
+class JobQueue(ABC):
+    """Queue for itinerary generation jobs."""
+
+    def __init__(self):
+        self._tasks: Set["asyncio.Task[None]"] = set()
+
+    @abstractmethod
+    async def enqueue(self, preferences: TripPreferences, callback_url: Optional[str] = None) -> PlanJob:
+        """Enqueue a job, or return the existing job for identical preferences.
+        
+        ``callback_url`` is notified when the job finishes, also when the job
+        is shared; the returned job only ever shows the caller's own URL.
+        """
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[PlanJob]:
+        """Return the job's current status, or None if it is unknown or expired."""
+
+    async def close(self) -> None:
+        """Stop accepting work and release resources."""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _spawn(self, coro: Awaitable[None]) -> None:
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _webhook_client(self) -> httpx.AsyncClient:
+        return http_clients.get("webhooks", timeout=settings.JOB_WEBHOOK_TIMEOUT)
+
+class InProcessJobQueue(JobQueue):
+    """Runs jobs as asyncio tasks in the API process, bounded by a semaphore."""
+
+    def __init__(self, generate: ItineraryGenerator, concurrency: int, result_ttl: int):
+        super().__init__()
+        self.generate = generate
+        self.result_ttl = result_ttl
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._jobs: Dict[str, PlanJob] = {}
+        self._job_keys: Dict[str, str] = {}
+        self._callbacks: Dict[str, Set[str]] = {}
+
+    async def enqueue(self, preferences: TripPreferences, callback_url: Optional[str] = None) -> PlanJob:
+        self._evict_expired()
+
+        key = preferences_key(preferences)
+        existing = self._jobs.get(self._job_keys.get(key, ""))
+        if existing is not None and existing.status != JobStatus.FAILED:
+            if callback_url:
+                if existing.job_id in self._callbacks:
+                    self._callbacks[existing.job_id].add(callback_url)
+                else:
+                    # Its webhooks were already sent
+                    self._spawn(notify_webhook(existing, [callback_url], self._webhook_client()))
+            return existing.model_copy(update={"callback_url": callback_url})
+
+        # Stored jobs carry no callback URL, so polling never reveals one
+        job = PlanJob(job_id=str(uuid.uuid4()))
+        self._jobs[job.job_id] = job
+        self._job_keys[key] = job.job_id
+        self._callbacks[job.job_id] = {callback_url} if callback_url else set()
+        self._spawn(self._run(job, preferences))
+        return job.model_copy(update={"callback_url": callback_url})
+
+    async def _run(self, job: PlanJob, preferences: TripPreferences) -> None:
+        async with self._semaphore:
+            self._update(job, status=JobStatus.RUNNING)
+            try:
+                itinerary = await self.generate(preferences)
+            except Exception as e:
+                logger.error(f"Plan job {job.job_id} failed: {e}")
+                self._update(job, status=JobStatus.FAILED, error=str(e))
+            else:
+                if itinerary is None:
+                    self._update(job, status=JobStatus.FAILED, error=GENERATION_FAILED)
+                else:
+                    self._update(job, status=JobStatus.SUCCEEDED, result=itinerary)
+        await notify_webhook(job, self._callbacks.pop(job.job_id, ()), self._webhook_client())
+
+    def _update(self, job: PlanJob, **changes: Any) -> None:
+        for field, value in changes.items():
+            setattr(job, field, value)
+        job.updated_at = datetime.utcnow()
+
+    def _evict_expired(self) -> None:
+        cutoff = datetime.utcnow() - timedelta(seconds=self.result_ttl)
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.status in (JobStatus.SUCCEEDED, JobStatus.FAILED) and job.updated_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+            self._callbacks.pop(job_id, None)
+        if expired:
+            self._job_keys = {key: job_id for key, job_id in self._job_keys.items() if job_id in self._jobs}
+
+    async def get(self, job_id: str) -> Optional[PlanJob]:
+        return self._jobs.get(job_id)
+
+CELERY_STATES = {
+    "PENDING": JobStatus.PENDING,
+    "RECEIVED": JobStatus.PENDING,
+    "RETRY": JobStatus.PENDING,
+    "STARTED": JobStatus.RUNNING,
+    "SUCCESS": JobStatus.SUCCEEDED,
+    "FAILURE": JobStatus.FAILED,
+    "REVOKED": JobStatus.FAILED,
+}
+
+class CeleryJobQueue(JobQueue):
+    """Dispatches jobs to Celery workers, using Redis for deduplication."""
+
+    DEDUP_PREFIX = "tripmate:plan-job:"
+    JOB_PREFIX = "tripmate:plan-job-id:"
+
+    def __init__(self, result_ttl: int):
+        import redis.asyncio as aioredis
+        from app.worker import celery_app, generate_itinerary_task
+
+        super().__init__()
+        self.result_ttl = result_ttl
+        self.celery_app = celery_app
+        self.task = generate_itinerary_task
+        self.redis = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+
+    async def enqueue(self, preferences: TripPreferences, callback_url: Optional[str] = None) -> PlanJob:
+        dedup_key = self.DEDUP_PREFIX + preferences_key(preferences)
+        job_id = str(uuid.uuid4())
+
+        # Claim the key atomically; concurrent callers get the first job
+        if not await self.redis.set(dedup_key, job_id, nx=True, ex=self.result_ttl):
+            existing_id = await self.redis.get(dedup_key)
+            existing = await self.get(existing_id) if existing_id else None
+            if existing is not None and existing.status != JobStatus.FAILED:
+                if callback_url:
+                    finished = await register_callback(self.redis, existing.job_id, callback_url, self.result_ttl)
+                    if finished is not None:
+                        self._spawn(notify_webhook(finished, [callback_url], self._webhook_client()))
+                return existing.model_copy(update={"callback_url": callback_url})
+            await self.redis.set(dedup_key, job_id, ex=self.result_ttl)
+
+        await self.redis.set(self.JOB_PREFIX + job_id, "1", ex=self.result_ttl)
+        if callback_url:
+            await register_callback(self.redis, job_id, callback_url, self.result_ttl)
+        await asyncio.to_thread(
+            self.task.apply_async,
+            args=[preferences.dict()],
+            task_id=job_id
+        )
+        return PlanJob(job_id=job_id, callback_url=callback_url)
+
+    async def get(self, job_id: str) -> Optional[PlanJob]:
+        # Celery reports unknown task ids as pending, so track our own ids
+        if not await self.redis.exists(self.JOB_PREFIX + job_id):
+            return None
+        result = self.celery_app.AsyncResult(job_id)
+        state = await asyncio.to_thread(lambda: result.state)
+        job = PlanJob(job_id=job_id, status=CELERY_STATES.get(state, JobStatus.PENDING))
+        if job.status == JobStatus.SUCCEEDED:
+            payload = await asyncio.to_thread(lambda: result.result)
+            if payload is None:
+                job.status = JobStatus.FAILED
+                job.error = GENERATION_FAILED
+            else:
+                job.result = TripItinerary(**payload)
+        elif job.status == JobStatus.FAILED:
+            job.error = str(await asyncio.to_thread(lambda: result.result))
+        return job
+
+    async def close(self) -> None:
+        await super().close()
+        await self.redis.close()
+
+def create_job_queue(generate: ItineraryGenerator) -> JobQueue:
+    """Create the job queue backend selected in settings."""
+    if settings.JOB_BACKEND == "celery":
+        return CeleryJobQueue(result_ttl=settings.JOB_RESULT_TTL)
+    return InProcessJobQueue(
+        generate,
+        concurrency=settings.JOB_WORKER_CONCURRENCY,
+        result_ttl=settings.JOB_RESULT_TTL
+    )
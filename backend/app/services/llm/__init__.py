@@ -0,0 +1,15 @@
+# LLM Providers
+from app.services.llm.base import Completion, LLMProvider
+from app.services.llm.factory import create_provider
+from app.services.llm.openai_provider import OpenAIProvider
+from app.services.llm.stub import STUB_PROFILES, StubProfile, StubProvider
+
+__all__ = [
+    "Completion",
+    "LLMProvider",
+    "OpenAIProvider",
+    "STUB_PROFILES",
+    "StubProfile",
+    "StubProvider",
+    "create_provider",
+]
@@ -0,0 +1,47 @@
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional
+
+class Completion(NamedTuple):
+    content: str
+    total_tokens: Optional[int] = None
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+
+class LLMProvider(ABC):
+    """A chat completion backend.
+
+    ``json_mode`` asks for a single JSON object; providers that cannot
+    enforce it just return whatever the model produces, which is parsed
+    leniently by the caller.
+    """
+
+    name = "base"
+
+    def __init__(self, model: str):
+        self.model = model
+
+    @abstractmethod
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float,
+        json_mode: bool = False
+    ) -> Completion:
+        """Return the whole completion once it is generated."""
+
+    @abstractmethod
+    def stream(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float,
+        json_mode: bool = False
+    ) -> AsyncIterator[str]:
+        """Yield the completion content as it is generated."""
+
+    async def warm_up(self) -> None:
+        """Prepare clients ahead of the first request."""
+
+    async def close(self) -> None:
+        """Release connections held by the provider."""
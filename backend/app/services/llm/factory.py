@@ -0,0 +1,30 @@
+from typing import Any
+
+from app.core.http_clients import http_clients
+from app.services.llm.base import LLMProvider
+from app.services.llm.openai_provider import OpenAIProvider
+from app.services.llm.stub import STUB_PROFILES, StubProvider
+
+def create_provider(settings: Any) -> LLMProvider:
+    """Create the LLM provider selected by ``LLM_PROVIDER``."""
+    if settings.LLM_PROVIDER == "stub":
+        if settings.LLM_STUB_PROFILE not in STUB_PROFILES:
+            raise ValueError(
+                f"Unknown LLM_STUB_PROFILE {settings.LLM_STUB_PROFILE!r}; "
+                f"expected one of {', '.join(STUB_PROFILES)}"
+            )
+        profile = STUB_PROFILES[settings.LLM_STUB_PROFILE]
+        if settings.LLM_STUB_FIRST_TOKEN_LATENCY is not None:
+            profile = profile._replace(first_token_latency=settings.LLM_STUB_FIRST_TOKEN_LATENCY)
+        if settings.LLM_STUB_TOKENS_PER_SECOND is not None:
+            profile = profile._replace(tokens_per_second=settings.LLM_STUB_TOKENS_PER_SECOND)
+        return StubProvider(model=f"stub-{settings.LLM_STUB_PROFILE}", profile=profile)
+    if settings.LLM_PROVIDER == "openai":
+        return OpenAIProvider(
+            api_key=settings.OPENAI_API_KEY,
+            model=settings.OPENAI_MODEL,
+            base_url=settings.OPENAI_BASE_URL,
+            timeout=settings.OPENAI_TIMEOUT,
+            http_client=lambda: http_clients.get("openai", timeout=settings.OPENAI_TIMEOUT)
+        )
+    raise ValueError(f"Unknown LLM_PROVIDER {settings.LLM_PROVIDER!r}; expected 'openai' or 'stub'")
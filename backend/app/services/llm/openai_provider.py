@@ -0,0 +1,111 @@
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+import httpx
+import openai
+
+from app.services.llm.base import Completion, LLMProvider
+
+# Models that accept response_format={"type": "json_object"}
+JSON_MODE_MODEL_PREFIXES = (
+    "gpt-4o",
+    "gpt-4-turbo",
+    "gpt-4-1106",
+    "gpt-4-0125",
+    "gpt-3.5-turbo-1106",
+    "gpt-3.5-turbo-0125",
+)
+
+class OpenAIProvider(LLMProvider):
+    """Chat completions from the OpenAI API (or a compatible server)."""
+
+    name = "openai"
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        base_url: Optional[str] = None,
+        timeout: float = 60.0,
+        http_client: Optional[Callable[[], httpx.AsyncClient]] = None
+    ):
+        super().__init__(model)
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.http_client = http_client
+        self._client: Optional[openai.AsyncOpenAI] = None
+        self.supports_json_mode = model.startswith(JSON_MODE_MODEL_PREFIXES)
+
+    @property
+    def client(self) -> openai.AsyncOpenAI:
+        """The API client, created on first use."""
+        if self._client is None:
+            self._client = self._create_client()
+        return self._client
+
+    def _create_client(self) -> openai.AsyncOpenAI:
+        # Retries are left to the governor so they respect its limits
+        return openai.AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            timeout=self.timeout,
+            max_retries=0,
+            http_client=self.http_client() if self.http_client else None
+        )
+
+    async def warm_up(self) -> None:
+        # Creating the client loads TLS certificates; keep that off the first request
+        if self._client is None:
+            self._client = self._create_client()
+
+    def _request(self, messages: List[Dict[str, str]], max_tokens: int, temperature: float, json_mode: bool) -> Dict[str, Any]:
+        request: Dict[str, Any] = {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        }
+        if json_mode and self.supports_json_mode:
+            request["response_format"] = {"type": "json_object"}
+        return request
+
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float,
+        json_mode: bool = False
+    ) -> Completion:
+        response = await self.client.chat.completions.create(
+            **self._request(messages, max_tokens, temperature, json_mode)
+        )
+        usage = getattr(response, "usage", None)
+        return Completion(
+            content=response.choices[0].message.content or "",
+            total_tokens=usage.total_tokens if usage else None,
+            prompt_tokens=usage.prompt_tokens if usage else None,
+            completion_tokens=usage.completion_tokens if usage else None
+        )
+
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float,
+        json_mode: bool = False
+    ) -> AsyncIterator[str]:
+        stream = await self.client.chat.completions.create(
+            stream=True,
+            **self._request(messages, max_tokens, temperature, json_mode)
+        )
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
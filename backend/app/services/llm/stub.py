@@ -0,0 +1,150 @@
+from typing import AsyncIterator, Dict, List, NamedTuple
+import asyncio
+import hashlib
+import json
+import random
+import re
+
+from app.services.context_builder import approximate_tokens
+from app.services.llm.base import Completion, LLMProvider
+from app.services.preference_extractor import RuleBasedPreferenceExtractor
+
+class StubProfile(NamedTuple):
+    first_token_latency: float  # seconds before the first token
+    tokens_per_second: float  # 0 streams everything at once
+
+STUB_PROFILES: Dict[str, StubProfile] = {
+    "instant": StubProfile(0.0, 0.0),
+    "fast": StubProfile(0.05, 500.0),
+    "gpt-3.5": StubProfile(0.3, 90.0),
+    "gpt-4": StubProfile(0.8, 25.0),
+}
+
+PROMPT_FIELD_PATTERN = re.compile(r"^\s*(Destination|Duration|Budget|People|Interests):\s*(.+?)\s*$", re.M)
+NOT_SPECIFIED = "Not specified"
+
+ACTIVITIES = [
+    "Walking tour of the old town",
+    "Visit the main museum",
+    "Lunch at a local market",
+    "Sunset viewpoint",
+    "Day trip to a nearby village",
+    "Street food crawl",
+    "Boat ride along the waterfront",
+    "Free afternoon to explore",
+]
+
+class StubProvider(LLMProvider):
+    """Deterministic local provider for offline runs and load tests.
+
+    Output depends only on the prompt: preference extraction uses the local
+    rule-based extractor, itineraries are built from the prompt fields and
+    chat replies are templated. Latency follows a ``StubProfile``.
+    """
+
+    name = "stub"
+
+    def __init__(self, model: str = "stub", profile: StubProfile = STUB_PROFILES["fast"]):
+        super().__init__(model)
+        self.profile = profile
+        self.extractor = RuleBasedPreferenceExtractor()
+
+    def _respond(self, messages: List[Dict[str, str]], json_mode: bool) -> str:
+        prompt = messages[-1]["content"]
+        if '"daily_plans"' in prompt:
+            return json.dumps(self._itinerary(prompt))
+        if json_mode:
+            return self.extractor.extract(prompt).preferences.json()
+        return self._chat_reply(prompt)
+
+    def _itinerary(self, prompt: str) -> Dict[str, object]:
+        fields = {
+            name.lower(): value for name, value in PROMPT_FIELD_PATTERN.findall(prompt)
+            if value != NOT_SPECIFIED
+        }
+        destination = fields.get("destination", "your destination")
+        duration = fields.get("duration", "3 days")
+        days_match = re.search(r"\d+", duration)
+        days = min(int(days_match.group()) if days_match else 3, 14)
+        rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+
+        daily_plans = [
+            {
+                "day": str(day),
+                "activities": rng.sample(ACTIVITIES, 3),
+                "cost": float(rng.randrange(30, 150)),
+            }
+            for day in range(1, days + 1)
+        ]
+        nightly = float(rng.randrange(40, 200))
+        return {
+            "destination": destination,
+            "duration": duration,
+            "daily_plans": daily_plans,
+            "total_cost": {
+                "accommodation": nightly * days,
+                "transport": float(rng.randrange(50, 400)),
+                "food": 35.0 * days,
+                "activities": sum(plan["cost"] for plan in daily_plans),
+            },
+            "transport_options": [{"type": "train", "cost": 25.0, "duration": "2 hours"}],
+            "accommodation_suggestions": [
+                {"type": "guesthouse", "cost_per_night": nightly, "description": f"Central stay in {destination}"}
+            ],
+            "food_recommendations": [
+                {"name": "Central market", "type": "street food", "cost": "$", "description": "Local favourites"}
+            ],
+            "hidden_gems": [f"Quiet back streets of {destination}"],
+            "tips": ["Book popular sights ahead", "Carry some cash"],
+        }
+
+    def _chat_reply(self, message: str) -> str:
+        preferences = self.extractor.extract(message).preferences
+        destination = preferences.destination or "your trip"
+        return (
+            f"Great, let's plan {destination}! "
+            "I can suggest routes, places to stay and a day-by-day plan. "
+            "To tailor it, tell me your budget (low, medium or high), your travel dates, "
+            "how many people are going and what you enjoy most, such as food, culture or nature. "
+            "I'll include luxury, mid-range and budget options with cost estimates."
+        )
+
+    async def _sleep(self, seconds: float) -> None:
+        if seconds > 0:
+            await asyncio.sleep(seconds)
+
+    def _generation_time(self, text: str) -> float:
+        if not self.profile.tokens_per_second:
+            return 0.0
+        return approximate_tokens(text) / self.profile.tokens_per_second
+
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float,
+        json_mode: bool = False
+    ) -> Completion:
+        content = self._respond(messages, json_mode)
+        await self._sleep(self.profile.first_token_latency + self._generation_time(content))
+        prompt_tokens = sum(approximate_tokens(message["content"]) for message in messages)
+        completion_tokens = approximate_tokens(content)
+        return Completion(
+            content=content,
+            total_tokens=prompt_tokens + completion_tokens,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens
+        )
+
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float,
+        json_mode: bool = False
+    ) -> AsyncIterator[str]:
+        content = self._respond(messages, json_mode)
+        await self._sleep(self.profile.first_token_latency)
+        for chunk in re.findall(r"\s*\S+", content):
+            await self._sleep(self._generation_time(chunk))
+            yield chunk
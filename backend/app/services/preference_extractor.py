@@ -0,0 +1,392 @@
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+import json
+import re
+
+from app.models.chat import TripPreferences
+
+NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+}
+# Articles only count as numbers for durations ("a week", "a couple of days")
+ARTICLE_NUMBERS = {"a": 1, "an": 1, "a couple of": 2, "a few": 3}
+
+def _number_pattern(words: Dict[str, int]) -> str:
+    return r"(\d+|" + "|".join(sorted((re.escape(w) for w in words), key=len, reverse=True)) + r")"
+
+_NUMBER = _number_pattern(NUMBER_WORDS)
+_DURATION_NUMBER = _number_pattern({**NUMBER_WORDS, **ARTICLE_NUMBERS})
+
+# Checked in order, so "mid range budget" is medium rather than low
+BUDGET_KEYWORDS = {
+    "high": ["luxury", "luxurious", "high-end", "high end", "premium", "splurge", "lavish", "5-star", "five star"],
+    "medium": ["mid-range", "mid range", "midrange", "moderate", "medium budget", "reasonable"],
+    "low": [
+        "cheap", "cheapest", "budget", "low budget", "low-budget", "backpacking", "backpacker",
+        "affordable", "shoestring", "inexpensive", "frugal", "economical",
+    ],
+}
+
+# Keywords that only name a level when no other level is named ("moderate budget")
+WEAK_BUDGET_KEYWORDS = {"budget"}
+
+TRANSPORT_KEYWORDS = {
+    "flight": ["flight", "flights", "fly", "flying", "plane", "airline"],
+    "train": ["train", "trains", "rail", "railway"],
+    "bus": ["bus", "buses", "coach"],
+    "car": ["drive", "driving", "car", "road trip", "roadtrip", "self-drive"],
+    "ferry": ["ferry", "boat", "cruise"],
+    "bike": ["bike", "motorbike", "scooter", "cycling"],
+}
+
+INTEREST_KEYWORDS = {
+    "beaches": ["beach", "beaches", "island", "islands", "snorkeling", "snorkelling", "surfing", "diving"],
+    "culture": ["culture", "cultural", "temple", "temples", "museum", "museums", "history", "historical", "heritage", "architecture"],
+    "food": ["food", "foodie", "cuisine", "street food", "eat", "eating", "restaurants", "wine"],
+    "nature": ["nature", "wildlife", "mountains", "mountain", "waterfalls", "national park", "scenery", "safari"],
+    "adventure": ["adventure", "hiking", "hike", "trek", "trekking", "rafting", "climbing", "paragliding", "skiing"],
+    "nightlife": ["nightlife", "party", "parties", "clubs", "clubbing", "bars"],
+    "relaxation": ["relax", "relaxing", "relaxation", "spa", "wellness", "yoga", "chill"],
+    "shopping": ["shopping", "markets", "market", "malls"],
+    "photography": ["photography", "photos", "photo"],
+}
+
+SOLO_PATTERN = re.compile(r"\b(solo|alone|by myself|on my own|just me)\b", re.I)
+COUPLE_PATTERN = re.compile(
+    r"\b(honeymoon|as a couple|my (wife|husband|partner|girlfriend|boyfriend|fiancee?))\b", re.I
+)
+PEOPLE_PATTERNS = [
+    re.compile(rf"\b{_NUMBER}\s+(people|persons|person|adults|travell?ers|friends|pax|guests|of us)\b", re.I),
+    re.compile(rf"\bfamily of\s+{_NUMBER}\b", re.I),
+    re.compile(rf"\bgroup of\s+{_NUMBER}\b", re.I),
+    re.compile(rf"\bfor\s+{_NUMBER}\b(?!\s*(days?|nights?|weeks?|months?|hours?))", re.I),
+]
+# Companions that imply a party size the rules cannot count
+PARTY_WORDS_PATTERN = re.compile(
+    r"\b(kids?|children|child|sons?|daughters?|baby|babies|toddlers?|family|friends|parents|"
+    r"mom|mum|dad|grandparents|siblings|brothers?|sisters?|colleagues|coworkers)\b",
+    re.I
+)
+DURATION_PATTERN = re.compile(
+    rf"\b{_DURATION_NUMBER}[\s-]+(day|night|week|month)s?\b", re.I
+)
+# Bare periods; "next week" and friends are dates, not durations
+DURATION_PHRASES = {
+    "long weekend": "3 days",
+    "weekend": "2 days",
+    "fortnight": "2 weeks",
+    "week": "1 week",
+}
+MONTHS = (
+    "january|february|march|april|may|june|july|august|september|october|november|december|"
+    "jan|feb|mar|apr|jun|jul|aug|sep|sept|oct|nov|dec"
+)
+DATE_PATTERNS = [
+    re.compile(r"\b\d{4}-\d{2}-\d{2}\b(\s*(to|-|until)\s*\d{4}-\d{2}-\d{2})?"),
+    re.compile(
+        rf"\b(\d{{1,2}}(st|nd|rd|th)?\s+)?({MONTHS})\b(\s+\d{{1,2}}(st|nd|rd|th)?\b)?(\s+\d{{4}})?"
+        rf"(\s*(to|-|until)\s*(\d{{1,2}}(st|nd|rd|th)?\s+)?({MONTHS})\b(\s+\d{{1,2}}(st|nd|rd|th)?\b)?)?",
+        re.I
+    ),
+    re.compile(r"\b(next|this|coming)\s+(week|weekend|month|year|summer|winter|spring|autumn|fall)\b", re.I),
+    re.compile(r"\b(in|during)\s+(the\s+)?(summer|winter|spring|autumn|fall|monsoon|christmas|diwali|new year)\b", re.I),
+]
+# "May" is also a modal verb; it only counts as a month when it looks like one
+AMBIGUOUS_MONTHS = {"may", "mar", "jan", "sep", "oct", "nov", "dec", "jun", "jul", "aug", "apr", "feb"}
+MONEY_PATTERN = re.compile(
+    r"(?:[$€£₹]\s?\d[\d,]*(?:\.\d+)?\s?[kK]?|\b\d[\d,]*(?:\.\d+)?\s?[kK]?\s?(?:dollars|usd|euros?|eur|pounds|gbp|rupees|inr|rs\.?))",
+    re.I
+)
+# Amounts the money pattern cannot normalize, e.g. "two grand" or "five thousand euros"
+SPELLED_AMOUNT_PATTERN = re.compile(
+    rf"\b({_NUMBER}|a|an|a few|a couple of)\s+(grand|thousand|hundred|lakhs?|k)\b"
+    rf"|\b{_NUMBER}\s+(dollars|bucks|euros?|pounds|quid|rupees)\b",
+    re.I
+)
+# Words that leave the destination open even when a place is named
+HEDGE_PATTERN = re.compile(r"\b(maybe|perhaps|somewhere|anywhere|not sure|undecided|either)\b", re.I)
+DESTINATION_CUES = re.compile(
+    r"\b(?:to|in|visit|visiting|around|explore|exploring|near|at)\s+((?:[A-Z][\w'-]+)(?:\s+[A-Z][\w'-]+){0,2})"
+)
+# Place names that are also common words only match when capitalized
+CASE_SENSITIVE_NAMES = {"nice", "split", "goa", "rio", "male", "leh", "kandy", "petra"}
+
+DEFAULT_GAZETTEER = Path(__file__).resolve().parent.parent / "data" / "places.json"
+
+# Per-field confidence of the different kinds of rule matches
+EXPLICIT = 1.0
+IMPLIED = 0.9
+HEDGED = 0.6
+AMBIGUOUS = 0.4
+CONFLICTING = 0.3
+# Overall confidence when nothing was extracted, and the cost of each unresolved cue
+NOTHING_FOUND = 0.5
+UNRESOLVED_PENALTY = 0.3
+
+class ExtractionResult(NamedTuple):
+    preferences: TripPreferences
+    confidence: float
+    fields: Set[str]
+    field_confidence: Dict[str, float]
+
+def _to_number(token: str) -> Optional[int]:
+    token = token.lower()
+    if token.isdigit():
+        return int(token)
+    return NUMBER_WORDS.get(token, ARTICLE_NUMBERS.get(token))
+
+def _keyword_pattern(keywords: List[str]) -> re.Pattern:
+    alternatives = sorted((re.escape(k) for k in keywords), key=len, reverse=True)
+    return re.compile(r"\b(" + "|".join(alternatives) + r")\b", re.I)
+
+def merge_preferences(base: Optional[TripPreferences], update: Optional[TripPreferences]) -> TripPreferences:
+    """Overlay the non-empty fields of ``update`` onto ``base``.
+    
+    Scalar fields are replaced by newer values; interests accumulate.
+    """
+    merged = base.dict() if base else {}
+    if update:
+        for key, value in update.dict().items():
+            if not value:
+                continue
+            if key == "interests" and merged.get("interests"):
+                value = list(dict.fromkeys([*merged["interests"], *value]))
+            merged[key] = value
+    return TripPreferences(**merged)
+
+class RuleBasedPreferenceExtractor:
+    """Fast local extraction of TripPreferences using patterns and a gazetteer.
+
+    Each extracted field carries its own confidence: explicit matches such
+    as "for 4 people" or "$3000" score highest, implied ones ("honeymoon",
+    "cheap") a little lower, and fields with competing or hedged matches
+    ("Bali or maybe Thailand", "my wife and our two kids") low. The overall
+    confidence is the lowest field confidence, reduced further for every
+    cue the rules could not resolve, such as an unknown capitalized place
+    after "to"/"in", a companion that was not counted or an amount that
+    matched no field.
+    """
+
+    def __init__(self, gazetteer_path: Path = DEFAULT_GAZETTEER):
+        self._names: Dict[str, str] = {}
+        self._case_sensitive: Dict[str, str] = {}
+        self._countries: Dict[str, str] = {}
+        self._load_gazetteer(gazetteer_path)
+        self._place_pattern = self._build_place_pattern(self._names, re.I)
+        self._case_sensitive_pattern = self._build_place_pattern(self._case_sensitive, 0)
+        self._budget_patterns = {level: _keyword_pattern(words) for level, words in BUDGET_KEYWORDS.items()}
+        self._transport_patterns = {mode: _keyword_pattern(words) for mode, words in TRANSPORT_KEYWORDS.items()}
+        self._interest_patterns = {name: _keyword_pattern(words) for name, words in INTEREST_KEYWORDS.items()}
+        self._residual_patterns = [
+            SOLO_PATTERN, COUPLE_PATTERN, *PEOPLE_PATTERNS, DURATION_PATTERN, *DATE_PATTERNS, MONEY_PATTERN,
+            _keyword_pattern([word for words in BUDGET_KEYWORDS.values() for word in words]),
+            _keyword_pattern([word for words in TRANSPORT_KEYWORDS.values() for word in words]),
+            _keyword_pattern([word for words in INTEREST_KEYWORDS.values() for word in words]),
+            _keyword_pattern(list(DURATION_PHRASES)),
+        ]
+
+    def _load_gazetteer(self, path: Path) -> None:
+        with open(path, encoding="utf-8") as f:
+            places = json.load(f)
+        for place in places:
+            self._countries[place["name"]] = place["country"]
+            for label in [place["name"], *place.get("aliases", [])]:
+                self._add_name(label, place["name"])
+            self._add_name(place["country"], place["country"])
+
+    def _add_name(self, label: str, canonical: str) -> None:
+        if label.isupper() or label.lower() in CASE_SENSITIVE_NAMES:
+            self._case_sensitive.setdefault(label, canonical)
+        else:
+            self._names.setdefault(label.lower(), canonical)
+
+    @staticmethod
+    def _build_place_pattern(names: Dict[str, str], flags: int) -> Optional[re.Pattern]:
+        if not names:
+            return None
+        alternatives = sorted((re.escape(name) for name in names), key=len, reverse=True)
+        return re.compile(r"\b(" + "|".join(alternatives) + r")\b", flags)
+
+    def _find_places(self, message: str) -> List[Tuple[int, int, str]]:
+        matches = []
+        if self._place_pattern:
+            for m in self._place_pattern.finditer(message):
+                matches.append((m.start(), m.end(), self._names[m.group(1).lower()]))
+        if self._case_sensitive_pattern:
+            for m in self._case_sensitive_pattern.finditer(message):
+                matches.append((m.start(), m.end(), self._case_sensitive[m.group(1)]))
+        return sorted(matches)
+
+    def extract(self, message: str) -> ExtractionResult:
+        values: Dict[str, object] = {}
+        confidence: Dict[str, float] = {}
+        consumed: List[Tuple[int, int]] = []
+        unresolved = 0
+
+        # Destination: prefer a known place right after a travel cue
+        places = self._find_places(message)
+        if places:
+            cue_starts = {m.start(1) for m in DESTINATION_CUES.finditer(message)}
+            chosen = next((p for p in places if p[0] in cue_starts), places[0])
+            values["destination"] = chosen[2]
+            consumed.extend((start, end) for start, end, _ in places)
+            # A city and its country are one destination; any other place competes
+            others = {name for _, _, name in places} - {chosen[2], self._countries.get(chosen[2])}
+            others = {name for name in others if self._countries.get(name) != chosen[2]}
+            if others:
+                confidence["destination"] = AMBIGUOUS
+            elif HEDGE_PATTERN.search(message):
+                confidence["destination"] = HEDGED
+            else:
+                confidence["destination"] = EXPLICIT
+        for m in DESTINATION_CUES.finditer(message):
+            if not any(start <= m.start(1) < end for start, end, _ in places):
+                if not self._is_date_word(m.group(1)):
+                    unresolved += 1
+
+        # Party size
+        people_span = None
+        for pattern in PEOPLE_PATTERNS:
+            m = pattern.search(message)
+            if m:
+                number = _to_number(m.group(1))
+                if number:
+                    values["people"] = number
+                    confidence["people"] = EXPLICIT
+                    people_span = m.span()
+                    consumed.append(people_span)
+                    break
+        if "people" not in values:
+            if SOLO_PATTERN.search(message):
+                values["people"] = 1
+                confidence["people"] = IMPLIED
+            elif COUPLE_PATTERN.search(message):
+                values["people"] = 2
+                confidence["people"] = IMPLIED
+        companions = [
+            m for m in PARTY_WORDS_PATTERN.finditer(message)
+            if people_span is None or not people_span[0] <= m.start() < people_span[1]
+        ]
+        if companions and confidence.get("people") != EXPLICIT:
+            # "my wife and our two kids": more people than the rules counted
+            if "people" in values:
+                confidence["people"] = CONFLICTING
+            else:
+                unresolved += 1
+
+        # Duration
+        durations: List[str] = []
+        for m in DURATION_PATTERN.finditer(message):
+            number = _to_number(m.group(1))
+            unit = m.group(2).lower()
+            if number:
+                durations.append(f"{number} {unit}{'s' if number != 1 else ''}")
+                consumed.append(m.span())
+        if durations:
+            # "4 days in Rome then 3 days in Florence" has no single duration
+            values["duration"] = durations[0]
+            confidence["duration"] = EXPLICIT if len(set(durations)) == 1 else AMBIGUOUS
+        else:
+            for phrase in DURATION_PHRASES:
+                if re.search(rf"(?<!next )(?<!this )(?<!coming )\b{phrase}\b", message, re.I):
+                    values["duration"] = DURATION_PHRASES[phrase]
+                    confidence["duration"] = IMPLIED
+                    break
+
+        # Dates
+        for pattern in DATE_PATTERNS:
+            m = pattern.search(message)
+            if m and not self._is_modal_may(message, m):
+                values["dates"] = m.group(0).strip()
+                confidence["dates"] = EXPLICIT
+                consumed.append(m.span())
+                break
+
+        # Budget: an explicit amount wins over a keyword level
+        spelled = SPELLED_AMOUNT_PATTERN.search(message)
+        if spelled:
+            consumed.append(spelled.span())
+        m = MONEY_PATTERN.search(message)
+        if m:
+            values["budget"] = m.group(0).strip()
+            confidence["budget"] = EXPLICIT
+            consumed.append(m.span())
+        else:
+            levels = self._budget_levels(message)
+            if levels:
+                values["budget"] = levels[0]
+                confidence["budget"] = IMPLIED if len(levels) == 1 else CONFLICTING
+            if spelled:
+                # "budget around two grand" is an amount, not a level
+                if "budget" in values:
+                    confidence["budget"] = CONFLICTING
+                else:
+                    unresolved += 1
+
+        # Transport
+        modes = [mode for mode, pattern in self._transport_patterns.items() if pattern.search(message)]
+        if modes:
+            values["transport_preference"] = modes[0]
+            confidence["transport_preference"] = IMPLIED if len(modes) == 1 else HEDGED
+
+        # Interests
+        interests = [name for name, pattern in self._interest_patterns.items() if pattern.search(message)]
+        if interests:
+            values["interests"] = interests
+            confidence["interests"] = EXPLICIT
+
+        # Numbers that no rule accounted for may carry information we missed
+        for m in re.finditer(r"\d+", message):
+            if not any(start <= m.start() < end for start, end in consumed):
+                unresolved += 1
+
+        overall = min(confidence.values()) if confidence else NOTHING_FOUND
+        overall = max(0.0, overall - UNRESOLVED_PENALTY * unresolved)
+        return ExtractionResult(TripPreferences(**values), overall, set(values), confidence)
+
+    def _budget_levels(self, message: str) -> List[str]:
+        """Budget levels named in the message, in priority order.
+
+        Words inside a higher-priority match and weak keywords next to a
+        named level do not count again, so "mid range budget" is only medium.
+        """
+        levels = []
+        claimed: List[Tuple[int, int]] = []
+        for level, pattern in self._budget_patterns.items():
+            spans = [
+                m.span() for m in pattern.finditer(message)
+                if not (levels and m.group(1).lower() in WEAK_BUDGET_KEYWORDS)
+            ]
+            if any(not any(start < end2 and start2 < end for start2, end2 in claimed) for start, end in spans):
+                levels.append(level)
+            claimed.extend(spans)
+        return levels
+
+    def residual(self, message: str) -> str:
+        """The message with every span a preference rule can match blanked out.
+
+        What is left is the part of the request the preferences do not
+        capture, e.g. "weather" in "weather in Bali for 3 days".
+        """
+        spans = [(start, end) for start, end, _ in self._find_places(message)]
+        for pattern in self._residual_patterns:
+            spans.extend(m.span() for m in pattern.finditer(message))
+        chars = list(message)
+        for start, end in spans:
+            chars[start:end] = " " * (end - start)
+        return " ".join("".join(chars).split())
+
+    @staticmethod
+    def _is_date_word(text: str) -> bool:
+        first = text.split()[0].lower()
+        return bool(re.fullmatch(MONTHS, first)) or first in {"summer", "winter", "spring", "autumn", "fall"}
+
+    @staticmethod
+    def _is_modal_may(message: str, match: re.Match) -> bool:
+        text = match.group(0).strip()
+        if text.lower() not in AMBIGUOUS_MONTHS:
+            return False
+        # A bare ambiguous month needs a preposition in front of it
+        before = message[:match.start()].rstrip().lower()
+        return not re.search(r"\b(in|during|from|until|by|early|late|mid|this|next)$", before)
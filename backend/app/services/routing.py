@@ -0,0 +1,393 @@
+from collections import OrderedDict, defaultdict
+from heapq import heappop, heappush
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+import csv
+import itertools
+import json
+import math
+import threading
+
+import numpy as np
+
+from app.models.routes import RouteLeg, TravelRoute
+from app.services.preference_extractor import DEFAULT_GAZETTEER
+
+DEFAULT_LINKS = Path(__file__).resolve().parent.parent / "data" / "transport_links.csv"
+MODES = ("flight", "train", "bus")
+ALL_MODES = (1 << len(MODES)) - 1
+EARTH_RADIUS_KM = 6371.0
+
+# Labels kept per node, and in total, by the Pareto search; bounds work on large graphs
+MAX_LABELS_PER_NODE = 4
+MAX_LABELS = 200_000
+# Trade-offs within this fraction of a found route on both criteria are dropped
+PARETO_TOLERANCE = 0.05
+
+def _normalize(name: str) -> str:
+    return " ".join(name.lower().split())
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance; works on floats and NumPy arrays alike."""
+    lat1, lon1, lat2, lon2 = (np.radians(x) for x in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+def mode_mask(modes: Sequence[str]) -> int:
+    """Bitmask of allowed modes; raises ValueError for unknown modes."""
+    mask = 0
+    for mode in modes:
+        mask |= 1 << MODES.index(mode.lower())
+    return mask
+
+class RoutePlan(NamedTuple):
+    edges: List[int]  # edge ids in travel order
+    duration: float  # minutes
+    cost: float  # USD
+
+class TransportGraph:
+    """Multi-modal transport graph in compressed sparse row form.
+
+    Edges leaving node ``i`` are ``indptr[i]:indptr[i + 1]`` of the
+    ``targets``/``modes``/``durations``/``costs`` arrays, so a graph with a
+    million edges is a few flat arrays rather than a million objects.
+    """
+
+    def __init__(
+        self,
+        names: Sequence[str],
+        lat: np.ndarray,
+        lon: np.ndarray,
+        sources: np.ndarray,
+        targets: np.ndarray,
+        modes: np.ndarray,
+        durations: np.ndarray,
+        costs: np.ndarray,
+        operators: Sequence[str] = ("",),
+        operator_ids: Optional[np.ndarray] = None,
+        aliases: Optional[Dict[str, int]] = None
+    ):
+        self.names = list(names)
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        order = np.argsort(sources, kind="stable")
+        self.sources = np.asarray(sources, dtype=np.int32)[order]
+        self.targets = np.asarray(targets, dtype=np.int32)[order]
+        self.modes = np.asarray(modes, dtype=np.uint8)[order]
+        self.durations = np.asarray(durations, dtype=np.float32)[order]
+        self.costs = np.asarray(costs, dtype=np.float32)[order]
+        self.operators = list(operators)
+        if operator_ids is None:
+            operator_ids = np.zeros(len(order), dtype=np.uint16)
+        self.operator_ids = np.asarray(operator_ids, dtype=np.uint16)[order]
+        counts = np.bincount(self.sources, minlength=len(self.names))
+        self.indptr = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+
+        self._ids = {_normalize(name): i for i, name in enumerate(self.names)}
+        for alias, node in (aliases or {}).items():
+            self._ids.setdefault(_normalize(alias), node)
+
+        # Per-km lower bounds over all edges make the A* heuristics admissible
+        edge_km = haversine_km(
+            self.lat[self.sources], self.lon[self.sources], self.lat[self.targets], self.lon[self.targets]
+        )
+        far = edge_km > 0
+        self.min_minutes_per_km = float((self.durations[far] / edge_km[far]).min()) if far.any() else 0.0
+        self.min_cost_per_km = float((self.costs[far] / edge_km[far]).min()) if far.any() else 0.0
+
+    @classmethod
+    def load(cls, links_path: Path = DEFAULT_LINKS, gazetteer_path: Path = DEFAULT_GAZETTEER) -> "TransportGraph":
+        """Build the graph from gazetteer places and a CSV of two-way links.
+
+        Link columns: ``from,to,mode,operator,duration_minutes,cost_usd``.
+        """
+        with open(gazetteer_path, encoding="utf-8") as f:
+            places = json.load(f)
+        ids = {place["name"]: i for i, place in enumerate(places)}
+        aliases = {alias: ids[place["name"]] for place in places for alias in place.get("aliases", [])}
+
+        operators: Dict[str, int] = {}
+        edges: List[Tuple[int, int, int, float, float, int]] = []
+        with open(links_path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                a, b = ids[row["from"]], ids[row["to"]]
+                mode = MODES.index(row["mode"])
+                operator = operators.setdefault(row["operator"], len(operators))
+                duration, cost = float(row["duration_minutes"]), float(row["cost_usd"])
+                edges.append((a, b, mode, duration, cost, operator))
+                edges.append((b, a, mode, duration, cost, operator))
+
+        columns = list(zip(*edges))
+        return cls(
+            names=[place["name"] for place in places],
+            lat=np.array([place["lat"] for place in places]),
+            lon=np.array([place["lon"] for place in places]),
+            sources=np.array(columns[0]),
+            targets=np.array(columns[1]),
+            modes=np.array(columns[2]),
+            durations=np.array(columns[3]),
+            costs=np.array(columns[4]),
+            operators=list(operators),
+            operator_ids=np.array(columns[5]),
+            aliases=aliases
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.indptr, self.sources, self.targets, self.modes, self.durations, self.costs, self.operator_ids)
+        return sum(array.nbytes for array in arrays)
+
+    def node_id(self, name: str) -> Optional[int]:
+        return self._ids.get(_normalize(name))
+
+class RouteEngine:
+    """Fastest, cheapest and Pareto-optimal routes over a ``TransportGraph``.
+
+    Single-criterion queries run A* with a great-circle lower bound. The
+    Pareto set (duration vs. cost) uses multi-criteria label setting,
+    pruned by the same bounds against routes already found. Results for
+    each (origin, destination, modes) are memoized in an LRU, since a few
+    popular pairs make up most lookups.
+    """
+
+    def __init__(self, graph: TransportGraph, cache_size: int = 1024):
+        self.graph = graph
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[int, int, int, str], List[RoutePlan]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        # Python lists index faster than NumPy scalars inside the search loops
+        self._indptr = graph.indptr.tolist()
+        self._lat = graph.lat.tolist()
+        self._lon = graph.lon.tolist()
+
+    def _distance_to(self, target: int) -> Callable[[int], float]:
+        """Great-circle km from each node to ``target``, memoized for one query."""
+        lat2, lon2 = math.radians(self._lat[target]), math.radians(self._lon[target])
+        cos_lat2 = math.cos(lat2)
+        lat, lon = self._lat, self._lon
+        memo: Dict[int, float] = {}
+
+        def distance(node: int) -> float:
+            km = memo.get(node)
+            if km is None:
+                lat1, lon1 = math.radians(lat[node]), math.radians(lon[node])
+                a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * cos_lat2 * math.sin((lon2 - lon1) / 2) ** 2
+                km = memo[node] = 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+            return km
+        return distance
+
+    def _edges(self, node: int, allowed: int):
+        start, end = self._indptr[node], self._indptr[node + 1]
+        graph = self.graph
+        for edge, target, mode, duration, cost in zip(
+            range(start, end),
+            graph.targets[start:end].tolist(),
+            graph.modes[start:end].tolist(),
+            graph.durations[start:end].tolist(),
+            graph.costs[start:end].tolist()
+        ):
+            if allowed & (1 << mode):
+                yield edge, target, duration, cost
+
+    def shortest(self, source: int, target: int, by: str = "duration", allowed: int = ALL_MODES) -> Optional[RoutePlan]:
+        """A* on ``by`` ("duration" or "cost"); the other criterion is summed along."""
+        by_duration = by == "duration"
+        per_km = self.graph.min_minutes_per_km if by_duration else self.graph.min_cost_per_km
+        distance = self._distance_to(target)
+        best: Dict[int, float] = {source: 0.0}
+        previous: Dict[int, int] = {}
+        closed = set()
+        heap = [(per_km * distance(source), 0.0, source)]
+        while heap:
+            _, weight, node = heappop(heap)
+            if node == target:
+                return self._plan(self._unwind(previous, target))
+            if node in closed:
+                continue
+            closed.add(node)
+            for edge, neighbour, duration, cost in self._edges(node, allowed):
+                candidate = weight + (duration if by_duration else cost)
+                if candidate < best.get(neighbour, math.inf):
+                    best[neighbour] = candidate
+                    previous[neighbour] = edge
+                    heappush(heap, (candidate + per_km * distance(neighbour), candidate, neighbour))
+        return None
+
+    def pareto(self, source: int, target: int, allowed: int = ALL_MODES) -> List[RoutePlan]:
+        """Routes where neither duration nor cost can improve without the other getting worse.
+
+        The fastest and cheapest routes are found first with A*; every other
+        candidate must beat one of them on some criterion, which confines the
+        label search to the box between them. Trade-offs within
+        ``PARETO_TOLERANCE`` of a found route are not worth listing and are
+        pruned. Each node keeps at most ``MAX_LABELS_PER_NODE`` labels, and
+        after ``MAX_LABELS`` the routes found so far are returned. Sorted
+        fastest first.
+        """
+        fastest = self.shortest(source, target, "duration", allowed)
+        if fastest is None:
+            return []
+        cheapest = self.shortest(source, target, "cost", allowed)
+        found: List[Tuple[float, float, Any]] = [(fastest.duration, fastest.cost, fastest)]
+        if cheapest is not None and cheapest.cost < fastest.cost:
+            found.append((cheapest.duration, cheapest.cost, cheapest))
+
+        minutes_per_km, cost_per_km = self.graph.min_minutes_per_km, self.graph.min_cost_per_km
+        distance = self._distance_to(target)
+        settled: Dict[int, List[Tuple[float, float]]] = defaultdict(list)
+        tiebreak = itertools.count()
+        slack = 1 + PARETO_TOLERANCE
+        # A label is (duration, cost, node, edge, parent label)
+        km = distance(source)
+        heap = [(minutes_per_km * km, cost_per_km * km, next(tiebreak), (0.0, 0.0, source, -1, None))]
+
+        budget = MAX_LABELS
+        while heap and budget:
+            bound_duration, bound_cost, _, label = heappop(heap)
+            duration, cost, node, _, _ = label
+            if any(d <= bound_duration * slack and c <= bound_cost * slack for d, c, _ in found):
+                continue
+            labels = settled[node]
+            if len(labels) >= MAX_LABELS_PER_NODE or any(d <= duration and c <= cost for d, c in labels):
+                continue
+            labels.append((duration, cost))
+            budget -= 1
+            if node == target:
+                found.append((duration, cost, label))
+                continue
+            for edge, neighbour, edge_duration, edge_cost in self._edges(node, allowed):
+                next_duration, next_cost = duration + edge_duration, cost + edge_cost
+                if any(d <= next_duration and c <= next_cost for d, c in settled.get(neighbour, ())):
+                    continue
+                km = distance(neighbour)
+                heappush(heap, (
+                    next_duration + minutes_per_km * km,
+                    next_cost + cost_per_km * km,
+                    next(tiebreak),
+                    (next_duration, next_cost, neighbour, edge, label)
+                ))
+
+        plans = [item if isinstance(item, RoutePlan) else self._from_label(item) for _, _, item in found]
+        return sorted(plans, key=lambda plan: (plan.duration, plan.cost))
+
+    def cached(
+        self,
+        source: int,
+        target: int,
+        objective: str = "all",
+        allowed: int = ALL_MODES
+    ) -> Optional[List[RoutePlan]]:
+        """Memoized routes, or None; lets callers skip a worker thread on hits."""
+        key = (source, target, allowed, objective)
+        with self._lock:
+            plans = self._cache.get(key)
+            if plans is not None:
+                self._hits += 1
+                self._cache.move_to_end(key)
+            return plans
+
+    def routes(self, source: int, target: int, objective: str = "all", allowed: int = ALL_MODES) -> List[RoutePlan]:
+        """Memoized ``pareto`` ("all") or ``shortest`` ("fastest"/"cheapest") routes.
+
+        Safe to call from worker threads.
+        """
+        plans = self.cached(source, target, objective, allowed)
+        if plans is not None:
+            return plans
+
+        if source == target:
+            plans = []
+        elif objective == "all":
+            plans = self.pareto(source, target, allowed)
+        else:
+            plan = self.shortest(source, target, "duration" if objective == "fastest" else "cost", allowed)
+            plans = [plan] if plan else []
+
+        with self._lock:
+            self._misses += 1
+            self._cache[(source, target, allowed, objective)] = plans
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return plans
+
+    def cache_stats(self) -> Dict[str, int]:
+        return {"entries": len(self._cache), "hits": self._hits, "misses": self._misses}
+
+    def _unwind(self, previous: Dict[int, int], target: int) -> List[int]:
+        edges = []
+        node = target
+        while node in previous:
+            edge = previous[node]
+            edges.append(edge)
+            node = int(self.graph.sources[edge])
+        return edges[::-1]
+
+    def _from_label(self, label: tuple) -> RoutePlan:
+        duration, cost = label[0], label[1]
+        edges = []
+        while label[4] is not None:
+            edges.append(label[3])
+            label = label[4]
+        return RoutePlan(edges[::-1], duration, cost)
+
+    def _plan(self, edges: List[int]) -> RoutePlan:
+        return RoutePlan(
+            edges,
+            float(self.graph.durations[edges].sum()) if edges else 0.0,
+            float(self.graph.costs[edges].sum()) if edges else 0.0
+        )
+
+def format_duration(minutes: float) -> str:
+    hours, minutes = divmod(int(round(minutes)), 60)
+    return f"{hours}h {minutes:02d}m" if hours else f"{minutes}m"
+
+def describe_routes(graph: TransportGraph, plans: Sequence[RoutePlan], objective: str = "all") -> List[TravelRoute]:
+    """Turn plans into API routes, labelling the fastest and cheapest."""
+    if not plans:
+        return []
+    fastest = min(range(len(plans)), key=lambda i: (plans[i].duration, plans[i].cost))
+    cheapest = min(range(len(plans)), key=lambda i: (plans[i].cost, plans[i].duration))
+    routes = []
+    for i, plan in enumerate(plans):
+        legs = [
+            RouteLeg(
+                from_location=graph.names[graph.sources[edge]],
+                to_location=graph.names[graph.targets[edge]],
+                mode=MODES[graph.modes[edge]],
+                operator=graph.operators[graph.operator_ids[edge]] or None,
+                duration_minutes=int(graph.durations[edge]),
+                cost_usd=float(graph.costs[edge])
+            )
+            for edge in plan.edges
+        ]
+        modes = list(dict.fromkeys(leg.mode for leg in legs))
+        operators = {leg.operator for leg in legs}
+        if len(legs) == 1:
+            description = f"Direct {legs[0].mode}"
+        else:
+            stops = ", ".join(leg.to_location for leg in legs[:-1])
+            description = f"{' + '.join(modes).capitalize()} via {stops}"
+        routes.append(TravelRoute(
+            transport_type=modes[0] if len(modes) == 1 else "mixed",
+            duration=format_duration(plan.duration),
+            cost=f"${plan.cost:,.0f}",
+            description=description,
+            operator=operators.pop() if len(operators) == 1 else None,
+            duration_minutes=int(round(plan.duration)),
+            cost_usd=round(plan.cost, 2),
+            labels=(
+                [label for label, index in (("fastest", fastest), ("cheapest", cheapest)) if index == i]
+                if objective == "all" else [objective]
+            ),
+            legs=legs
+        ))
+    return routes
@@ -0,0 +1,230 @@
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+import re
+import time
+import zlib
+
+import numpy as np
+
+from app.services.preference_extractor import NUMBER_WORDS
+
+WORD_PATTERN = re.compile(r"[a-z]{2,}")
+CONTRACTION_PATTERN = re.compile(r"n't\b|\bcannot\b")
+# Function words and trip-planning filler; question words, modals, intent
+# verbs and negations are kept since "when should I visit" and "visit", or
+# "what should I do" and "what should I avoid", are different requests
+STOPWORDS = set("""
+an the and or but of to in on at for from with by about into over than as is are be am was were it its
+this that these those me my we us our you your he she they them their like love
+please help get give show tell some any all there here so very just also plan planning trip travel
+travelling traveling go going day days night nights week weeks month months people person
+""".split()) | set(NUMBER_WORDS)
+# Words that turn a request into its opposite; requests only match with the same polarity
+NEGATIONS = {"not", "no", "never", "without", "avoid", "skip", "nor"}
+EMPTY_FEATURE = "<empty>"
+
+def words(text: str) -> List[str]:
+    """Lowercased words, with "n't" and "cannot" spelled out as "not"."""
+    return WORD_PATTERN.findall(CONTRACTION_PATTERN.sub(lambda m: " not" if m.group() == "n't" else "can not", text.lower()))
+
+def negated(text: str) -> bool:
+    return any(word in NEGATIONS for word in words(text))
+
+# Partitions larger than this are searched through the LSH tables
+EXACT_SCAN_LIMIT = 256
+
+class HashedNgramVectorizer:
+    """Embeds text as signed hashed words and character n-grams.
+
+    Words are lowercased, stop words and numbers dropped, and each remaining
+    word contributes itself plus its character n-grams, so inflections and
+    small typos stay close. Features are hashed into ``dimensions`` buckets
+    with a sign bit and the vector is L2-normalized. Text without features
+    embeds to one fixed vector, so two empty requests are identical.
+    """
+
+    def __init__(self, dimensions: int = 512, ngram: int = 3, ngram_weight: float = 0.5):
+        self.dimensions = dimensions
+        self.ngram = ngram
+        self.ngram_weight = ngram_weight
+
+    def features(self, text: str) -> List[Tuple[str, float]]:
+        features = []
+        for word in words(text):
+            if word in STOPWORDS:
+                continue
+            features.append((word, 1.0))
+            padded = f"<{word}>"
+            features.extend(
+                (padded[i:i + self.ngram], self.ngram_weight) for i in range(len(padded) - self.ngram + 1)
+            )
+        return features or [(EMPTY_FEATURE, 1.0)]
+
+    def embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for feature, weight in self.features(text):
+            h = zlib.crc32(feature.encode("utf-8"))
+            vector[h % self.dimensions] += weight if h & 0x80000000 else -weight
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            # Every feature cancelled out; fall back to the empty vector
+            return self.embed("")
+        return vector / norm
+
+class _Entry(NamedTuple):
+    partition: Tuple[str, str]
+    codes: Tuple[int, ...]
+    negated: bool
+    value: Any
+    expires_at: float
+
+class SemanticCache:
+    """Serves answers to requests that are close to earlier ones.
+
+    Entries are partitioned by call type and a structured key (e.g. the
+    normalized trip preferences): only requests with an equal key can match,
+    and within a partition the most similar stored request is served if its
+    cosine similarity reaches ``threshold`` and either both or neither
+    request is negated, so "where should I not stay" never gets the answer
+    to "where should I stay". Vectors live in one
+    preallocated array. Small partitions are scanned exactly; large ones are
+    searched through random-hyperplane LSH tables, which makes the lookup
+    approximate. Entries expire after a per-call-type TTL and the least
+    recently used entry is evicted when the cache is full.
+    """
+
+    def __init__(
+        self,
+        vectorizer: Optional[HashedNgramVectorizer] = None,
+        max_entries: int = 4096,
+        threshold: float = 0.85,
+        ttls: Optional[Dict[str, int]] = None,
+        enabled: bool = True,
+        tables: int = 8,
+        bits: int = 6,
+        seed: int = 0
+    ):
+        self.vectorizer = vectorizer or HashedNgramVectorizer()
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttls = ttls or {}
+        self.enabled = enabled
+        dimensions = self.vectorizer.dimensions
+        self._vectors = np.zeros((max_entries, dimensions), dtype=np.float32)
+        self._planes = np.random.default_rng(seed).standard_normal((tables * bits, dimensions)).astype(np.float32)
+        self._powers = 1 << np.arange(bits)
+        self._tables = tables
+        self._bits = bits
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._free = list(range(max_entries - 1, -1, -1))
+        self._partitions: Dict[Tuple[str, str], Set[int]] = {}
+        self._buckets: Dict[Tuple[Tuple[str, str], int, int], Set[int]] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._evictions = 0
+        self._expirations = 0
+
+    @classmethod
+    def from_settings(cls, settings: Any) -> "SemanticCache":
+        return cls(
+            HashedNgramVectorizer(dimensions=settings.SEMANTIC_CACHE_DIMENSIONS),
+            max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+            threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+            ttls=settings.SEMANTIC_CACHE_TTLS,
+            enabled=settings.SEMANTIC_CACHE_ENABLED
+        )
+
+    def caches(self, call_type: str) -> bool:
+        return self.enabled and self.ttls.get(call_type, 0) > 0
+
+    def _codes(self, vector: np.ndarray) -> Tuple[int, ...]:
+        signs = (self._planes @ vector > 0).reshape(self._tables, self._bits)
+        return tuple((signs @ self._powers).tolist())
+
+    def _record(self, call_type: str, outcome: str) -> None:
+        counters = self._stats.setdefault(call_type, {"hits": 0, "misses": 0})
+        counters[outcome] += 1
+
+    def get(self, call_type: str, key: str, text: str) -> Optional[Any]:
+        """Return the stored value closest to ``text`` within ``key``, if similar enough."""
+        match = self.search(call_type, key, text)
+        if match is None:
+            self._record(call_type, "misses")
+            return None
+        slot, _ = match
+        self._entries.move_to_end(slot)
+        self._record(call_type, "hits")
+        return self._entries[slot].value
+
+    def search(self, call_type: str, key: str, text: str) -> Optional[Tuple[int, float]]:
+        """Slot and similarity of the best live match at or above the threshold."""
+        if not self.caches(call_type):
+            return None
+        partition = (call_type, key)
+        slots = self._partitions.get(partition)
+        if not slots:
+            return None
+        vector = self.vectorizer.embed(text)
+        if len(slots) <= EXACT_SCAN_LIMIT:
+            candidates = slots
+        else:
+            candidates = set()
+            for table, code in enumerate(self._codes(vector)):
+                candidates |= self._buckets.get((partition, table, code), set())
+        now = time.monotonic()
+        for slot in [slot for slot in candidates if self._entries[slot].expires_at < now]:
+            self._remove(slot)
+            self._expirations += 1
+        polarity = negated(text)
+        candidates = np.fromiter(
+            (slot for slot in candidates if slot in self._entries and self._entries[slot].negated == polarity),
+            dtype=np.int64
+        )
+        if not candidates.size:
+            return None
+        similarities = self._vectors[candidates] @ vector
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+        return int(candidates[best]), float(similarities[best])
+
+    def set(self, call_type: str, key: str, text: str, value: Any) -> None:
+        if not self.caches(call_type):
+            return
+        vector = self.vectorizer.embed(text)
+        if not self._free:
+            self._remove(next(iter(self._entries)))
+            self._evictions += 1
+        slot = self._free.pop()
+        partition = (call_type, key)
+        codes = self._codes(vector)
+        self._vectors[slot] = vector
+        self._entries[slot] = _Entry(partition, codes, negated(text), value, time.monotonic() + self.ttls[call_type])
+        self._partitions.setdefault(partition, set()).add(slot)
+        for table, code in enumerate(codes):
+            self._buckets.setdefault((partition, table, code), set()).add(slot)
+
+    def _remove(self, slot: int) -> None:
+        entry = self._entries.pop(slot)
+        self._free.append(slot)
+        partition = entry.partition
+        self._partitions[partition].discard(slot)
+        if not self._partitions[partition]:
+            del self._partitions[partition]
+        for table, code in enumerate(entry.codes):
+            bucket = self._buckets[(partition, table, code)]
+            bucket.discard(slot)
+            if not bucket:
+                del self._buckets[(partition, table, code)]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters per call type."""
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "evictions": self._evictions,
+            "expirations": self._expirations,
+            "call_types": {name: dict(counters) for name, counters in self._stats.items()}
+        }
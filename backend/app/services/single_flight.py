@@ -0,0 +1,71 @@
+from typing import Any, Awaitable, Callable, Dict, Generic, TypeVar
+import asyncio
+
+T = TypeVar("T")
+
+class _Flight(Generic[T]):
+    def __init__(self, task: "asyncio.Task[T]", call_type: str):
+        self.task = task
+        self.call_type = call_type
+        self.waiters = 0
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one in-flight call.
+
+    The first caller for a key starts the call; callers arriving while it is
+    running await the same result (or exception). The call is cancelled
+    only once every waiter has gone away.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight[Any]] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    async def do(self, key: str, call: Callable[[], Awaitable[T]], call_type: str = "default") -> T:
+        counters = self._stats.setdefault(call_type, {"calls": 0, "coalesced": 0, "max_waiters": 0})
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(call()), call_type)
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            counters["calls"] += 1
+        else:
+            counters["coalesced"] += 1
+
+        flight.waiters += 1
+        counters["max_waiters"] = max(counters["max_waiters"], flight.waiters)
+        try:
+            # Shield so one caller's cancellation does not cancel the others
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+
+    def _forget(self, key: str, flight: _Flight[Any]) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.task.cancelled():
+            # Mark the exception retrieved; waiters already received it
+            flight.task.exception()
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    def waiters(self) -> Dict[str, int]:
+        """Return the number of callers waiting on each in-flight key."""
+        return {key: flight.waiters for key, flight in self._flights.items()}
+
+    def stats(self) -> Dict[str, Any]:
+        """Return coalescing counters per call type and current waiter counts."""
+        in_flight: Dict[str, int] = {}
+        for flight in self._flights.values():
+            in_flight[flight.call_type] = in_flight.get(flight.call_type, 0) + flight.waiters
+        return {
+            "in_flight": len(self._flights),
+            "waiters": self.waiters(),
+            "call_types": {
+                name: {**counters, "waiting": in_flight.get(name, 0)}
+                for name, counters in self._stats.items()
+            }
+        }
@@ -0,0 +1,252 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Type, TypeVar
+import json
+import re
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+FENCE_PATTERN = re.compile(r"```(?:json|JSON)?[ \t]*\n?(.*?)(?:```|$)", re.S)
+TRAILING_COMMA_PATTERN = re.compile(r",(\s*[}\]])")
+NUMBER_PATTERN = re.compile(r"-?\d[\d,]*(?:\.\d+)?")
+PARTIAL_LITERAL_PATTERN = re.compile(r"(?<![\w.])(t|tr|tru|f|fa|fal|fals|n|nu|nul|-|\d+\.|\d+[eE][+-]?)$")
+# An escape cut off after its backslash or part of a \uXXXX code
+PARTIAL_ESCAPE_PATTERN = re.compile(r"(?<!\\)((?:\\\\)*)\\(?:u[0-9a-fA-F]{0,3})?$")
+# Where a JSON value plausibly starts, so "{name}" or "[draft]" in prose is skipped
+JSON_START_PATTERN = re.compile(r'\{\s*["}]|\[\s*(?:[\[\]{"\d-]|true|false|null)')
+CLOSERS = {"{": "}", "[": "]"}
+
+class StructuredOutputError(ValueError):
+    """Raised when model output holds no usable JSON value."""
+
+class ParsedJSON(NamedTuple):
+    data: Any
+    repaired: bool
+
+class _ScanState(NamedTuple):
+    end: Optional[int]
+    stack: List[Tuple[str, int]]
+    string_start: Optional[int]
+
+def _scan(text: str) -> _ScanState:
+    """Scan a JSON value, tracking open containers and strings.
+
+    ``end`` is the index just past the first complete top-level value, or
+    ``None`` when the text is truncated.
+    """
+    stack: List[Tuple[str, int]] = []
+    string_start = None
+    escaped = False
+    for index, char in enumerate(text):
+        if string_start is not None:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                string_start = None
+            continue
+        if char == '"':
+            string_start = index
+        elif char in CLOSERS:
+            stack.append((char, index))
+        elif char in "}]":
+            if stack:
+                stack.pop()
+            if not stack:
+                return _ScanState(index + 1, [], None)
+    return _ScanState(None, stack, string_start)
+
+def extract_json_text(content: str) -> str:
+    """Strip markdown fences and surrounding prose down to the JSON value."""
+    match = FENCE_PATTERN.search(content)
+    if match and match.group(1).strip():
+        content = match.group(1)
+    # Take the longest candidate value, so brackets in prose before the JSON
+    # (or a value nested inside it) never win; a truncated value runs to the end
+    best, best_end = None, -1
+    for match in JSON_START_PATTERN.finditer(content):
+        start = match.start()
+        if start < best_end:
+            continue
+        end = _scan(content[start:]).end
+        if end is None:
+            end = len(content)
+        else:
+            end += start
+            try:
+                json.loads(content[start:end])
+            except json.JSONDecodeError:
+                continue
+        if best is None or end - start > best_end - best:
+            best, best_end = start, end
+    if best is None:
+        raise StructuredOutputError("No JSON value found in model output")
+    return content[best:]
+
+def _trim_dangling(text: str, stack: List[Tuple[str, int]]) -> str:
+    """Drop a trailing comma, colon, partial literal or value-less key."""
+    while True:
+        stripped = text.rstrip()
+        if stripped.endswith(","):
+            text = stripped[:-1]
+            continue
+        if stripped.endswith(":"):
+            # Drop the key whose value never arrived
+            text = stripped[:-1]
+            key_end = text.rstrip()
+            key_start = key_end[:-1].rfind('"')
+            text = key_end[:key_start] if key_end.endswith('"') and key_start != -1 else key_end
+            continue
+        literal = PARTIAL_LITERAL_PATTERN.search(stripped)
+        if literal:
+            text = stripped[:literal.start()]
+            continue
+        if stripped.endswith('"') and stack and stack[-1][0] == "{":
+            # A string right after "{" or "," inside an object is a key
+            key_start = stripped[:-1].rfind('"')
+            before = stripped[:key_start].rstrip()
+            if key_start != -1 and before.endswith(("{", ",")):
+                text = before
+                continue
+        return stripped
+
+def repair_json(text: str) -> str:
+    """Best-effort completion of truncated JSON."""
+    state = _scan(text)
+    if state.end is not None:
+        return TRAILING_COMMA_PATTERN.sub(r"\1", text[:state.end])
+
+    if state.string_start is not None:
+        text = PARTIAL_ESCAPE_PATTERN.sub(r"\1", text) + '"'
+    # Rescan so the stack reflects the closed string before trimming
+    stack = _scan(text).stack
+    text = _trim_dangling(text, stack)
+    stack = _scan(text).stack
+    text += "".join(CLOSERS[char] for char, _ in reversed(stack))
+    return TRAILING_COMMA_PATTERN.sub(r"\1", text)
+
+def parse_json(content: str) -> ParsedJSON:
+    """Parse JSON from model output, tolerating fences, prose and truncation."""
+    text = extract_json_text(content)
+    state = _scan(text)
+    if state.end is not None:
+        try:
+            return ParsedJSON(json.loads(text[:state.end]), False)
+        except json.JSONDecodeError:
+            pass
+    try:
+        return ParsedJSON(json.loads(repair_json(text)), True)
+    except json.JSONDecodeError as e:
+        raise StructuredOutputError(f"Could not repair model output: {e}") from e
+
+def coerce_number(value: Any) -> Optional[float]:
+    """Read a number from model output such as ``"$1,200"`` or ``"80-120"``."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        match = NUMBER_PATTERN.search(value)
+        if match:
+            return float(match.group().replace(",", ""))
+    return None
+
+_adapters: Dict[Any, TypeAdapter] = {}
+
+def _adapter(annotation: Any) -> TypeAdapter:
+    if annotation not in _adapters:
+        _adapters[annotation] = TypeAdapter(annotation)
+    return _adapters[annotation]
+
+def validate_partial(
+    model: Type[ModelT],
+    data: Any,
+    defaults: Optional[Dict[str, Any]] = None
+) -> Tuple[ModelT, List[str]]:
+    """Validate ``data`` field by field, keeping every field that is valid.
+
+    Invalid or missing fields fall back to ``defaults`` (or the model's own
+    default). Returns the model and the names of the fields that were
+    invalid, or required but missing.
+    """
+    if not isinstance(data, dict):
+        raise StructuredOutputError(f"Expected a JSON object, got {type(data).__name__}")
+    defaults = defaults or {}
+    values: Dict[str, Any] = {}
+    fallbacks: List[str] = []
+    for name, field in model.model_fields.items():
+        if name in data:
+            try:
+                values[name] = _adapter(field.annotation).validate_python(data[name])
+                continue
+            except ValidationError:
+                pass
+        if name in data or field.is_required():
+            fallbacks.append(name)
+        if name in defaults:
+            values[name] = defaults[name]
+        elif field.is_required():
+            raise StructuredOutputError(f"Missing required field: {name}")
+    return model(**values), fallbacks
+
+class JSONArrayStreamParser:
+    """Incrementally yield the items of the array under ``key`` as they complete.
+
+    Feed it model output chunk by chunk; every call returns the array items
+    that were closed by that chunk.
+    """
+
+    def __init__(self, key: str):
+        self._key_pattern = re.compile(r'"' + re.escape(key) + r'"\s*:\s*\[')
+        self._buffer = ""
+        self._position: Optional[int] = None
+        self._depth = 0
+        self._item_start: Optional[int] = None
+        self._in_string = False
+        self._escaped = False
+        self.done = False
+
+    def feed(self, chunk: str) -> List[Any]:
+        self._buffer += chunk
+        if self.done:
+            return []
+        if self._position is None:
+            match = self._key_pattern.search(self._buffer)
+            if not match:
+                return []
+            self._position = match.end()
+
+        items = []
+        buffer = self._buffer
+        index = self._position
+        while index < len(buffer):
+            char = buffer[index]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in CLOSERS:
+                if self._depth == 0:
+                    self._item_start = index
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 0:
+                    self.done = True
+                    index += 1
+                    break
+                self._depth -= 1
+                if self._depth == 0 and self._item_start is not None:
+                    try:
+                        items.append(json.loads(buffer[self._item_start:index + 1]))
+                    except json.JSONDecodeError:
+                        pass
+                    self._item_start = None
+            index += 1
+        self._position = index
+        return items
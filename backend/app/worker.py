@@ -0,0 +1,90 @@
+from typing import Any, Dict, Optional
+import asyncio
+
+from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
+
+from app.core.config import settings
+from app.models.chat import TripPreferences
+from app.models.jobs import JobStatus, PlanJob
+
+celery_app = Celery(
+    "tripmate",
+    broker=settings.CELERY_BROKER_URL or settings.REDIS_URL,
+    backend=settings.CELERY_RESULT_BACKEND or settings.REDIS_URL
+)
+celery_app.conf.update(
+    task_track_started=True,
+    result_expires=settings.JOB_RESULT_TTL,
+    worker_concurrency=settings.JOB_WORKER_CONCURRENCY,
+    worker_prefetch_multiplier=1,
+    task_acks_late=True
+)
+
+_ai_service = None
+_redis = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    # One loop per worker process: the AI service and its pooled clients are
+    # bound to the loop they were first used on, so every task must share it
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop
+
+@worker_process_init.connect
+def _init_worker_process(**kwargs: Any) -> None:
+    # Forked children must not reuse a loop or clients created in the parent
+    global _ai_service, _redis, _loop
+    _ai_service, _redis, _loop = None, None, None
+
+@worker_process_shutdown.connect
+def _shutdown_worker_process(**kwargs: Any) -> None:
+    global _ai_service, _redis
+    if _loop is None or _loop.is_closed():
+        return
+    from app.core.http_clients import http_clients
+
+    if _ai_service is not None:
+        _loop.run_until_complete(_ai_service.close())
+        _ai_service = None
+    if _redis is not None:
+        _loop.run_until_complete(_redis.close())
+        _redis = None
+    _loop.run_until_complete(http_clients.aclose())
+    _loop.close()
+
+def _get_ai_service():
+    # Created lazily so importing this module stays cheap for the API process
+    global _ai_service
+    if _ai_service is None:
+        from app.services.ai_service import AIService
+        _ai_service = AIService()
+    return _ai_service
+
+def _get_redis():
+    global _redis
+    if _redis is None:
+        import redis.asyncio as aioredis
+        _redis = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _redis
+
+async def _generate(preferences: Dict[str, Any], job_id: str) -> Optional[Dict[str, Any]]:
+    from app.services.jobs import GENERATION_FAILED, claim_callbacks, notify_webhook
+
+    itinerary = await _get_ai_service()._generate_itinerary(TripPreferences(**preferences))
+    job = PlanJob(job_id=job_id)
+    if itinerary is None:
+        job.status, job.error = JobStatus.FAILED, GENERATION_FAILED
+    else:
+        job.status, job.result = JobStatus.SUCCEEDED, itinerary
+    # Webhooks are kept in Redis so callers deduplicated onto this job are notified too
+    await notify_webhook(job, await claim_callbacks(_get_redis(), job, settings.JOB_RESULT_TTL))
+    return itinerary.dict() if itinerary else None
+
+@celery_app.task(name="tripmate.generate_itinerary", bind=True)
+def generate_itinerary_task(self, preferences: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Generate an itinerary in a Celery worker."""
+    return _get_loop().run_until_complete(_generate(preferences, self.request.id))
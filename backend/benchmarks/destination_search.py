@@ -0,0 +1,95 @@
+"""Measure destination catalog query latency on a large synthetic catalog.
+
+Run from the backend directory:
+
+    python -m benchmarks.destination_search
+    python -m benchmarks.destination_search --size 100000 --repeat 200
+
+The bundled catalog is replicated into ``--size`` entries with generated
+names, so prefix, trigram and posting-list sizes grow as they would with
+real data. Reports build time and p50/p95/p99 per query shape, and for
+autocomplete prefixes of increasing length.
+"""
+from typing import Any, Callable, Dict, List
+import argparse
+import json
+import random
+import statistics
+import time
+
+from app.services.destination_catalog import DestinationCatalog, load_destinations
+
+SYLLABLES = ["ka", "lo", "ri", "ma", "san", "ta", "ne", "vo", "bel", "mon", "ar", "is", "po", "du", "lin", "ve", "ro", "sha"]
+
+QUERIES: Dict[str, Dict[str, Any]] = {
+    "browse": {},
+    "prefix": {"query": "par"},
+    "exact": {"query": "kyoto"},
+    "typo": {"query": "barcelna"},
+    "country": {"query": "italy"},
+    "interests": {"interests": ["beaches", "food"]},
+    "filtered": {"budgets": ["low", "medium"], "months": [7], "interests": ["culture"]},
+    "combined": {"query": "san", "budgets": ["low"], "months": [12, 1], "interests": ["nature"], "offset": 20},
+}
+
+PREFIXES = ["s", "ba", "san", "kyo", "new y"]
+
+def synthetic_catalog(size: int, seed: int = 7) -> DestinationCatalog:
+    rng = random.Random(seed)
+    base = load_destinations()
+    entries = list(base)
+    while len(entries) < size:
+        template = rng.choice(base)
+        name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        if rng.random() < 0.3:
+            name += " " + "".join(rng.choice(SYLLABLES) for _ in range(2)).capitalize()
+        entries.append(template.model_copy(update={
+            "name": name,
+            "aliases": [],
+            "popularity": rng.randint(1, 100),
+            "budget_level": rng.choice(["low", "medium", "high"]),
+        }))
+    return DestinationCatalog(entries[:size])
+
+def measure(call: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    call()
+    latencies: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - start) * 1000)
+    cuts = statistics.quantiles(latencies, n=100)
+    return {
+        "p50_ms": round(cuts[49], 3),
+        "p95_ms": round(cuts[94], 3),
+        "p99_ms": round(cuts[98], 3),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    catalog = synthetic_catalog(args.size)
+    built = time.perf_counter() - start
+    queries = {
+        name: {
+            "matches": catalog.search(**params).total,
+            **measure(lambda params=params: catalog.search(**params), args.repeat)
+        }
+        for name, params in QUERIES.items()
+    }
+    suggestions = {
+        prefix: measure(lambda prefix=prefix: catalog.suggest(prefix), args.repeat) for prefix in PREFIXES
+    }
+    print(json.dumps({
+        "entries": len(catalog),
+        "build_seconds": round(built, 2),
+        "queries": queries,
+        "autocomplete": suggestions,
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
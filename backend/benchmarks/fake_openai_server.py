@@ -0,0 +1,134 @@
+"""Minimal OpenAI-compatible server for exercising backpressure locally.
+
+Run from the backend directory and point the API at it:
+
+    python -m benchmarks.fake_openai_server --port 9000 --error-rate 0.2
+    OPENAI_BASE_URL=http://localhost:9000/v1 uvicorn main:app
+
+It serves ``/v1/chat/completions`` (plain and streamed) with a fixed
+latency, answers 429 once more than ``--max-concurrency`` requests are in
+flight, and injects random 429/500 errors at ``--error-rate``.
+"""
+from typing import Any, AsyncIterator, Dict
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import uvicorn
+
+ITINERARY = {
+    "destination": "Lisbon",
+    "duration": "3 days",
+    "daily_plans": [
+        {"day": "1", "activities": ["Alfama walk", "Tram 28"], "cost": 40.0},
+        {"day": "2", "activities": ["Belem", "LX Factory"], "cost": 55.0},
+        {"day": "3", "activities": ["Sintra day trip"], "cost": 70.0},
+    ],
+    "total_cost": {"accommodation": 240.0, "transport": 45.0, "food": 120.0, "activities": 60.0},
+    "transport_options": [{"type": "metro", "cost": 1.8, "duration": "20 min"}],
+    "accommodation_suggestions": [{"type": "guesthouse", "cost_per_night": 80.0, "description": "Central"}],
+    "food_recommendations": [{"name": "Time Out Market", "type": "food hall", "cost": "$$", "description": "Local stalls"}],
+    "hidden_gems": ["Miradouro da Graca"],
+    "tips": ["Buy a Viva Viagem card"],
+}
+
+PREFERENCES = {
+    "budget": "medium", "dates": None, "people": 2, "interests": ["food"],
+    "destination": "Lisbon", "duration": "3 days", "transport_preference": None,
+}
+
+def create_app(latency: float, error_rate: float, max_concurrency: int) -> FastAPI:
+    app = FastAPI(title="Fake OpenAI")
+    state = {"in_flight": 0, "requests": 0, "rejected": 0}
+
+    def reply_for(body: Dict[str, Any]) -> str:
+        system = body["messages"][0]["content"]
+        if "Extract travel preferences" in system:
+            return json.dumps(PREFERENCES)
+        if "travel expert" in system:
+            return json.dumps(ITINERARY)
+        return "Lisbon is a great choice! When are you planning to travel, and what is your budget?"
+
+    def error(status: int, message: str) -> JSONResponse:
+        state["rejected"] += 1
+        return JSONResponse(
+            status_code=status,
+            content={"error": {"message": message, "type": "fake_error"}},
+            headers={"retry-after": "0.2"} if status == 429 else None
+        )
+
+    @app.get("/stats")
+    async def stats() -> Dict[str, int]:
+        return state
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        state["requests"] += 1
+        if state["in_flight"] >= max_concurrency:
+            return error(429, "Too many concurrent requests")
+        if random.random() < error_rate:
+            return error(random.choice([429, 500]), "Injected failure")
+
+        content = reply_for(body)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        usage = {"prompt_tokens": 50, "completion_tokens": len(content) // 4}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+        if not body.get("stream"):
+            state["in_flight"] += 1
+            try:
+                await asyncio.sleep(latency)
+            finally:
+                state["in_flight"] -= 1
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": body["model"],
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": usage,
+            }
+
+        async def events() -> AsyncIterator[str]:
+            state["in_flight"] += 1
+            try:
+                words = content.split(" ")
+                for index, word in enumerate(words):
+                    await asyncio.sleep(latency / len(words))
+                    chunk = {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": created,
+                        "model": body["model"],
+                        "choices": [{"index": 0, "delta": {"content": word if index == 0 else " " + word}, "finish_reason": None}],
+                    }
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                yield "data: [DONE]\n\n"
+            finally:
+                state["in_flight"] -= 1
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds per completion")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests failing with 429/500")
+    parser.add_argument("--max-concurrency", type=int, default=16, help="in-flight requests before answering 429")
+    args = parser.parse_args()
+
+    app = create_app(args.latency, args.error_rate, args.max_concurrency)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
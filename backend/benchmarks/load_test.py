@@ -0,0 +1,319 @@
+"""Load-test the API against the stub LLM provider.
+
+Run from the backend directory:
+
+    python -m benchmarks.load_test --concurrency 32 --requests 500 --output report.json
+    python -m benchmarks.load_test --baseline report.json   # compare with a previous run
+
+Boots ``main:app`` with uvicorn in a subprocess (``LLM_PROVIDER=stub``, rate
+limiting off, a throwaway SQLite database) unless ``--url`` points at a
+running server. Each scenario runs at the given concurrency; while it runs
+``/health`` is probed every 50ms, so a blocking call on the event loop shows
+up as ``health_under_load`` latency even when the scenario itself looks fine.
+"""
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+PROBE_INTERVAL = 0.05
+WARMUP_REQUESTS = 5
+
+CHAT_MESSAGES = [
+    "Plan 4 days in Lisbon for 2 people on a medium budget, we love food",
+    "I want a cheap week in Bangkok with friends, 3 of us",
+    "Suggest a relaxing beach trip in Bali for 5 days",
+    "Family trip to Rome for 4 people in June, mid range budget",
+    "Where should I go for hiking and nature in September?",
+    "Luxury weekend in Paris for two, museums and wine",
+]
+
+DESTINATIONS = ["Lisbon", "Bali", "Rome", "Kyoto", "Paris", "Bangkok", "Cusco", "Reykjavik", "Marrakech", "Hanoi"]
+
+Request = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+def _plan_payload(index: int) -> Dict[str, Any]:
+    # A fixed rotation of 40 variants so cache behaviour is identical across runs
+    return {
+        "destination": DESTINATIONS[index % len(DESTINATIONS)],
+        "duration": f"{3 + index % 4} days",
+        "budget": ("low", "medium", "high")[index % 3],
+        "people": 1 + index % 4,
+    }
+
+async def chat(client: httpx.AsyncClient, index: int) -> httpx.Response:
+    return await client.post("/api/chat", json={"message": CHAT_MESSAGES[index % len(CHAT_MESSAGES)]})
+
+async def chat_stream(client: httpx.AsyncClient, index: int) -> httpx.Response:
+    async with client.stream(
+        "POST", "/api/chat/stream", json={"message": CHAT_MESSAGES[index % len(CHAT_MESSAGES)]}
+    ) as response:
+        async for _ in response.aiter_bytes():
+            pass
+    return response
+
+async def plan(client: httpx.AsyncClient, index: int) -> httpx.Response:
+    return await client.post("/api/plan", json=_plan_payload(index % 40))
+
+async def conversations(client: httpx.AsyncClient, index: int) -> httpx.Response:
+    return await client.get("/api/conversations", params={"limit": 20})
+
+TYPED_PLACES = ["lisbon", "bangkok", "kyoto", "new york", "barcelona", "cape town"]
+
+async def autocomplete(client: httpx.AsyncClient, index: int) -> httpx.Response:
+    # Replays the keystrokes of typing a place name
+    place = TYPED_PLACES[index % len(TYPED_PLACES)]
+    prefix = place[:1 + index // len(TYPED_PLACES) % len(place)]
+    return await client.get("/api/autocomplete", params={"query": prefix})
+
+def static_endpoint(path: str, params: Optional[Dict[str, str]] = None) -> Request:
+    async def request(client: httpx.AsyncClient, index: int) -> httpx.Response:
+        return await client.get(path, params=params)
+    return request
+
+SCENARIOS: Dict[str, Request] = {
+    "chat": chat,
+    "chat_stream": chat_stream,
+    "plan": plan,
+    "conversations": conversations,
+    "destinations": static_endpoint("/api/destinations"),
+    "autocomplete": autocomplete,
+    "routes": static_endpoint("/api/routes", {"from_location": "Lisbon", "to_location": "Porto"}),
+    "budget_tips": static_endpoint("/api/budget-tips"),
+    "hidden_gems": static_endpoint("/api/hidden-gems"),
+    "health": static_endpoint("/health"),
+}
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    values = sorted(latency * 1000 for latency in latencies)
+    return {
+        "p50": round(percentile(values, 0.50), 3),
+        "p95": round(percentile(values, 0.95), 3),
+        "p99": round(percentile(values, 0.99), 3),
+        "mean": round(sum(values) / len(values), 3) if values else 0.0,
+        "max": round(values[-1], 3) if values else 0.0,
+    }
+
+async def _probe_health(client: httpx.AsyncClient, stop: asyncio.Event, latencies: List[float]) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            await client.get("/health")
+            latencies.append(time.perf_counter() - start)
+        except httpx.HTTPError:
+            pass
+        try:
+            await asyncio.wait_for(stop.wait(), PROBE_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+async def run_scenario(base_url: str, request: Request, concurrency: int, total: int) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=concurrency + 1, max_keepalive_connections=concurrency + 1)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0, limits=limits) as client:
+        for index in range(WARMUP_REQUESTS):
+            await request(client, index)
+
+        counter = itertools.count()
+        latencies: List[float] = []
+        errors: Dict[str, int] = {}
+
+        async def worker() -> None:
+            while (index := next(counter)) < total:
+                start = time.perf_counter()
+                try:
+                    response = await request(client, index)
+                    status = response.status_code
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                elapsed = time.perf_counter() - start
+                if status == 200:
+                    latencies.append(elapsed)
+                else:
+                    errors[str(status)] = errors.get(str(status), 0) + 1
+
+        stop = asyncio.Event()
+        probe_latencies: List[float] = []
+        async with httpx.AsyncClient(base_url=base_url, timeout=30.0) as probe_client:
+            probe = asyncio.create_task(_probe_health(probe_client, stop, probe_latencies))
+            start = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - start
+            stop.set()
+            await probe
+
+    return {
+        "requests": total,
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": summarize(latencies),
+        "health_under_load_ms": summarize(probe_latencies),
+    }
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(port: int, profile: str, store: str, data_dir: str) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "LLM_PROVIDER": "stub",
+        "LLM_STUB_PROFILE": profile,
+        "CONVERSATION_STORE": store,
+        "DATABASE_URL": f"sqlite:///{data_dir}/load_test.db",
+        "JOB_BACKEND": "inprocess",
+        "RATE_LIMIT_PER_MINUTE": "0",
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env
+    )
+
+async def wait_until_ready(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/ready")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"Server at {base_url} did not become ready in {timeout}s")
+
+async def seed_conversations(base_url: str, count: int) -> None:
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0) as client:
+        for index in range(count):
+            await chat(client, index)
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Print per-scenario changes; return the scenarios that regressed."""
+    regressions = []
+    print(f"\n{'scenario':<16}{'p50':>20}{'p99':>20}{'rps':>20}")
+    for name, result in report["scenarios"].items():
+        old = baseline.get("scenarios", {}).get(name)
+        if not old:
+            continue
+
+        def change(new_value: float, old_value: float) -> float:
+            return (new_value - old_value) / old_value if old_value else 0.0
+
+        p50 = change(result["latency_ms"]["p50"], old["latency_ms"]["p50"])
+        p99 = change(result["latency_ms"]["p99"], old["latency_ms"]["p99"])
+        rps = change(result["rps"], old["rps"])
+        print(
+            f"{name:<16}"
+            f"{result['latency_ms']['p50']:>11.1f}ms {p50:+6.0%}"
+            f"{result['latency_ms']['p99']:>11.1f}ms {p99:+6.0%}"
+            f"{result['rps']:>13.1f} {rps:+6.0%}"
+        )
+        if p99 > threshold or rps < -threshold:
+            regressions.append(name)
+    return regressions
+
+def print_report(report: Dict[str, Any]) -> None:
+    meta = report["meta"]
+    print(f"commit={meta['commit']} concurrency={meta['concurrency']} profile={meta['profile']}")
+    print(f"{'scenario':<16}{'rps':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'health p99':>12}  errors")
+    for name, result in report["scenarios"].items():
+        latency = result["latency_ms"]
+        print(
+            f"{name:<16}{result['rps']:>10.1f}{latency['p50']:>10.1f}{latency['p95']:>10.1f}"
+            f"{latency['p99']:>10.1f}{result['health_under_load_ms']['p99']:>12.1f}  {result['errors'] or ''}"
+        )
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="benchmark a running server instead of booting one")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated scenario names")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--profile", default="fast", help="stub LLM latency profile")
+    parser.add_argument("--store", default="sql", choices=["sql", "memory"], help="conversation store")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative p99/rps change counted as a regression")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    server = None
+    data_dir = tempfile.TemporaryDirectory()
+    base_url = args.url
+    try:
+        if base_url is None:
+            port = _free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            server = start_server(port, args.profile, args.store, data_dir.name)
+        await wait_until_ready(base_url)
+        if "conversations" in names:
+            await seed_conversations(base_url, 50)
+
+        scenarios = {}
+        for name in names:
+            scenarios[name] = await run_scenario(base_url, SCENARIOS[name], args.concurrency, args.requests)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+        data_dir.cleanup()
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "profile": args.profile if args.url is None else None,
+            "store": args.store if args.url is None else None,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "scenarios": scenarios,
+    }
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            print(f"\nRegressed beyond {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
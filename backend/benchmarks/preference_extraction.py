@@ -0,0 +1,143 @@
+"""Compare the rule-based preference extractor with the LLM extractor.
+
+Run from the backend directory:
+
+    python -m benchmarks.preference_extraction
+    python -m benchmarks.preference_extraction --llm   # also calls OpenAI
+
+Field accuracy is measured against ``fixtures/preference_corpus.json``.
+The rules report also shows how often their confidence clears
+``PREFERENCE_CONFIDENCE_THRESHOLD`` and which of those confident results
+were wrong; those are the messages that skip the LLM fallback but should not.
+"""
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from app.core.config import settings
+from app.models.chat import TripPreferences
+from app.services.preference_extractor import RuleBasedPreferenceExtractor
+
+CORPUS_PATH = Path(__file__).resolve().parent / "fixtures" / "preference_corpus.json"
+FIELDS = list(TripPreferences.model_fields)
+
+def _normalize(field: str, value: Any) -> Any:
+    if value is None:
+        return None
+    if field == "interests":
+        return frozenset(str(v).lower() for v in value) or None
+    if isinstance(value, str):
+        return " ".join(value.lower().split())
+    return value
+
+def score(results: List[TripPreferences], corpus: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """Per-field precision and recall, plus exact-match accuracy per message."""
+    scores = {}
+    for field in FIELDS:
+        true_pos = false_pos = false_neg = 0
+        for preferences, case in zip(results, corpus):
+            expected = _normalize(field, case["expected"].get(field))
+            actual = _normalize(field, getattr(preferences, field))
+            if actual is not None and actual == expected:
+                true_pos += 1
+            else:
+                if actual is not None:
+                    false_pos += 1
+                if expected is not None:
+                    false_neg += 1
+        scores[field] = {
+            "precision": true_pos / (true_pos + false_pos) if true_pos + false_pos else 1.0,
+            "recall": true_pos / (true_pos + false_neg) if true_pos + false_neg else 1.0,
+        }
+    exact = sum(
+        all(_normalize(f, getattr(p, f)) == _normalize(f, c["expected"].get(f)) for f in FIELDS)
+        for p, c in zip(results, corpus)
+    )
+    scores["messages"] = {"exact_match": exact / len(corpus)}
+    return scores
+
+def gate(extractor: RuleBasedPreferenceExtractor, corpus: List[Dict[str, Any]], threshold: float) -> Dict[str, Any]:
+    """Share of messages the rules answer alone, and the ones they get wrong."""
+    confident, errors = 0, []
+    for case in corpus:
+        result = extractor.extract(case["message"])
+        if result.confidence < threshold:
+            continue
+        confident += 1
+        if any(
+            _normalize(f, getattr(result.preferences, f)) != _normalize(f, case["expected"].get(f)) for f in FIELDS
+        ):
+            errors.append({"message": case["message"], "confidence": result.confidence})
+    return {"threshold": threshold, "confident": confident / len(corpus), "confident_errors": errors}
+
+async def run(name: str, extract: Callable[[str], Awaitable[TripPreferences]], corpus: List[Dict[str, Any]]) -> Dict[str, Any]:
+    results, latencies = [], []
+    for case in corpus:
+        start = time.perf_counter()
+        results.append(await extract(case["message"]))
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {
+        "name": name,
+        "latency_ms": {
+            "p50": statistics.median(latencies),
+            "p95": latencies[int(0.95 * (len(latencies) - 1))],
+            "total": sum(latencies),
+        },
+        "accuracy": score(results, corpus),
+    }
+
+def print_report(report: Dict[str, Any]) -> None:
+    latency = report["latency_ms"]
+    print(f"\n== {report['name']} ==")
+    print(f"latency p50={latency['p50']:.3f}ms p95={latency['p95']:.3f}ms total={latency['total']:.1f}ms")
+    print(f"{'field':<22}{'precision':>10}{'recall':>10}")
+    for field in FIELDS:
+        accuracy = report["accuracy"][field]
+        print(f"{field:<22}{accuracy['precision']:>10.2f}{accuracy['recall']:>10.2f}")
+    print(f"exact match: {report['accuracy']['messages']['exact_match']:.2f}")
+    if "gate" in report:
+        gated = report["gate"]
+        print(f"confidence >= {gated['threshold']}: {gated['confident']:.2f} of messages, "
+              f"{len(gated['confident_errors'])} wrong")
+        for error in gated["confident_errors"]:
+            print(f"  {error['confidence']:.2f}  {error['message']}")
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--llm", action="store_true", help="also benchmark the OpenAI extractor")
+    parser.add_argument("--json", action="store_true", help="print a machine-readable report")
+    args = parser.parse_args()
+
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        corpus = json.load(f)
+
+    extractor = RuleBasedPreferenceExtractor()
+
+    async def extract_rules(message: str) -> TripPreferences:
+        return extractor.extract(message).preferences
+
+    reports = [await run("rules", extract_rules, corpus)]
+    reports[0]["gate"] = gate(extractor, corpus, settings.PREFERENCE_CONFIDENCE_THRESHOLD)
+
+    if args.llm:
+        from app.services.ai_service import AIService
+        service = AIService()
+
+        async def extract_llm(message: str) -> TripPreferences:
+            return await service._extract_preferences_with_llm(message, bypass_cache=True)
+
+        reports.append(await run("llm", extract_llm, corpus))
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        for report in reports:
+            print_report(report)
+
+if __name__ == "__main__":
+    asyncio.run(main())
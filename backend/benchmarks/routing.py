@@ -0,0 +1,127 @@
+"""Measure route engine latency on a large synthetic transport graph.
+
+Run from the backend directory:
+
+    python -m benchmarks.routing
+    python -m benchmarks.routing --side 400 --pairs 50   # 160k nodes
+
+Nodes sit on a jittered lat/lon grid. Neighbouring cells are linked by bus,
+and by train on most links; one node in ``--airport-every`` is an airport
+with flights to nearby airports. Durations and costs follow distance like
+the bundled links. Reports graph size and, per objective, latency for cold
+queries and for repeats served from the memo cache.
+"""
+from typing import Any, Dict, List, Tuple
+import argparse
+import json
+import statistics
+import time
+
+import numpy as np
+
+from app.services.routing import MODES, RouteEngine, TransportGraph, haversine_km
+
+def synthetic_graph(side: int, airport_every: int = 100, seed: int = 7) -> TransportGraph:
+    rng = np.random.default_rng(seed)
+    rows, cols = np.divmod(np.arange(side * side), side)
+    lat = -40 + 100 * (rows + rng.uniform(0.1, 0.9, rows.size)) / side
+    lon = -100 + 240 * (cols + rng.uniform(0.1, 0.9, cols.size)) / side
+
+    # Ground links to the right, down and diagonal neighbours
+    sources, targets = [], []
+    for d_row, d_col in ((0, 1), (1, 0), (1, 1)):
+        ok = (rows + d_row < side) & (cols + d_col < side)
+        node = np.flatnonzero(ok)
+        sources.append(node)
+        targets.append(node + d_row * side + d_col)
+    ground_a, ground_b = np.concatenate(sources), np.concatenate(targets)
+    road_km = 1.25 * haversine_km(lat[ground_a], lon[ground_a], lat[ground_b], lon[ground_b])
+    rail = rng.random(ground_a.size) < 0.6
+
+    # Flights between airports within ~12 cells of each other
+    airports = rng.choice(side * side, side * side // airport_every, replace=False)
+    flight_a, flight_b = [], []
+    for airport in airports:
+        others = rng.choice(airports, 6, replace=False)
+        near = np.abs(rows[others] - rows[airport]) + np.abs(cols[others] - cols[airport]) <= 24
+        others = others[near & (others != airport)]
+        flight_a.extend([airport] * len(others))
+        flight_b.extend(others)
+    flight_a, flight_b = np.array(flight_a, dtype=np.int64), np.array(flight_b, dtype=np.int64)
+    air_km = haversine_km(lat[flight_a], lon[flight_a], lat[flight_b], lon[flight_b])
+
+    links = [
+        (ground_a, ground_b, MODES.index("bus"), road_km / 55 * 60 + 10, 2 + 0.04 * road_km),
+        (ground_a[rail], ground_b[rail], MODES.index("train"), road_km[rail] / 85 * 60 + 20, 4 + 0.07 * road_km[rail]),
+        (flight_a, flight_b, MODES.index("flight"), 75 + air_km / 780 * 60, 45 + 0.085 * air_km),
+    ]
+    columns: List[List[np.ndarray]] = [[], [], [], [], []]
+    for a, b, mode, duration, cost in links:
+        for source, target in ((a, b), (b, a)):
+            columns[0].append(source)
+            columns[1].append(target)
+            columns[2].append(np.full(source.size, mode))
+            columns[3].append(duration)
+            columns[4].append(cost)
+    sources, targets, modes, durations, costs = (np.concatenate(column) for column in columns)
+    return TransportGraph(
+        names=[f"node-{i}" for i in range(side * side)],
+        lat=lat, lon=lon,
+        sources=sources, targets=targets, modes=modes, durations=durations, costs=costs
+    )
+
+def random_pairs(graph: TransportGraph, side: int, count: int, max_cells: int, seed: int = 11) -> List[Tuple[int, int]]:
+    rng = np.random.default_rng(seed)
+    pairs = []
+    while len(pairs) < count:
+        source = int(rng.integers(len(graph)))
+        row, col = divmod(source, side)
+        d_row, d_col = rng.integers(-max_cells, max_cells + 1, 2)
+        if 0 <= row + d_row < side and 0 <= col + d_col < side and (d_row or d_col):
+            pairs.append((source, int((row + d_row) * side + col + d_col)))
+    return pairs
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    latencies = sorted(latencies)
+    return {
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))], 2),
+        "max_ms": round(latencies[-1], 2),
+    }
+
+def measure(engine: RouteEngine, pairs: List[Tuple[int, int]], objective: str) -> Dict[str, Any]:
+    cold, cached = [], []
+    found = 0
+    for source, target in pairs:
+        for latencies in (cold, cached):
+            start = time.perf_counter()
+            plans = engine.routes(source, target, objective)
+            latencies.append((time.perf_counter() - start) * 1000)
+        found += bool(plans)
+    return {"found": found, "cold": summarize(cold), "cached": summarize(cached)}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--side", type=int, default=320, help="grid side; nodes = side * side")
+    parser.add_argument("--airport-every", type=int, default=100)
+    parser.add_argument("--pairs", type=int, default=30)
+    parser.add_argument("--max-cells", type=int, default=20, help="how far apart query endpoints may be")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    graph = synthetic_graph(args.side, args.airport_every)
+    built = time.perf_counter() - start
+    pairs = random_pairs(graph, args.side, args.pairs, args.max_cells)
+    report = {
+        "nodes": len(graph),
+        "edges": graph.edge_count,
+        "graph_mb": round(graph.nbytes / 1e6, 1),
+        "build_seconds": round(built, 2),
+        "objectives": {},
+    }
+    for objective in ("fastest", "cheapest", "all"):
+        report["objectives"][objective] = measure(RouteEngine(graph), pairs, objective)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
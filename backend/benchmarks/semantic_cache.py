@@ -0,0 +1,176 @@
+"""Measure the semantic cache's hit rate and false-hit rate offline.
+
+Run from the backend directory:
+
+    python -m benchmarks.semantic_cache
+    python -m benchmarks.semantic_cache --thresholds 0.8 0.85 0.9 0.95
+
+Synthetic questions are built from intents (weather, visas, food, ...),
+each phrased several ways, about a set of destinations. The cache is warmed
+with the first phrasing of some intents; every other phrasing is then looked
+up. A hit on the same intent is a true hit, a hit on another intent is a
+false hit. Intents that were never warmed only produce false hits.
+"""
+from typing import Any, Dict, List, Tuple
+import argparse
+import json
+import time
+
+from app.services.preference_extractor import RuleBasedPreferenceExtractor
+from app.services.semantic_cache import SemanticCache
+
+INTENTS = {
+    "weather": [
+        "What's the weather like in {place}?",
+        "How is the weather in {place}?",
+        "what is the weather in {place} like",
+        "Weather in {place}?",
+    ],
+    "visa": [
+        "Do I need a visa for {place}?",
+        "Is a visa required to visit {place}?",
+        "do i need visa to go to {place}",
+        "Visa requirements for {place}?",
+    ],
+    "food": [
+        "What food should I try in {place}?",
+        "What local food to eat in {place}?",
+        "Best local dishes to try in {place}?",
+        "what should i eat in {place}",
+    ],
+    "safety": [
+        "Is {place} safe for tourists?",
+        "Is it safe to travel to {place}?",
+        "how safe is {place} for tourists",
+        "Is {place} safe?",
+    ],
+    "best_time": [
+        "When is the best time to visit {place}?",
+        "What's the best season to visit {place}?",
+        "best time of year to go to {place}",
+        "When should I visit {place}?",
+    ],
+    "packing": [
+        "What should I pack for {place}?",
+        "Packing list for {place}?",
+        "what to pack for a trip to {place}",
+        "What clothes should I pack for {place}?",
+    ],
+    "getting_around": [
+        "How do I get around in {place}?",
+        "What's the best way to get around {place}?",
+        "getting around {place}",
+        "How to get around {place} as a tourist?",
+    ],
+    "currency": [
+        "What currency do they use in {place}?",
+        "Which currency should I bring to {place}?",
+        "currency used in {place}",
+        "What money do they use in {place}?",
+    ],
+    "language": [
+        "What language do they speak in {place}?",
+        "Which language is spoken in {place}?",
+        "do people speak english in {place}",
+        "language spoken in {place}",
+    ],
+    "tipping": [
+        "Should I tip in {place}?",
+        "How much should I tip in {place}?",
+        "tipping customs in {place}",
+        "Is tipping expected in {place}?",
+    ],
+    "plan": [
+        "Plan a 5 day trip to {place} for 2",
+        "I want to visit {place} for 5 days with my partner",
+        "5 days in {place} for two people",
+        "Help me plan 5 days in {place} for 2",
+    ],
+    "cost": [
+        "Is {place} expensive?",
+        "How expensive is {place}?",
+        "how much does it cost to visit {place}",
+        "Is {place} expensive for tourists?",
+    ],
+    "kids": [
+        "Is {place} good for kids?",
+        "Is {place} kid friendly?",
+        "things to do with kids in {place}",
+        "Is {place} safe for children?",
+    ],
+    "day_trips": [
+        "What day trips can I take from {place}?",
+        "Best day trips from {place}?",
+        "day trip ideas from {place}",
+        "Good excursions near {place}?",
+    ],
+}
+DESTINATIONS = [
+    "Paris", "Tokyo", "Bali", "Rome", "Barcelona", "Lisbon", "Bangkok", "New York",
+    "Cape Town", "Sydney", "Istanbul", "Prague", "Marrakech", "Reykjavik", "Kyoto", "Mexico City",
+]
+# Intents never warmed; any hit for them is a false hit
+HELD_OUT = {"tipping", "day_trips", "language"}
+
+def build_cases(extractor: RuleBasedPreferenceExtractor) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """(warm, query) cases with their semantic cache key and text."""
+    warm, query = [], []
+    for place in DESTINATIONS:
+        for intent, phrasings in INTENTS.items():
+            for index, template in enumerate(phrasings):
+                message = template.format(place=place)
+                preferences = extractor.extract(message).preferences
+                case = {
+                    "intent": intent,
+                    "message": message,
+                    "key": json.dumps(preferences.model_dump(), sort_keys=True),
+                    "text": extractor.residual(message),
+                }
+                if index == 0 and intent not in HELD_OUT:
+                    warm.append(case)
+                elif index > 0:
+                    query.append(case)
+    return warm, query
+
+def evaluate(threshold: float, warm: List[Dict[str, Any]], query: List[Dict[str, Any]]) -> Dict[str, Any]:
+    cache = SemanticCache(threshold=threshold, ttls={"chat": 3600})
+    for case in warm:
+        cache.set("chat", case["key"], case["text"], case["intent"])
+    seen = [case for case in query if case["intent"] not in HELD_OUT]
+    true_hits = false_hits = held_out_hits = 0
+    latencies = []
+    for case in query:
+        start = time.perf_counter()
+        served = cache.get("chat", case["key"], case["text"])
+        latencies.append((time.perf_counter() - start) * 1000)
+        if served is None:
+            continue
+        if served == case["intent"]:
+            true_hits += 1
+        elif case["intent"] in HELD_OUT:
+            held_out_hits += 1
+        else:
+            false_hits += 1
+    hits = true_hits + false_hits + held_out_hits
+    latencies.sort()
+    return {
+        "threshold": threshold,
+        "queries": len(query),
+        "hit_rate": true_hits / len(seen),
+        "false_hit_rate": (false_hits + held_out_hits) / hits if hits else 0.0,
+        "held_out_false_hits": held_out_hits / (len(query) - len(seen)),
+        "lookup_ms": {"p50": latencies[len(latencies) // 2], "p99": latencies[int(0.99 * (len(latencies) - 1))]},
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.7, 0.75, 0.8, 0.85, 0.9, 0.95])
+    args = parser.parse_args()
+
+    extractor = RuleBasedPreferenceExtractor()
+    warm, query = build_cases(extractor)
+    report = [evaluate(threshold, warm, query) for threshold in args.thresholds]
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
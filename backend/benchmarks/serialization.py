@@ -0,0 +1,135 @@
+"""Compare per-response CPU time of the old and new chat response hand-off.
+
+Run from the backend directory:
+
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --days 30 --iterations 500
+
+"before" replays the old path: models are dumped to dicts in the service,
+revalidated into a dict-typed ``ChatResponse`` and serialized by FastAPI's
+``serialize_response`` and the stdlib encoder. "after" builds the response
+from the validated models and renders it with ``ModelJSONResponse``.
+"""
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from pydantic import BaseModel
+
+from app.core.responses import ModelJSONResponse
+from app.models.chat import ChatResponse, TripItinerary, TripPreferences
+from app.services.cost_model import CostModel
+
+class LegacyChatResponse(BaseModel):
+    """``ChatResponse`` as it was, with the itinerary and estimate as dicts."""
+    message: str
+    conversation_id: str
+    suggestions: Optional[List[str]] = None
+    itinerary: Optional[Dict[str, Any]] = None
+    cost_estimate: Optional[Dict[str, Any]] = None
+    next_questions: Optional[List[str]] = None
+    preferences: Optional[TripPreferences] = None
+
+LEGACY_FIELD = create_response_field("Response_chat", LegacyChatResponse)
+
+def build_result(days: int) -> Dict[str, Any]:
+    """A chat turn's results as the service returns them, with a ``days``-day itinerary."""
+    preferences = TripPreferences(
+        budget="medium", people=2, interests=["food", "culture"], destination="Paris", duration=f"{days} days"
+    )
+    daily_plans = []
+    for day in range(1, days + 1):
+        activities = [f"Visit attraction {day}-{n} and explore the surrounding neighbourhood" for n in range(8)]
+        daily_plans.append({
+            "day": f"Day {day}",
+            "activities": activities,
+            "cost": 120.5,
+            "schedule": [
+                {"activity": activity, "start": "09:00", "end": "10:30", "travel_minutes": 12}
+                for activity in activities
+            ],
+            "travel_minutes": 96,
+        })
+    itinerary = TripItinerary(
+        destination="Paris",
+        duration=f"{days} days",
+        daily_plans=daily_plans,
+        total_cost={"accommodation": 1400.0, "food": 700.0, "transport": 300.0, "activities": 450.0},
+        transport_options=[{"type": "metro", "cost": 2.1, "duration": "20 minutes"}] * 5,
+        accommodation_suggestions=[{"type": "hotel", "cost_per_night": 140.0, "description": "Central hotel"}] * 5,
+        food_recommendations=[{"name": "Bistro", "type": "French", "cost": "$$", "description": "Classic bistro"}] * 10,
+        hidden_gems=[f"Hidden gem {n}" for n in range(10)],
+        tips=[f"Tip {n}" for n in range(10)],
+    )
+    return {
+        "message": "Here is a plan for your trip to Paris. " * 20,
+        "clarifying_questions": ["What dates are you travelling?"],
+        "itinerary": itinerary,
+        "cost_estimate": CostModel.load().estimate("Paris", days, 2, "medium"),
+        "preferences": preferences,
+        "preferences_delta": preferences,
+    }
+
+async def before(result: Dict[str, Any]) -> bytes:
+    data = {
+        **result,
+        "itinerary": result["itinerary"].model_dump(),
+        "cost_estimate": result["cost_estimate"].model_dump(),
+        "preferences": result["preferences"].model_dump(),
+        "preferences_delta": result["preferences_delta"].model_dump(exclude_none=True),
+    }
+    TripPreferences(**data["preferences_delta"])
+    response = LegacyChatResponse(
+        message=data["message"],
+        conversation_id="benchmark",
+        suggestions=data["clarifying_questions"],
+        itinerary=data["itinerary"],
+        cost_estimate=data["cost_estimate"],
+        next_questions=data["clarifying_questions"],
+        preferences=data["preferences"],
+    )
+    content = await serialize_response(field=LEGACY_FIELD, response_content=response)
+    return JSONResponse(content).body
+
+async def after(result: Dict[str, Any]) -> bytes:
+    response = ChatResponse(
+        message=result["message"],
+        conversation_id="benchmark",
+        suggestions=result["clarifying_questions"],
+        itinerary=result["itinerary"],
+        cost_estimate=result["cost_estimate"],
+        next_questions=result["clarifying_questions"],
+        preferences=result["preferences"],
+    )
+    return ModelJSONResponse(response).body
+
+async def measure(render: Callable[[Dict[str, Any]], Any], result: Dict[str, Any], iterations: int) -> Dict[str, Any]:
+    body = await render(result)
+    timings = []
+    for _ in range(iterations):
+        start = time.process_time()
+        await render(result)
+        timings.append((time.process_time() - start) * 1000)
+    return {"cpu_ms": {"mean": statistics.mean(timings), "p50": statistics.median(timings)}, "bytes": len(body), "body": body}
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=14, help="itinerary length")
+    parser.add_argument("--iterations", type=int, default=300)
+    args = parser.parse_args()
+
+    result = build_result(args.days)
+    report = {name: await measure(render, result, args.iterations) for name, render in (("before", before), ("after", after))}
+    same = json.loads(report["before"].pop("body")) == json.loads(report["after"].pop("body"))
+    report["same_json"] = same
+    report["speedup"] = report["before"]["cpu_ms"]["mean"] / report["after"]["cpu_ms"]["mean"]
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+"""Measure cold start: time from launching the server until it is ready.
+
+Run from the backend directory:
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --runs 5 --workers 2 --target 3.0
+
+Each run launches ``serve.py`` with the stub LLM and a throwaway SQLite
+database and polls ``/health`` (accepting connections) and ``/ready``
+(storage initialized and warm-up finished). The in-process phases reported
+by ``/ready`` are included. Exits non-zero if the slowest run misses
+``--target`` seconds, so it can gate deploys that autoscale on cold starts.
+"""
+from typing import Any, Dict, List, Optional
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.load_test import BACKEND_DIR, _free_port
+
+POLL_INTERVAL = 0.01
+
+def measure(workers: int, timeout: float) -> Dict[str, Any]:
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as data_dir:
+        env = {
+            **os.environ,
+            "LLM_PROVIDER": "stub",
+            "DATABASE_URL": f"sqlite:///{data_dir}/startup.db",
+            "JOB_BACKEND": "inprocess",
+            "RATE_LIMIT_PER_MINUTE": "0",
+        }
+        start = time.perf_counter()
+        server = subprocess.Popen(
+            [sys.executable, "serve.py", "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+            cwd=BACKEND_DIR,
+            env=env
+        )
+        try:
+            result: Dict[str, Optional[Any]] = {"health_s": None, "ready_s": None, "phases": None}
+            with httpx.Client(base_url=base_url, timeout=1.0) as client:
+                while time.perf_counter() - start < timeout:
+                    try:
+                        if result["health_s"] is None and client.get("/health").status_code == 200:
+                            result["health_s"] = time.perf_counter() - start
+                        response = client.get("/ready")
+                        if response.status_code == 200:
+                            result["ready_s"] = time.perf_counter() - start
+                            result["phases"] = response.json()["startup_seconds"]
+                            return result
+                    except httpx.HTTPError:
+                        pass
+                    time.sleep(POLL_INTERVAL)
+            raise RuntimeError(f"Server did not become ready in {timeout}s")
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--target", type=float, default=5.0, help="maximum seconds until ready")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    runs: List[Dict[str, Any]] = [measure(args.workers, args.timeout) for _ in range(args.runs)]
+    ready = [run["ready_s"] for run in runs]
+    report = {
+        "workers": args.workers,
+        "target_s": args.target,
+        "health_s": {"median": statistics.median(run["health_s"] for run in runs), "max": max(run["health_s"] for run in runs)},
+        "ready_s": {"median": statistics.median(ready), "max": max(ready)},
+        "phases": runs[-1]["phases"],
+        "within_target": max(ready) <= args.target,
+    }
+    print(json.dumps(report, indent=2))
+    return 0 if report["within_target"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
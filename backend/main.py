@@ -1,17 +1,107 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-import uvicorn
+import time
 
-from app.api.routes import api_router
-from app.core.config import settings
+# Taken before the app is imported so the startup phases cover the imports
+STARTED = time.perf_counter()
+
+from contextlib import asynccontextmanager  # noqa: E402
+import asyncio  # noqa: E402
+import os  # noqa: E402
+from pathlib import Path  # noqa: E402
+from typing import AsyncIterator  # noqa: E402
+
+from fastapi import FastAPI, Response  # noqa: E402
+from fastapi.middleware.cors import CORSMiddleware  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.staticfiles import StaticFiles  # noqa: E402
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest  # noqa: E402
+from prometheus_client import multiprocess  # noqa: E402
+import httpx  # noqa: E402
+
+from app.api.routes import ai_service, api_router, conversation_store, job_queue  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.http_cache import ResponseCacheMiddleware  # noqa: E402
+from app.core.http_clients import http_clients  # noqa: E402
+from app.core.metrics import CONVERSATIONS_STORED, MetricsMiddleware, ServiceCollector  # noqa: E402
+from app.core.rate_limit import RateLimitMiddleware  # noqa: E402
+from app.core.startup import Readiness  # noqa: E402
+from app.core.tracing import configure_tracing  # noqa: E402
+
+STATIC_DIR = Path(__file__).resolve().parent / "static"
+# Cacheable responses rendered during warm-up, so the first visitors get cache hits
+WARMUP_PATHS = (
+    "/api/destinations",
+    "/api/budget-tips",
+    "/api/hidden-gems",
+    "/api/routes?from_location=Lisbon&to_location=Porto",
+)
+
+readiness = Readiness(STARTED)
+
+# Set by serve.py when running several workers; each writes its metrics
+# there and a scrape of any worker aggregates them all
+MULTIPROCESS_METRICS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+if MULTIPROCESS_METRICS:
+    METRICS_REGISTRY = CollectorRegistry()
+    multiprocess.MultiProcessCollector(METRICS_REGISTRY)
+else:
+    METRICS_REGISTRY = REGISTRY
+
+async def prime_responses() -> None:
+    """Render the warm-up paths through the full middleware stack."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://warmup") as client:
+        for path in WARMUP_PATHS:
+            (await client.get(path)).raise_for_status()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    readiness.record("import", time.perf_counter() - STARTED)
+    await conversation_store.init()
+    warmup = None
+    if settings.STARTUP_WARMUP_ENABLED:
+        warmup = readiness.start({
+            "llm_client": ai_service.provider.warm_up,
+            "responses": prime_responses
+        })
+    readiness.serving()
+    try:
+        yield
+    finally:
+        if warmup is not None:
+            warmup.cancel()
+            await asyncio.gather(warmup, return_exceptions=True)
+        await job_queue.close()
+        await conversation_store.close()
+        await ai_service.close()
+        await http_clients.aclose()
+        if MULTIPROCESS_METRICS:
+            multiprocess.mark_process_dead(os.getpid())
 
 app = FastAPI(
     title="TripMate API",
     description="AI-powered travel planning assistant",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
+)
+
+# Cached catalog responses with ETags and gzip/brotli; innermost so rate
+# limiting and metrics still see every request
+app.add_middleware(
+    ResponseCacheMiddleware,
+    paths=settings.HTTP_CACHE_PATHS,
+    max_entries=settings.HTTP_CACHE_MAX_ENTRIES,
+    min_compress_size=settings.HTTP_CACHE_MIN_COMPRESS_SIZE,
+    enabled=settings.HTTP_CACHE_ENABLED
+)
+
+# Per-client rate limiting (added before CORS so CORS headers wrap its 429s)
+app.add_middleware(
+    RateLimitMiddleware,
+    per_minute=settings.RATE_LIMIT_PER_MINUTE,
+    burst=settings.RATE_LIMIT_BURST or None,
+    exempt_paths=("/api/autocomplete",)
 )
 
 # CORS middleware
@@ -23,11 +113,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency per route; outermost so rate-limited requests are counted too
+app.add_middleware(MetricsMiddleware)
+# Service counters live in each process, so with several workers they are the scraped worker's own
+METRICS_REGISTRY.register(ServiceCollector(ai_service))
+configure_tracing(settings, app)
+
 # Include API routes
 app.include_router(api_router, prefix="/api")
 
-# Mount static files
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Mount static files if the directory was deployed
+if STATIC_DIR.is_dir():
+    app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
 @app.get("/")
 async def root():
@@ -39,13 +136,20 @@ async def root():
 
 @app.get("/health")
 async def health_check():
+    """Liveness: the process is up and serving."""
     return {"status": "healthy"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: storage is initialized and warm-up has finished; 503 until then."""
+    return JSONResponse(status_code=200 if readiness.ready else 503, content=readiness.status())
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics."""
+    CONVERSATIONS_STORED.set(await conversation_store.count())
+    return Response(generate_latest(METRICS_REGISTRY), media_type=CONTENT_TYPE_LATEST)
+
 if __name__ == "__main__":
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info"
-    )
+    import serve
+    serve.main()
@@ -0,0 +1,89 @@
+"""Run the API with production server settings.
+
+    python serve.py                          # SERVER_* settings, one worker by default
+    python serve.py --workers 4 --port 8080  # needs JOB_BACKEND=celery
+    python serve.py --reload                 # development: one worker, reload on changes
+
+Workers are separate processes, each with its own caches and connection
+pools, so several workers need state that lives outside the process: jobs
+in Celery and conversations in SQL. Prometheus metrics are then written to
+``PROMETHEUS_MULTIPROC_DIR`` and aggregated on scrape. uvloop and httptools
+are used when installed (``uvicorn[standard]``).
+"""
+from pathlib import Path
+from typing import List, Optional
+import argparse
+import importlib.util
+import logging
+import os
+import tempfile
+
+import uvicorn
+
+from app.core.config import settings
+
+BACKEND_DIR = Path(__file__).resolve().parent
+
+logger = logging.getLogger(__name__)
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+def _multiworker_problems() -> List[str]:
+    problems = []
+    if settings.JOB_BACKEND != "celery":
+        problems.append("JOB_BACKEND=celery (in-process jobs can only be polled on the worker that queued them)")
+    if settings.CONVERSATION_STORE == "memory":
+        problems.append("CONVERSATION_STORE=sql (in-memory conversations are per worker)")
+    return problems
+
+def _prepare_multiprocess_metrics() -> str:
+    """Point every worker at one empty Prometheus metrics directory."""
+    path = Path(os.environ.get("PROMETHEUS_MULTIPROC_DIR") or tempfile.mkdtemp(prefix="tripmate-metrics-"))
+    path.mkdir(parents=True, exist_ok=True)
+    # Files left by a previous run would be counted again
+    for stale in path.glob("*.db"):
+        stale.unlink()
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = str(path)
+    return str(path)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=settings.SERVER_WORKERS, help="0 means one per CPU; more than one needs Celery jobs")
+    parser.add_argument("--reload", action="store_true", help="development mode")
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--access-log", action="store_true", help="log every request")
+    args = parser.parse_args(argv)
+
+    workers = 1 if args.reload else args.workers or os.cpu_count() or 1
+    if workers > 1:
+        problems = _multiworker_problems()
+        if problems:
+            parser.error(f"{workers} workers need " + " and ".join(problems))
+    loop = "uvloop" if _installed("uvloop") else "asyncio"
+    http = "httptools" if _installed("httptools") else "h11"
+    logging.basicConfig(level=args.log_level.upper())
+    if workers > 1:
+        logger.info(f"Aggregating Prometheus metrics in {_prepare_multiprocess_metrics()}")
+    logger.info(f"Starting {workers} worker(s) on {args.host}:{args.port} with {loop}/{http}")
+    uvicorn.run(
+        "main:app",
+        app_dir=str(BACKEND_DIR),
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        reload=args.reload,
+        loop=loop,
+        http=http,
+        timeout_keep_alive=settings.SERVER_KEEPALIVE_TIMEOUT,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_TIMEOUT,
+        backlog=settings.SERVER_BACKLOG,
+        proxy_headers=True,
+        access_log=args.access_log,
+        log_level=args.log_level
+    )
+
+if __name__ == "__main__":
+    main()
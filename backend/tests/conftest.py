@@ -0,0 +1,8 @@
+import os
+
+# Settings are read at import time; keep tests offline and deterministic
+os.environ.setdefault("LLM_PROVIDER", "stub")
+os.environ.setdefault("LLM_STUB_PROFILE", "instant")
+os.environ.setdefault("LLM_CACHE_REDIS_ENABLED", "false")
+os.environ.setdefault("CONVERSATION_STORE", "memory")
+os.environ.setdefault("STARTUP_WARMUP_ENABLED", "false")
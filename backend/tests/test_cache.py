@@ -0,0 +1,131 @@
+import pytest
+
+from app.services import cache as cache_module
+from app.services.cache import PROMOTED_TTL, LLMCache, MemoryCache, RedisCache
+
+fakeredis = pytest.importorskip("fakeredis")
+
+MESSAGES = [{"role": "system", "content": "You are a travel agent."}, {"role": "user", "content": "Paris"}]
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    return clock
+
+def test_key_is_canonical():
+    key = LLMCache.make_key("gpt-4", MESSAGES, 0.7, 500)
+    reordered = [{"content": message["content"], "role": message["role"]} for message in MESSAGES]
+    assert LLMCache.make_key("gpt-4", reordered, 0.7, 500) == key
+    assert len(key) == 64
+
+@pytest.mark.parametrize("change", [
+    {"model": "gpt-3.5-turbo"},
+    {"temperature": 0.2},
+    {"max_tokens": 501},
+    {"messages": MESSAGES[:1]},
+])
+def test_key_changes_with_request(change):
+    request = {"model": "gpt-4", "messages": MESSAGES, "temperature": 0.7, "max_tokens": 500}
+    assert LLMCache.make_key(**{**request, **change}) != LLMCache.make_key(**request)
+
+@pytest.mark.asyncio
+async def test_memory_entries_expire(clock):
+    memory = MemoryCache()
+    await memory.set("key", "value", ttl=60)
+    clock.now += 59
+    assert await memory.get("key") == "value"
+    clock.now += 2
+    assert await memory.get("key") is None
+    assert len(memory) == 0
+
+@pytest.mark.asyncio
+async def test_memory_evicts_least_recently_used():
+    memory = MemoryCache(max_entries=2)
+    await memory.set("a", "1", ttl=60)
+    await memory.set("b", "2", ttl=60)
+    assert await memory.get("a") == "1"
+    await memory.set("c", "3", ttl=60)
+    assert await memory.get("b") is None
+    assert await memory.get("a") == "1"
+    assert await memory.get("c") == "3"
+
+@pytest.mark.asyncio
+async def test_redis_hit_is_promoted_to_memory(clock):
+    redis = RedisCache(fakeredis.aioredis.FakeRedis(decode_responses=True))
+    await redis.set("key", "shared", ttl=3600)
+    cache = LLMCache(MemoryCache(), redis=redis)
+
+    assert await cache.get("key", "chat") == "shared"
+    assert await cache.memory.get("key") == "shared"
+    assert await cache.get("key", "chat") == "shared"
+    assert cache.stats()["call_types"]["chat"] == {"hits": 2, "misses": 0, "memory_hits": 1, "redis_hits": 1}
+
+    # Promoted entries only live briefly in memory; Redis still has them
+    clock.now += PROMOTED_TTL + 1
+    assert await cache.memory.get("key") is None
+    assert await cache.get("key", "chat") == "shared"
+
+@pytest.mark.asyncio
+async def test_set_writes_both_tiers():
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    cache = LLMCache(MemoryCache(), redis=RedisCache(client, prefix="test:"))
+    await cache.set("key", "value", ttl=60)
+    assert await cache.memory.get("key") == "value"
+    assert await client.get("test:key") == "value"
+    assert 0 < await client.ttl("test:key") <= 60
+
+    await cache.delete("key")
+    assert await cache.get("key") is None
+    assert await client.get("test:key") is None
+
+@pytest.mark.asyncio
+async def test_redis_errors_are_misses():
+    class BrokenRedis:
+        async def get(self, key):
+            raise ConnectionError("redis is down")
+
+    cache = LLMCache(MemoryCache(), redis=RedisCache(BrokenRedis()))
+    assert await cache.get("key", "chat") is None
+    assert cache.stats()["call_types"]["chat"]["misses"] == 1
+
+class CountingProvider:
+    """Wraps a provider and counts upstream calls."""
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.calls = 0
+
+    def __getattr__(self, name):
+        return getattr(self.provider, name)
+
+    async def complete(self, *args, **kwargs):
+        self.calls += 1
+        return await self.provider.complete(*args, **kwargs)
+
+@pytest.mark.asyncio
+async def test_bypass_cache_skips_lookup_and_store():
+    from app.services.ai_service import AIService
+
+    service = AIService()
+    service.provider = provider = CountingProvider(service.provider)
+    request = {"messages": MESSAGES, "max_tokens": 100, "temperature": 0.7, "call_type": "preferences"}
+
+    first = await service._create_completion(**request)
+    assert await service._create_completion(**request) == first
+    assert provider.calls == 1
+
+    await service._create_completion(**request, bypass_cache=True)
+    assert provider.calls == 2
+
+    fresh = {**request, "messages": MESSAGES + [{"role": "user", "content": "Lisbon"}]}
+    await service._create_completion(**fresh, bypass_cache=True)
+    await service._create_completion(**fresh)
+    assert provider.calls == 4
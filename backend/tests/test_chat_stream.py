@@ -0,0 +1,72 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from main import app
+
+def read_events(response):
+    """Parse an SSE body into (event, data) pairs."""
+    events = []
+    for frame in response.text.split("\n\n"):
+        if not frame:
+            continue
+        lines = dict(line.split(": ", 1) for line in frame.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+def test_stream_sends_frames_in_order_and_persists_the_turn():
+    with TestClient(app) as client:
+        with client.stream("POST", "/api/chat/stream", json={"message": "I want a 3 day budget trip to Bali for 2 in May"}) as response:
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+            response.read()
+        events = read_events(response)
+        names = [name for name, _ in events]
+
+        assert names[0] == "conversation"
+        assert names[-1] == "done"
+        assert names.count("itinerary") == 1 and names.count("done") == 1
+        tokens = [data["content"] for name, data in events if name == "token"]
+        assert tokens and names[1] == "token"
+        # Token frames come first; day previews may interleave, the rest follow in order
+        rest = [name for name in names[1:] if name not in ("token", "itinerary_day")]
+        assert rest == ["questions", "cost_estimate", "itinerary", "done"]
+        last_token = max(i for i, name in enumerate(names) if name == "token")
+        assert last_token < names.index("questions")
+        # Day previews are never sent after the authoritative itinerary
+        assert all(i < names.index("itinerary") for i, name in enumerate(names) if name == "itinerary_day")
+
+        events = dict(events)
+        itinerary = events["itinerary"]
+        assert itinerary["destination"] == "Bali" and itinerary["daily_plans"]
+        assert events["cost_estimate"]["total"] > 0
+
+        done = events["done"]
+        assert set(done) == {"message", "preferences", "preferences_delta"}
+        assert done["message"] == "".join(tokens)
+        assert done["preferences"]["destination"] == "Bali"
+        assert done["preferences"]["people"] == 2
+        assert done["preferences_delta"]["duration"] == "3 days"
+        # The delta is the full model, so fields not in the message are present as null
+        assert done["preferences_delta"]["transport_preference"] is None
+
+        conversation_id = events["conversation"]["conversation_id"]
+        stored = client.get(f"/api/conversations/{conversation_id}").json()
+        assert [message["role"] for message in stored["messages"]] == ["user", "assistant"]
+        assert stored["messages"][1]["content"] == done["message"]
+        assert stored["preferences"]["destination"] == "Bali"
+
+def test_stream_continues_a_conversation_with_known_preferences():
+    with TestClient(app) as client:
+        with client.stream("POST", "/api/chat/stream", json={"message": "Kyoto, Japan for 5 days with my husband"}) as response:
+            response.read()
+        conversation_id = dict(read_events(response))["conversation"]["conversation_id"]
+
+        with client.stream("POST", "/api/chat/stream", json={"message": "We have a moderate budget", "conversation_id": conversation_id}) as response:
+            response.read()
+        events = dict(read_events(response))
+        assert events["conversation"]["conversation_id"] == conversation_id
+        assert events["done"]["preferences"]["destination"] == "Kyoto"
+        assert events["done"]["preferences"]["budget"] == "medium"
+        assert events["done"]["preferences_delta"]["destination"] is None
+        assert len(client.get(f"/api/conversations/{conversation_id}").json()["messages"]) == 4
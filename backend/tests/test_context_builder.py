@@ -0,0 +1,84 @@
+import pytest
+
+from app.models.chat import ChatMessage, Conversation, MessageRole
+from app.services.context_builder import ContextBuilder
+from app.services.conversation_store import InMemoryConversationStore, SQLConversationStore
+
+HISTORY_LIMIT = 50
+
+def make_messages(count, start=0):
+    return [
+        ChatMessage(
+            role=MessageRole.USER if n % 2 == 0 else MessageRole.ASSISTANT,
+            content=f"Message {n}. Some more detail."
+        )
+        for n in range(start, start + count)
+    ]
+
+@pytest.fixture
+def builder():
+    return ContextBuilder(max_tokens=3000, summary_max_tokens=500)
+
+async def roll(builder, store, conversation_id):
+    """Roll the summary the way the chat routes do."""
+    conversation = await store.get(conversation_id, message_limit=HISTORY_LIMIT)
+    earlier = []
+    gap = builder.unsummarized_range(conversation)
+    if gap is not None:
+        earlier = await store.get_messages(conversation_id, *gap)
+    return builder.roll_summary(conversation, earlier)
+
+def test_recent_turns_within_budget_are_kept(builder):
+    history = make_messages(60)
+    assert builder.select_recent(history) == 60
+    tight = ContextBuilder(max_tokens=100, summary_max_tokens=20)
+    assert tight.select_recent(history) == (100 - 20) // tight.message_tokens(history[-1])
+
+@pytest.mark.asyncio
+async def test_messages_outside_loaded_history_are_summarized(builder):
+    store = InMemoryConversationStore()
+    await store.append_messages("c1", make_messages(60))
+    conversation = await store.get("c1", message_limit=HISTORY_LIMIT)
+
+    assert builder.unsummarized_range(conversation) == (0, 10)
+    summary, summarized_count = await roll(builder, store, "c1")
+    assert summarized_count == 10
+    assert summary.splitlines() == [
+        f"{'User' if n % 2 == 0 else 'Assistant'}: Message {n}." for n in range(10)
+    ]
+
+@pytest.mark.asyncio
+async def test_summary_keeps_up_turn_by_turn(builder):
+    store = InMemoryConversationStore()
+    await store.append_messages("c1", make_messages(HISTORY_LIMIT))
+    for turn in range(10):
+        summary, summarized_count = await roll(builder, store, "c1")
+        assert summarized_count == 2 * turn
+        await store.append_messages(
+            "c1", make_messages(2, start=HISTORY_LIMIT + 2 * turn), summary=summary, summarized_count=summarized_count
+        )
+    summary, summarized_count = await roll(builder, store, "c1")
+    assert summarized_count == 20
+    assert len(summary.splitlines()) == 20
+    assert summary.splitlines()[-1] == "Assistant: Message 19."
+
+def test_summary_never_skips_messages_that_were_not_loaded(builder):
+    conversation = Conversation(id="c1", messages=make_messages(HISTORY_LIMIT, start=10), message_count=60)
+    assert builder.roll_summary(conversation) == (None, 0)
+
+    summary, summarized_count = builder.roll_summary(conversation, make_messages(4))
+    assert summarized_count == 4
+    assert summary.splitlines()[-1] == "Assistant: Message 3."
+
+@pytest.mark.asyncio
+async def test_sql_store_loads_message_ranges(tmp_path):
+    store = SQLConversationStore(f"sqlite:///{tmp_path}/test.db")
+    await store.init()
+    try:
+        await store.get_or_create("c1")
+        await store.append_messages("c1", make_messages(30))
+        messages = await store.get_messages("c1", 10, 14)
+        assert [message.content for message in messages] == [f"Message {n}. Some more detail." for n in range(10, 14)]
+        assert await store.get_messages("c1", 5, 5) == []
+    finally:
+        await store.close()
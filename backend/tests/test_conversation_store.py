@@ -0,0 +1,102 @@
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+from app.db.models import ConversationRecord
+from app.models.chat import ChatMessage, MessageRole
+from app.services.conversation_store import (
+    InMemoryConversationStore, InvalidCursorError, SQLConversationStore, encode_cursor
+)
+
+START = datetime(2026, 1, 1)
+
+@pytest.fixture(params=["memory", "sql"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return InMemoryConversationStore()
+    return SQLConversationStore(f"sqlite:///{tmp_path / 'conversations.db'}")
+
+@asynccontextmanager
+async def opened(store):
+    await store.init()
+    try:
+        yield store
+    finally:
+        await store.close()
+
+async def set_updated_at(store, conversation_id, updated_at):
+    if isinstance(store, InMemoryConversationStore):
+        store._conversations[conversation_id].updated_at = updated_at
+        return
+    async with store.session_factory() as session:
+        await session.execute(
+            update(ConversationRecord).where(ConversationRecord.id == conversation_id).values(updated_at=updated_at)
+        )
+        await session.commit()
+
+async def add_conversations(store):
+    """Seven conversations; c2/c3 and c5/c6 share an updated_at, so ties are broken by id."""
+    minutes = {"c0": 0, "c1": 1, "c2": 2, "c3": 2, "c4": 3, "c5": 4, "c6": 4}
+    for conversation_id, minute in minutes.items():
+        await store.get_or_create(conversation_id, user_id="alice" if minute % 2 else "bob")
+        await store.append_messages(conversation_id, [ChatMessage(role=MessageRole.USER, content="Hi")])
+        await set_updated_at(store, conversation_id, START + timedelta(minutes=minute))
+    return sorted(minutes, key=lambda conversation_id: (minutes[conversation_id], conversation_id), reverse=True)
+
+async def walk(store, **filters):
+    ids, cursors, cursor = [], [], None
+    while True:
+        page = await store.list_conversations(limit=3, cursor=cursor, **filters)
+        ids.extend(item.id for item in page.items)
+        if page.next_cursor is None:
+            return ids, cursors
+        cursor = page.next_cursor
+        cursors.append(cursor)
+
+@pytest.mark.asyncio
+async def test_pages_walk_every_conversation_once(store):
+    async with opened(store):
+        expected = await add_conversations(store)
+        ids, cursors = await walk(store)
+        assert ids == expected == ["c6", "c5", "c4", "c3", "c2", "c1", "c0"]
+        assert len(cursors) == 2
+
+        # A conversation updated mid-walk moves ahead of the cursor instead of repeating
+        page = await store.list_conversations(limit=3)
+        await set_updated_at(store, "c0", START + timedelta(minutes=10))
+        later = await store.list_conversations(limit=10, cursor=page.next_cursor)
+        assert [item.id for item in later.items] == ["c3", "c2", "c1"]
+
+@pytest.mark.asyncio
+async def test_pages_respect_filters(store):
+    async with opened(store):
+        await add_conversations(store)
+        ids, _ = await walk(store, user_id="alice")
+        assert ids == ["c4", "c1"]
+        ids, _ = await walk(store, updated_after=START + timedelta(minutes=2), updated_before=START + timedelta(minutes=4))
+        assert ids == ["c4", "c3", "c2"]
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor(START, "c0")[:-3], "W10"])
+async def test_invalid_cursors_are_rejected(store, cursor):
+    async with opened(store):
+        with pytest.raises(InvalidCursorError):
+            await store.list_conversations(cursor=cursor)
+
+def test_api_pages_and_rejects_invalid_cursors():
+    from main import app
+
+    with TestClient(app) as client:
+        for _ in range(3):
+            assert client.post("/api/chat", json={"message": "Hi"}).status_code == 200
+        first = client.get("/api/conversations", params={"limit": 2}).json()
+        second = client.get("/api/conversations", params={"limit": 2, "cursor": first["next_cursor"]}).json()
+        assert len(first["items"]) == 2
+        assert not {item["id"] for item in first["items"]} & {item["id"] for item in second["items"]}
+
+        response = client.get("/api/conversations", params={"cursor": "not-a-cursor"})
+        assert response.status_code == 400
+        assert "Invalid cursor" in response.json()["detail"]
@@ -0,0 +1,141 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.models.chat import TripItinerary, TripPreferences
+from app.services.cost_model import CATEGORIES, CostModel, parse_days
+
+# Daily mid-range prices: accommodation per room, the rest per person
+PRICES = {
+    "Cheapville": [20, 10, 5, 10],
+    "Middleton": [100, 30, 10, 20],
+    "Pricey City": [200, 60, 20, 40],
+}
+
+@pytest.fixture(scope="module")
+def model():
+    # An alias of a destination without prices is ignored
+    aliases = {"PC": "Pricey City", "Nowhere": "Atlantis"}
+    return CostModel(list(PRICES), np.array(list(PRICES.values()), dtype=float), aliases)
+
+@pytest.mark.parametrize("duration, days", [
+    ("5 days", 5),
+    ("a 2 week trip", 14),
+    ("3 nights", 4),
+    ("1 month", 30),
+    ("10", 10),
+    ("0 days", None),
+    ("a long weekend", None),
+    (None, None),
+])
+def test_parse_days(duration, days):
+    assert parse_days(duration) == days
+
+@pytest.mark.parametrize("text, matched", [
+    ("Cheapville", "Cheapville"),
+    ("  PRICEY city ", "Pricey City"),
+    ("pc", "Pricey City"),
+    ("A week in Pricey City, please", "Pricey City"),
+    ("Nowhere", None),
+    ("", None),
+    (None, None),
+])
+def test_resolve_names_aliases_and_text(model, text, matched):
+    row = model.resolve(text)
+    assert (None if row is None else model.names[row]) == matched
+
+def test_estimate_scales_by_rooms_people_and_days(model):
+    # Three people need two rooms for two nights; the rest is per person per day
+    estimate = model.estimate("Cheapville", days=3, people=3, budget="medium")
+    assert estimate.matched == "Cheapville"
+    assert estimate.breakdown == {"accommodation": 80.0, "food": 90.0, "transport": 45.0, "activities": 90.0}
+    assert estimate.total == 305.0
+    assert estimate.per_day == 101.67
+    assert estimate.per_person == 101.67
+    assert (estimate.low, estimate.high) == (244.0, 381.25)
+    assert estimate.shares == {"accommodation": 26.2, "food": 29.5, "transport": 14.8, "activities": 29.5}
+
+def test_budget_tiers_scale_each_category(model):
+    low, medium, high = (model.estimate("Cheapville", 3, 3, budget) for budget in ("low", "medium", "high"))
+    assert low.breakdown == {"accommodation": 36.0, "food": 49.5, "transport": 31.5, "activities": 45.0}
+    assert high.breakdown == {"accommodation": 224.0, "food": 198.0, "transport": 90.0, "activities": 180.0}
+    assert low.total < medium.total < high.total
+
+def test_one_day_trips_still_pay_for_a_night(model):
+    assert model.estimate("Middleton", 1, 1, "medium").breakdown["accommodation"] == 100.0
+    assert model.estimate("Middleton", 2, 1, "medium").breakdown["accommodation"] == 100.0
+
+def test_unknown_destinations_use_median_prices(model):
+    unknown = model.estimate("Atlantis", 4, 2, "medium")
+    middle = model.estimate("Middleton", 4, 2, "medium")
+    assert unknown.matched is None and unknown.destination == "Atlantis"
+    assert unknown.breakdown == middle.breakdown
+    assert model.estimate(None, 4, 2, "medium").total == middle.total
+
+def test_grid_matches_single_estimates(model):
+    destinations, days, people, budgets = ["Cheapville", "pc", "Atlantis"], [2, 7], [1, 4], ["low", "high"]
+    grid = model.estimate_grid(destinations, days, people, budgets)
+    expected = [
+        model.estimate(destination, trip_days, size, budget)
+        for destination in destinations for trip_days in days for size in people for budget in budgets
+    ]
+    assert grid == expected
+    assert len(grid) == 24
+
+def test_check_total_replaces_missing_and_implausible_figures(model):
+    estimate = model.estimate("Cheapville", 3, 3, "medium")
+    total_cost = {"accommodation": 150.0, "food": 9.0, "activities": 500.0, "shopping": 70.0}
+    assert model.check_total(total_cost, estimate) == {
+        "accommodation": 150.0,  # within 2x of 80
+        "food": 90.0,
+        "transport": 45.0,
+        "activities": 90.0,
+        "shopping": 70.0,
+    }
+    assert set(CATEGORIES) <= set(model.check_total({}, estimate))
+
+def test_itinerary_costs_are_checked_against_the_estimate():
+    from app.services.ai_service import AIService
+
+    service = AIService()
+    preferences = TripPreferences(destination="Bali", duration="3 days", people=2, budget="low")
+    itinerary = TripItinerary(
+        destination="Bali",
+        duration="3 days",
+        daily_plans=[],
+        total_cost={"accommodation": 5000.0, "food": 60.0, "transport": 30.0},
+        transport_options=[],
+        accommodation_suggestions=[],
+        food_recommendations=[],
+        hidden_gems=[],
+        tips=[]
+    )
+    checked = service._optimize_itinerary(itinerary, preferences).total_cost
+    # Bali at the low tier: one room for two nights, and two people for three days
+    assert checked == {"accommodation": 45.0, "food": 60.0, "transport": 30.0, "activities": 60.0}
+
+    # Unknown budgets are priced at the medium tier
+    estimate = service._estimate_costs(TripPreferences(destination="Bali", budget="luxury"))
+    assert (estimate.budget_level, estimate.days, estimate.people) == ("medium", 7, 1)
+
+def test_batch_endpoint_expands_every_combination():
+    from main import app
+
+    with TestClient(app) as client:
+        response = client.post("/api/cost-estimate/batch", json={
+            "destinations": ["Bali", "Atlantis"], "days": [3, 5], "people": [2], "budgets": ["low", "high"]
+        })
+        assert response.status_code == 200
+        body = response.json()
+        assert body["total"] == 8
+        assert [(e["destination"], e["days"], e["budget_level"]) for e in body["estimates"][:3]] == [
+            ("Bali", 3, "low"), ("Bali", 3, "high"), ("Bali", 5, "low")
+        ]
+        assert body["estimates"][0]["breakdown"]["accommodation"] == 45.0
+        assert body["estimates"][-1]["matched"] is None
+
+        too_many = client.post("/api/cost-estimate/batch", json={
+            "destinations": [f"Place {i}" for i in range(500)], "days": list(range(1, 12))
+        })
+        assert too_many.status_code == 422
+        assert "limit is 5000" in too_many.json()["detail"]
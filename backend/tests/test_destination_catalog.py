@@ -0,0 +1,140 @@
+import pytest
+
+from app.models.destinations import Destination
+from app.services.destination_catalog import MAX_SUGGESTIONS, DestinationCatalog
+
+def destination(name, country, budget, popularity, months, interests, highlights=(), aliases=()):
+    return Destination(
+        name=name, country=country, budget_level=budget, popularity=popularity, best_months=list(months),
+        interests=list(interests), highlights=list(highlights), aliases=list(aliases)
+    )
+
+DESTINATIONS = [
+    destination("Paris", "France", "high", 95, [4, 5, 6, 9, 10], ["culture", "food"], ["Louvre museum", "Eiffel Tower"], ["City of Light"]),
+    destination("Parma", "Italy", "medium", 40, [5, 9], ["food"], ["Parmesan tasting"]),
+    destination("Barcelona", "Spain", "medium", 90, [5, 6, 7, 8, 9], ["beaches", "food", "nightlife"], ["Sagrada Familia"], ["BCN"]),
+    destination("Bangkok", "Thailand", "low", 96, [11, 12, 1, 2], ["food", "nightlife", "shopping"], ["Grand Palace"], ["Krung Thep"]),
+    destination("Kyoto", "Japan", "high", 93, [3, 4, 5, 10, 11], ["culture", "nature"], ["Fushimi Inari shrine"]),
+    destination("Reykjavik", "Iceland", "high", 60, [6, 7, 8], ["nature", "adventure"], ["Northern lights"]),
+    destination("Ho Chi Minh City", "Vietnam", "low", 86, [12, 1, 2], ["food", "nightlife"], aliases=["Saigon", "HCMC"]),
+    destination("San Sebastian", "Spain", "high", 70, [6, 7, 8, 9], ["food", "beaches"], aliases=["Donostia"]),
+]
+
+@pytest.fixture(scope="module")
+def catalog():
+    return DestinationCatalog(DESTINATIONS)
+
+def names(page):
+    return [destination.name for destination in page.destinations]
+
+def test_browsing_orders_by_popularity(catalog):
+    page = catalog.search()
+    assert names(page) == [
+        "Bangkok", "Paris", "Kyoto", "Barcelona", "Ho Chi Minh City", "San Sebastian", "Reykjavik", "Parma"
+    ]
+    assert page.total == 8
+
+def test_pages_split_the_ranking(catalog):
+    page = catalog.search(limit=3, offset=3)
+    assert names(page) == ["Barcelona", "Ho Chi Minh City", "San Sebastian"]
+    assert (page.total, page.limit, page.offset) == (8, 3, 3)
+    assert names(catalog.search(query="spain", limit=1, offset=1)) == ["San Sebastian"]
+    assert catalog.search(limit=3, offset=8).destinations == []
+    assert catalog.search(query="pa", offset=10).total == 2
+
+@pytest.mark.parametrize("query, expected", [
+    ("kyoto", ["Kyoto"]),
+    ("par", ["Paris", "Parma"]),
+    ("PAR", ["Paris", "Parma"]),
+    ("spain", ["Barcelona", "San Sebastian"]),
+    ("saigon", ["Ho Chi Minh City"]),
+    ("sebas", ["San Sebastian"]),
+    # Paris's alias starts with "city", which ranks above a later word of a name
+    ("city", ["Paris", "Ho Chi Minh City"]),
+    ("shrine", ["Kyoto"]),
+])
+def test_text_queries_match_names_aliases_countries_and_highlights(catalog, query, expected):
+    assert names(catalog.search(query=query)) == expected
+
+@pytest.mark.parametrize("query, expected", [
+    ("barcelna", "Barcelona"),
+    ("reykavik", "Reykjavik"),
+    ("bangok", "Bangkok"),
+])
+def test_typos_fall_back_to_trigram_similarity(catalog, query, expected):
+    assert names(catalog.search(query=query))[0] == expected
+
+def test_trigram_fallback_is_not_used_for_prefix_matches(catalog):
+    # "bar" matches Barcelona by prefix, so Bangkok's shared trigrams are not considered
+    assert names(catalog.search(query="bar")) == ["Barcelona"]
+    assert catalog.search(query="zzzz").total == 0
+
+@pytest.mark.parametrize("filters, expected", [
+    ({"budgets": ["low"]}, ["Bangkok", "Ho Chi Minh City"]),
+    ({"budgets": ["LOW", "medium"]}, ["Bangkok", "Barcelona", "Ho Chi Minh City", "Parma"]),
+    ({"months": [7]}, ["Barcelona", "San Sebastian", "Reykjavik"]),
+    ({"months": [7], "budgets": ["high"]}, ["San Sebastian", "Reykjavik"]),
+    ({"interests": ["hiking"]}, ["Reykjavik"]),
+    ({"interests": ["palace"]}, ["Bangkok"]),
+    ({"query": "spain", "months": [5]}, ["Barcelona"]),
+])
+def test_filters_narrow_the_results(catalog, filters, expected):
+    page = catalog.search(**filters)
+    assert names(page) == expected
+    assert page.total == len(expected)
+
+def test_more_matched_interests_rank_higher(catalog):
+    assert names(catalog.search(interests=["food", "beaches"]))[:2] == ["Barcelona", "San Sebastian"]
+
+def expected_suggestions(destinations, prefix, limit):
+    """Reference answer: every name, alias or word of either that starts with ``prefix``."""
+    prefix = prefix.lower()
+    matches = [
+        (index, destination) for index, destination in enumerate(destinations)
+        if any(
+            label.lower().startswith(prefix) or any(word.startswith(prefix) for word in label.lower().split())
+            for label in [destination.name, *destination.aliases]
+        )
+    ]
+    matches.sort(key=lambda match: (-match[1].popularity, match[0]))
+    return [destination.name for _, destination in matches[:limit]]
+
+@pytest.mark.parametrize("prefix, expected", [
+    ("p", ["Paris", "Parma"]),
+    ("pa", ["Paris", "Parma"]),
+    ("B", ["Bangkok", "Barcelona"]),
+    # Later words of names and aliases: "Ho Chi Minh City", "Krung Thep", "City of Light"
+    ("c", ["Paris", "Ho Chi Minh City"]),
+    ("th", ["Bangkok"]),
+    ("li", ["Paris"]),
+    ("sa", ["Ho Chi Minh City", "San Sebastian"]),
+    ("do", ["San Sebastian"]),
+    ("q", []),
+])
+def test_short_prefixes_suggest_by_popularity(catalog, prefix, expected):
+    assert [destination.name for destination in catalog.suggest(prefix)] == expected
+
+def test_longer_prefixes_match_alias_words(catalog):
+    assert [destination.name for destination in catalog.suggest("ligh")] == ["Paris"]
+    assert [destination.name for destination in catalog.suggest("saig")] == ["Ho Chi Minh City"]
+    assert [destination.name for destination in catalog.suggest("sebastian")] == ["San Sebastian"]
+    assert catalog.suggest("") == []
+    assert catalog.suggest("   ") == []
+
+@pytest.fixture(scope="module")
+def crowded():
+    # More "S" destinations than MAX_SUGGESTIONS, with tied popularity
+    destinations = [
+        destination(f"Santa {name}town", "Spain", "low", (i * 7) % 13, [], [], aliases=[f"Old {i}"])
+        for i, name in enumerate(a + b for a in "abc" for b in "abcdefghij")
+    ]
+    return destinations, DestinationCatalog(destinations)
+
+@pytest.mark.parametrize("prefix", ["s", "sa", "san", "o", "ol", "at"])
+@pytest.mark.parametrize("limit", [1, 5, MAX_SUGGESTIONS, MAX_SUGGESTIONS + 5, 100])
+def test_suggestions_match_reference_beyond_the_precomputed_limit(crowded, prefix, limit):
+    destinations, catalog = crowded
+    expected = expected_suggestions(destinations, prefix, limit)
+    assert [destination.name for destination in catalog.suggest(prefix, limit=limit)] == expected
+    if limit > MAX_SUGGESTIONS and prefix in ("s", "o"):
+        assert len(expected) == min(limit, len(destinations))
@@ -0,0 +1,243 @@
+import asyncio
+import logging
+import re
+
+import httpx
+import openai
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.core.rate_limit import RateLimitMiddleware
+from app.services.governor import (
+    PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, UpstreamGovernor, UpstreamOverloadedError
+)
+from app.services.llm.openai_provider import OpenAIProvider
+from benchmarks.fake_openai_server import create_app
+
+MESSAGES = [{"role": "system", "content": "You are a helpful assistant."}, {"role": "user", "content": "Hi"}]
+
+def api_error(status, retry_after=None):
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    headers = {"retry-after": retry_after} if retry_after else {}
+    return openai.APIStatusError("upstream error", response=httpx.Response(status, headers=headers, request=request), body=None)
+
+class FlakyCall:
+    """Raises the given errors in turn, then succeeds."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+def retry_delays(caplog):
+    return [float(m) for m in re.findall(r"Retrying upstream call in ([\d.]+)s", caplog.text)]
+
+def fake_openai_provider(**server):
+    app = create_app(**{"latency": 0.0, "error_rate": 0.0, "max_concurrency": 16, **server})
+    return OpenAIProvider(
+        api_key="test",
+        model="gpt-4",
+        base_url="http://fake-openai/v1",
+        http_client=lambda: httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+    )
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status", [429, 500, 503])
+async def test_transient_errors_are_retried_with_backoff(caplog, status):
+    caplog.set_level(logging.WARNING, logger="app.services.governor")
+    governor = UpstreamGovernor(max_concurrency=4, max_retries=2, base_delay=0.01, max_delay=0.05)
+    call = FlakyCall(api_error(status), api_error(status))
+
+    assert await governor.run(call) == "ok"
+    assert call.calls == 3
+    assert governor.stats()["retries"] == 2
+    delays = retry_delays(caplog)
+    assert len(delays) == 2
+    assert all(0 <= delay <= 0.05 for delay in delays)
+
+@pytest.mark.asyncio
+async def test_retries_give_up_and_skip_permanent_errors():
+    governor = UpstreamGovernor(max_concurrency=4, max_retries=1, base_delay=0.001)
+    call = FlakyCall(api_error(500), api_error(500))
+    with pytest.raises(openai.APIStatusError):
+        await governor.run(call)
+    assert call.calls == 2
+
+    call = FlakyCall(api_error(400))
+    with pytest.raises(openai.APIStatusError):
+        await governor.run(call)
+    assert call.calls == 1
+    assert governor.stats()["errors"] == 2
+
+@pytest.mark.asyncio
+async def test_retry_after_is_honoured_but_capped(caplog):
+    caplog.set_level(logging.WARNING, logger="app.services.governor")
+    governor = UpstreamGovernor(max_concurrency=4, max_retries=2, base_delay=0.001, max_delay=0.05)
+    call = FlakyCall(api_error(429, retry_after="0.02"), api_error(429, retry_after="3600"))
+
+    assert await governor.run(call) == "ok"
+    assert retry_delays(caplog) == [0.02, 0.05]
+
+@pytest.mark.asyncio
+async def test_rate_limits_halve_the_limit_and_successes_recover_it():
+    governor = UpstreamGovernor(max_concurrency=8, max_retries=3, base_delay=0.001)
+    await governor.run(FlakyCall(api_error(429), api_error(429)))
+    # Halved twice to 2, then one success adds 1/limit
+    assert governor.limit == pytest.approx(2.5)
+    assert governor.stats()["rate_limited"] == 2
+
+    for _ in range(30):
+        await governor.run(FlakyCall())
+    assert governor.limit == 8.0
+
+    for _ in range(5):
+        with pytest.raises(openai.APIStatusError):
+            await governor.run(FlakyCall(*[api_error(429)] * 4))
+    assert governor.limit == 1.0
+
+@pytest.mark.asyncio
+async def test_recovered_limit_admits_more_concurrent_calls():
+    governor = UpstreamGovernor(max_concurrency=8)
+    governor.limit = 2.0
+    active = 0
+    peaks = []
+
+    async def call():
+        nonlocal active
+        active += 1
+        peaks.append(active)
+        await asyncio.sleep(0.001)
+        active -= 1
+
+    async def worker():
+        for _ in range(10):
+            await governor.run(call)
+
+    await asyncio.gather(*(worker() for _ in range(20)))
+    assert governor.limit == 8.0
+    assert max(peaks[:2]) <= 2
+    assert max(peaks) == 8
+
+@pytest.mark.asyncio
+async def test_background_calls_are_shed_before_interactive_ones():
+    governor = UpstreamGovernor(max_concurrency=1)
+    release = asyncio.Event()
+
+    async def hold():
+        await release.wait()
+        return "held"
+
+    holder = asyncio.create_task(governor.run(hold))
+    await asyncio.sleep(0)
+    interactive = asyncio.create_task(governor.run(FlakyCall(), PRIORITY_INTERACTIVE))
+    await asyncio.sleep(0)
+
+    with pytest.raises(UpstreamOverloadedError):
+        await governor.run(FlakyCall(), PRIORITY_BACKGROUND)
+    assert governor.stats()["shed"] == 1
+
+    release.set()
+    assert await holder == "held"
+    assert await interactive == "ok"
+
+@pytest.mark.asyncio
+async def test_interactive_waiters_are_served_before_background_ones():
+    governor = UpstreamGovernor(max_concurrency=1)
+    release = asyncio.Event()
+    order = []
+
+    async def hold():
+        await release.wait()
+
+    def record(name):
+        async def call():
+            order.append(name)
+        return call
+
+    holder = asyncio.create_task(governor.run(hold))
+    await asyncio.sleep(0)
+    background = asyncio.create_task(governor.run(record("background"), PRIORITY_BACKGROUND))
+    await asyncio.sleep(0)
+    interactive = asyncio.create_task(governor.run(record("interactive"), PRIORITY_INTERACTIVE))
+    await asyncio.sleep(0)
+
+    release.set()
+    await asyncio.gather(holder, background, interactive)
+    assert order == ["interactive", "background"]
+
+@pytest.mark.asyncio
+async def test_background_calls_are_shed_near_the_token_budget():
+    governor = UpstreamGovernor(max_concurrency=4, tokens_per_minute=1000, shed_ratio=0.8)
+    governor.record_usage(850)
+    with pytest.raises(UpstreamOverloadedError):
+        await governor.run(FlakyCall(), PRIORITY_BACKGROUND)
+    assert await governor.run(FlakyCall(), PRIORITY_INTERACTIVE) == "ok"
+
+@pytest.mark.asyncio
+async def test_fake_server_completions_pass_through_the_governor():
+    provider = fake_openai_provider()
+    governor = UpstreamGovernor(max_concurrency=4)
+    try:
+        completion = await governor.run(lambda: provider.complete(MESSAGES, 100, 0.7))
+        assert completion.content.startswith("Lisbon is a great choice")
+        assert completion.total_tokens > 0
+    finally:
+        await provider.close()
+
+@pytest.mark.asyncio
+async def test_fake_server_429s_are_retried_then_raised(caplog):
+    caplog.set_level(logging.WARNING, logger="app.services.governor")
+    # The fake server answers 429 with Retry-After: 0.2 when it is at capacity
+    provider = fake_openai_provider(max_concurrency=0)
+    governor = UpstreamGovernor(max_concurrency=8, max_retries=2, max_delay=0.05)
+    try:
+        with pytest.raises(openai.RateLimitError):
+            await governor.run(lambda: provider.complete(MESSAGES, 100, 0.7))
+    finally:
+        await provider.close()
+    assert retry_delays(caplog) == [0.05, 0.05]
+    assert governor.stats()["rate_limited"] == 3
+    assert governor.limit == 1.0
+
+def rate_limited_app(**options):
+    async def ok(request):
+        return PlainTextResponse("ok")
+
+    app = Starlette(routes=[Route("/api/chat", ok), Route("/api/autocomplete", ok), Route("/health", ok)])
+    return TestClient(RateLimitMiddleware(app, **options))
+
+def test_rate_limit_answers_429_with_retry_after():
+    client = rate_limited_app(per_minute=60, burst=2)
+    assert client.get("/api/chat").status_code == 200
+    assert client.get("/api/chat").status_code == 200
+
+    response = client.get("/api/chat")
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "1"
+    assert response.json() == {"detail": "Rate limit exceeded"}
+
+def test_rate_limit_skips_exempt_and_unprefixed_paths():
+    client = rate_limited_app(per_minute=60, burst=1, exempt_paths=("/api/autocomplete",))
+    assert client.get("/api/chat").status_code == 200
+    assert client.get("/api/chat").status_code == 429
+    for _ in range(3):
+        assert client.get("/api/autocomplete").status_code == 200
+        assert client.get("/health").status_code == 200
+
+def test_rate_limit_is_per_client():
+    client = rate_limited_app(per_minute=60, burst=1, key_func=lambda scope: dict(scope["headers"]).get(b"x-client", b""))
+    assert client.get("/api/chat", headers={"x-client": "a"}).status_code == 200
+    assert client.get("/api/chat", headers={"x-client": "a"}).status_code == 429
+    assert client.get("/api/chat", headers={"x-client": "b"}).status_code == 200
+
+def test_rate_limit_disabled_when_per_minute_is_zero():
+    client = rate_limited_app(per_minute=0)
+    assert all(client.get("/api/chat").status_code == 200 for _ in range(5))
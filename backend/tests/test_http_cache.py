@@ -0,0 +1,198 @@
+import gzip
+
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+
+from app.core import http_cache as http_cache_module
+from app.core.http_cache import ResponseCacheMiddleware, compress, etag_matches, negotiate
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(http_cache_module.time, "monotonic", clock)
+    return clock
+
+def make_app(**kwargs):
+    """App with cached endpoints that count how often they really run."""
+    app = FastAPI()
+    app.state.calls = 0
+
+    @app.get("/items")
+    async def items(q: str = "", n: int = 100):
+        app.state.calls += 1
+        return {"q": q, "items": [f"item {i}" for i in range(n)]}
+
+    @app.get("/private")
+    async def private(response: Response):
+        app.state.calls += 1
+        response.set_cookie("session", "secret")
+        response.headers["Cache-Control"] = "private, max-age=10"
+        return {"items": ["x"] * 200}
+
+    @app.get("/missing")
+    async def missing():
+        app.state.calls += 1
+        return Response(status_code=404)
+
+    @app.get("/uncached")
+    async def uncached():
+        app.state.calls += 1
+        return {"ok": True}
+
+    @app.post("/items")
+    async def create():
+        app.state.calls += 1
+        return {"ok": True}
+
+    app.add_middleware(ResponseCacheMiddleware, paths={"/items": 60, "/private": 60, "/missing": 60}, **kwargs)
+    return app
+
+IDENTITY = {"Accept-Encoding": "identity"}
+
+@pytest.mark.parametrize("accept, expected", [
+    ("", "identity"),
+    ("gzip", "gzip"),
+    ("gzip, br", "br"),
+    ("br;q=0.5, gzip", "gzip"),
+    ("gzip;q=0", "identity"),
+    ("*", "br"),
+    ("*;q=0.5, identity", "identity"),
+    ("GZIP;q=0.8, identity;q=0.5", "gzip"),
+    ("gzip;q=oops", "identity"),
+])
+def test_negotiate_picks_the_best_accepted_coding(accept, expected):
+    assert negotiate(accept, {"identity": b"", "gzip": b"", "br": b""}) == expected
+
+def test_negotiate_only_offers_stored_variants():
+    assert negotiate("br", {"identity": b"", "gzip": b""}) == "identity"
+    assert negotiate("br, gzip", {"identity": b"", "gzip": b""}) == "gzip"
+
+def test_compress_skips_small_or_incompressible_bodies():
+    body = b'{"items": ["' + b"abc" * 500 + b'"]}'
+    bodies = compress(body, min_size=512)
+    assert gzip.decompress(bodies["gzip"]) == body
+    assert len(bodies["gzip"]) < len(body)
+    assert compress(body[:100], min_size=512) == {"identity": body[:100]}
+    noise = bytes(range(256)) * 2
+    assert "gzip" not in compress(gzip.compress(noise * 8), min_size=16)
+
+@pytest.mark.parametrize("header, matches", [
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"nope", "abc"', True),
+    ("*", True),
+    ('"nope"', False),
+    ("", False),
+])
+def test_etag_matches_weakly(header, matches):
+    assert etag_matches(header, b'"abc"') is matches
+
+def test_second_request_is_served_from_cache():
+    app = make_app()
+    with TestClient(app) as client:
+        first = client.get("/items", params={"q": "a", "n": 5}, headers=IDENTITY)
+        second = client.get("/items?n=5&q=a", headers=IDENTITY)
+        assert (first.headers["x-cache"], second.headers["x-cache"]) == ("MISS", "HIT")
+        assert second.content == first.content and second.json()["q"] == "a"
+        assert app.state.calls == 1
+        assert second.headers["etag"] == first.headers["etag"]
+        assert second.headers["cache-control"] == "public, max-age=60"
+        assert second.headers["vary"] == "Accept-Encoding"
+        assert second.headers["content-type"] == "application/json"
+        assert int(second.headers["content-length"]) == len(second.content)
+
+        assert client.get("/items", params={"q": "b", "n": 5}).headers["x-cache"] == "MISS"
+        assert app.state.calls == 2
+
+def test_matching_etag_gets_not_modified():
+    app = make_app()
+    with TestClient(app) as client:
+        etag = client.get("/items", headers=IDENTITY).headers["etag"]
+        response = client.get("/items", headers={"If-None-Match": f'"stale", W/{etag}'})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+        assert "content-type" not in response.headers
+        assert client.get("/items", headers={"If-None-Match": '"stale"'}).status_code == 200
+        assert app.state.calls == 1
+
+def test_responses_are_compressed_per_accept_encoding():
+    app = make_app()
+    with TestClient(app) as client:
+        plain = client.get("/items", headers=IDENTITY)
+        zipped = client.get("/items", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in plain.headers
+        assert zipped.headers["content-encoding"] == "gzip"
+        assert int(zipped.headers["content-length"]) < len(plain.content)
+        # httpx decodes the body; the variants hold the same JSON
+        assert zipped.content == plain.content
+        assert zipped.headers["etag"] == plain.headers["etag"]
+
+        small = client.get("/items", params={"n": 1}, headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in small.headers
+
+def test_brotli_is_preferred_when_installed():
+    pytest.importorskip("brotli")
+    with TestClient(make_app()) as client:
+        assert client.get("/items", headers={"Accept-Encoding": "gzip, br"}).headers["content-encoding"] == "br"
+
+@pytest.mark.parametrize("path", ["/private", "/missing"])
+def test_cookies_and_errors_are_not_cached(path):
+    app = make_app()
+    with TestClient(app) as client:
+        first = client.get(path)
+        second = client.get(path)
+        assert "x-cache" not in second.headers
+        assert first.status_code == second.status_code
+        assert app.state.calls == 2
+
+def test_other_paths_methods_and_disabled_cache_pass_through():
+    app = make_app()
+    with TestClient(app) as client:
+        for _ in range(2):
+            assert "x-cache" not in client.get("/uncached").headers
+            assert "x-cache" not in client.post("/items").headers
+        assert app.state.calls == 4
+
+    app = make_app(enabled=False)
+    with TestClient(app) as client:
+        client.get("/items")
+        assert "x-cache" not in client.get("/items").headers
+        assert app.state.calls == 2
+
+def test_entries_expire_after_max_age(clock):
+    app = make_app()
+    with TestClient(app) as client:
+        client.get("/items")
+        clock.now += 59
+        assert client.get("/items").headers["x-cache"] == "HIT"
+        clock.now += 2
+        assert client.get("/items").headers["x-cache"] == "MISS"
+        assert app.state.calls == 2
+
+def test_least_recently_used_entries_are_evicted():
+    app = make_app(max_entries=2)
+    with TestClient(app) as client:
+        for q in ("a", "b", "a", "c"):
+            client.get("/items", params={"q": q})
+        assert client.get("/items", params={"q": "a"}).headers["x-cache"] == "HIT"
+        assert client.get("/items", params={"q": "b"}).headers["x-cache"] == "MISS"
+
+def test_catalog_endpoints_are_cached_in_the_app():
+    from main import app
+
+    with TestClient(app) as client:
+        params = {"query": "par", "limit": 7}
+        first = client.get("/api/destinations", params=params)
+        second = client.get("/api/destinations", params=params, headers={"If-None-Match": first.headers["etag"]})
+        assert first.status_code == 200
+        assert second.status_code == 304
+        assert second.headers["cache-control"] == first.headers["cache-control"]
@@ -0,0 +1,133 @@
+import numpy as np
+import pytest
+
+from app.models.chat import TripItinerary
+from app.services.itinerary_optimizer import ItineraryOptimizer, _Stops, parse_clock, travel_minutes
+
+ATTRACTIONS = [
+    {"city": "Testville", "name": "Old Castle", "aliases": ["Castle Keep"], "tags": ["castle", "museum"],
+     "lat": 0.0, "lon": 0.0, "hours": ["09:00", "18:00"], "visit_minutes": 120},
+    {"city": "Testville", "name": "Harbour Market", "tags": ["market"],
+     "lat": 0.0, "lon": 0.01, "hours": ["07:00", "12:00"], "visit_minutes": 60},
+    {"city": "Testville", "name": "Night Bazaar", "aliases": ["Bazaar"], "tags": ["market", "shopping"],
+     "lat": 0.01, "lon": 0.0, "hours": ["18:00", "02:00"], "visit_minutes": 60},
+    {"city": "Testville", "name": "Hill Temple", "tags": ["temple"],
+     "lat": 0.01, "lon": 0.01, "hours": ["09:00", "17:00"], "visit_minutes": 90},
+    {"city": "Testville", "name": "City Park", "tags": ["park"],
+     "lat": 0.005, "lon": 0.02, "hours": None, "visit_minutes": 60},
+]
+PLACES = [{"name": "Testville", "aliases": ["Test City"]}]
+WINDOWS = {entry["name"]: entry["hours"] or ["00:00", "24:00"] for entry in ATTRACTIONS}
+
+def optimizer(**kwargs):
+    return ItineraryOptimizer(ATTRACTIONS, PLACES, **kwargs)
+
+def itinerary(*days, destination="Testville"):
+    return TripItinerary(
+        destination=destination,
+        duration=f"{len(days)} days",
+        daily_plans=[{"day": i + 1, "activities": list(activities)} for i, activities in enumerate(days)],
+        total_cost={},
+        transport_options=[],
+        accommodation_suggestions=[],
+        food_recommendations=[],
+        hidden_gems=[],
+        tips=[]
+    )
+
+def back_at(optimizer, entry):
+    """When the day's last stop is left and the traveller is back at the start point."""
+    center = np.array([np.median([a["lat"] for a in ATTRACTIONS]), np.median([a["lon"] for a in ATTRACTIONS])])
+    place = next(a for a in ATTRACTIONS if a["name"] == entry["place"])
+    travel = travel_minutes(np.array([place["lat"], center[0]]), np.array([place["lon"], center[1]]))
+    return parse_clock(entry["end"]) + travel[0, 1]
+
+def assert_within_hours(plans):
+    for plan in plans:
+        for entry in plan["schedule"]:
+            opens, closes = (parse_clock(value) for value in WINDOWS[entry["place"]])
+            closes += 24 * 60 if closes <= opens else 0
+            start, end = parse_clock(entry["start"]), parse_clock(entry["end"])
+            end += 24 * 60 if end < start else 0
+            assert opens <= start and end <= closes, entry
+
+def test_geocode_prefers_names_over_tags():
+    optimize = optimizer()
+    city = optimize.city("Test City, Nowhere")
+    assert city == "testville"
+    names = {
+        activity: optimize.attractions[optimize.geocode(city, activity)].name
+        for activity in ["Visit the castle keep", "Shopping at the Bazaar", "Morning market", "A temple walk"]
+    }
+    assert names == {
+        "Visit the castle keep": "Old Castle",
+        "Shopping at the Bazaar": "Night Bazaar",
+        "Morning market": "Harbour Market",
+        "A temple walk": "Hill Temple",
+    }
+    assert optimize.geocode(city, "Spa afternoon") is None
+    assert optimize.city("Atlantis") is None
+
+def test_stops_are_visited_within_opening_hours():
+    trip = itinerary(["Night Bazaar", "Hill Temple", "Harbour Market", "Old Castle"])
+    plans = optimizer().optimize(trip).daily_plans
+    assert_within_hours(plans)
+    places = [entry["place"] for entry in plans[0]["schedule"]]
+    assert places[-1] == "Night Bazaar"
+    assert plans[0]["activities"] == [entry["activity"] for entry in plans[0]["schedule"]]
+    assert plans[0]["travel_minutes"] > 0
+
+def test_time_of_day_narrows_the_window():
+    plans = optimizer().optimize(itinerary(["Lunch at the Old Castle", "Hill Temple"])).daily_plans
+    castle = next(entry for entry in plans[0]["schedule"] if entry["place"] == "Old Castle")
+    assert parse_clock(castle["start"]) >= parse_clock("11:30")
+    assert parse_clock(castle["end"]) <= parse_clock("14:30")
+
+def test_stops_that_do_not_fit_move_to_other_days():
+    # Everything is planned on the first day, which cannot hold it all by 15:00
+    trip = itinerary(["Old Castle", "Hill Temple", "Harbour Market", "City Park"], [], [])
+    optimize = optimizer(day_end=parse_clock("15:00"))
+    plans = optimize.optimize(trip).daily_plans
+    assert_within_hours(plans)
+    assert sorted(entry["place"] for plan in plans for entry in plan["schedule"]) == [
+        "City Park", "Harbour Market", "Hill Temple", "Old Castle"
+    ]
+    assert sum(1 for plan in plans if plan["schedule"]) >= 2
+    for plan in plans:
+        if plan["schedule"]:
+            assert back_at(optimize, plan["schedule"][-1]) <= optimize.day_end
+
+def test_the_day_must_end_back_at_the_start_point():
+    optimize = optimizer(day_start=parse_clock("09:00"))
+    stops = _Stops(
+        travel=np.array([[0.0, 60.0], [60.0, 0.0]]),
+        opens=np.array([0, 0]),
+        closes=np.array([48 * 60, 24 * 60]),
+        visit=np.array([0, 60])
+    )
+    slots, feasible = optimize._timeline(stops, [1], parse_clock("11:30"))
+    assert slots == [(parse_clock("10:00"), parse_clock("11:00"))]
+    assert not feasible
+    assert optimize._timeline(stops, [1], parse_clock("12:00"))[1]
+    assert optimize._timeline(stops, [], parse_clock("09:00"))[1]
+
+def test_activities_that_cannot_be_geocoded_stay_on_their_day():
+    trip = itinerary(["Relax at the hotel spa", "Old Castle"], ["Cooking class", "Hill Temple", "Harbour Market"])
+    plans = optimizer().optimize(trip).daily_plans
+    scheduled = {entry["activity"] for plan in plans for entry in plan["schedule"]}
+    assert scheduled == {"Old Castle", "Hill Temple", "Harbour Market"}
+    assert plans[0]["activities"][-1] == "Relax at the hotel spa"
+    assert plans[1]["activities"][-1] == "Cooking class"
+    assert sum(len(plan["activities"]) for plan in plans) == 5
+
+@pytest.mark.parametrize("trip", [
+    itinerary(["Old Castle", "Spa"]),
+    itinerary(["Old Castle", "Hill Temple"], destination="Atlantis"),
+    itinerary(),
+])
+def test_unlocatable_itineraries_are_unchanged(trip):
+    assert optimizer().optimize(trip) is trip
+
+def test_disabled_optimizer_is_a_no_op():
+    trip = itinerary(["Old Castle", "Hill Temple"])
+    assert optimizer(enabled=False).optimize(trip) is trip
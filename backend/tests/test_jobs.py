@@ -0,0 +1,268 @@
+from datetime import datetime, timedelta
+import asyncio
+import json
+
+import fakeredis
+import httpx
+import pytest
+
+from app.models.chat import TripItinerary, TripPreferences
+from app.models.jobs import JobStatus, PlanJob
+from app import worker
+from app.services import jobs as jobs_module
+from app.services.jobs import (
+    GENERATION_FAILED, InProcessJobQueue, InvalidCallbackURLError, JobQueue,
+    claim_callbacks, register_callback, validate_callback_url
+)
+
+def make_itinerary(preferences):
+    return TripItinerary(
+        destination=preferences.destination,
+        duration=preferences.duration or "3 days",
+        daily_plans=[{"day": "1", "activities": ["Walking tour"], "cost": 40.0}],
+        total_cost={"total": 40.0},
+        transport_options=[],
+        accommodation_suggestions=[],
+        food_recommendations=[],
+        hidden_gems=[],
+        tips=[],
+    )
+
+class FakeGenerator:
+    """Itinerary generator that blocks until released and counts calls."""
+
+    def __init__(self, result=make_itinerary):
+        self.result = result
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self, preferences):
+        self.calls += 1
+        await self.release.wait()
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result(preferences) if self.result else None
+
+class FakeClients:
+    """Stands in for the shared pool, sending webhooks to a mock transport."""
+
+    def __init__(self):
+        self.requests = []
+        self.delivered = asyncio.Event()
+
+    def handle(self, request):
+        self.requests.append(request)
+        self.delivered.set()
+        return httpx.Response(204)
+
+    def get(self, name="default", timeout=5.0):
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handle), timeout=timeout)
+
+@pytest.fixture
+def clients(monkeypatch):
+    clients = FakeClients()
+    monkeypatch.setattr(jobs_module, "http_clients", clients)
+    return clients
+
+async def delivered(clients, count):
+    for _ in range(100):
+        if len(clients.requests) >= count:
+            return {json.loads(request.content)["callback_url"]: json.loads(request.content) for request in clients.requests}
+        await asyncio.sleep(0)
+    raise AssertionError(f"expected {count} webhooks, got {len(clients.requests)}")
+
+async def finished(queue, job_id):
+    for _ in range(100):
+        job = await queue.get(job_id)
+        if job.status in (JobStatus.SUCCEEDED, JobStatus.FAILED):
+            return job
+        await asyncio.sleep(0)
+    raise AssertionError(f"job {job_id} did not finish")
+
+def test_job_queue_is_abstract():
+    with pytest.raises(TypeError):
+        JobQueue()
+
+@pytest.mark.asyncio
+async def test_identical_preferences_share_one_job(clients):
+    generate = FakeGenerator()
+    queue = InProcessJobQueue(generate, concurrency=2, result_ttl=3600)
+    try:
+        first = await queue.enqueue(TripPreferences(destination="Lisbon", duration="3 days"))
+        again = await queue.enqueue(TripPreferences(duration="3 days", destination="Lisbon"))
+        other = await queue.enqueue(TripPreferences(destination="Porto"))
+        assert again.job_id == first.job_id
+        assert other.job_id != first.job_id
+
+        generate.release.set()
+        await finished(queue, first.job_id)
+        assert generate.calls == 2
+    finally:
+        await queue.close()
+
+@pytest.mark.asyncio
+async def test_status_moves_from_pending_to_succeeded(clients):
+    generate = FakeGenerator()
+    queue = InProcessJobQueue(generate, concurrency=1, result_ttl=3600)
+    try:
+        job = await queue.enqueue(TripPreferences(destination="Lisbon"))
+        assert (await queue.get(job.job_id)).status == JobStatus.PENDING
+        await asyncio.sleep(0)
+        assert (await queue.get(job.job_id)).status == JobStatus.RUNNING
+
+        generate.release.set()
+        job = await finished(queue, job.job_id)
+        assert job.status == JobStatus.SUCCEEDED
+        assert job.result.destination == "Lisbon"
+        assert await queue.get("unknown") is None
+    finally:
+        await queue.close()
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("result, error", [(None, GENERATION_FAILED), (RuntimeError("upstream down"), "upstream down")])
+async def test_failed_jobs_are_retried_on_enqueue(clients, result, error):
+    generate = FakeGenerator(result)
+    generate.release.set()
+    queue = InProcessJobQueue(generate, concurrency=1, result_ttl=3600)
+    try:
+        preferences = TripPreferences(destination="Lisbon")
+        failed = await finished(queue, (await queue.enqueue(preferences)).job_id)
+        assert failed.status == JobStatus.FAILED
+        assert failed.error == error
+
+        retried = await queue.enqueue(preferences)
+        assert retried.job_id != failed.job_id
+    finally:
+        await queue.close()
+
+@pytest.mark.asyncio
+async def test_finished_jobs_expire_after_ttl(clients):
+    generate = FakeGenerator()
+    generate.release.set()
+    queue = InProcessJobQueue(generate, concurrency=1, result_ttl=60)
+    try:
+        preferences = TripPreferences(destination="Lisbon")
+        job = await finished(queue, (await queue.enqueue(preferences)).job_id)
+        job.updated_at = datetime.utcnow() - timedelta(seconds=61)
+
+        fresh = await queue.enqueue(preferences)
+        assert fresh.job_id != job.job_id
+        assert await queue.get(job.job_id) is None
+    finally:
+        await queue.close()
+
+@pytest.mark.asyncio
+async def test_webhook_receives_the_finished_job(clients):
+    generate = FakeGenerator()
+    generate.release.set()
+    queue = InProcessJobQueue(generate, concurrency=1, result_ttl=3600)
+    try:
+        job = await queue.enqueue(TripPreferences(destination="Lisbon"), callback_url="https://example.com/hook")
+        await asyncio.wait_for(clients.delivered.wait(), timeout=1)
+
+        request = clients.requests[0]
+        assert request.method == "POST"
+        assert str(request.url) == "https://example.com/hook"
+        body = json.loads(request.content)
+        assert body["job_id"] == job.job_id
+        assert body["callback_url"] == "https://example.com/hook"
+        assert body["status"] == JobStatus.SUCCEEDED.value
+        assert body["result"]["destination"] == "Lisbon"
+    finally:
+        await queue.close()
+
+@pytest.mark.asyncio
+async def test_webhook_failures_do_not_fail_the_job(clients):
+    def refuse(request):
+        clients.delivered.set()
+        raise httpx.ConnectError("connection refused", request=request)
+
+    clients.handle = refuse
+    generate = FakeGenerator()
+    generate.release.set()
+    queue = InProcessJobQueue(generate, concurrency=1, result_ttl=3600)
+    try:
+        job = await queue.enqueue(TripPreferences(destination="Lisbon"), callback_url="https://example.com/hook")
+        await asyncio.wait_for(clients.delivered.wait(), timeout=1)
+        assert (await finished(queue, job.job_id)).status == JobStatus.SUCCEEDED
+    finally:
+        await queue.close()
+
+@pytest.mark.asyncio
+async def test_shared_jobs_notify_every_callback(clients):
+    generate = FakeGenerator()
+    queue = InProcessJobQueue(generate, concurrency=1, result_ttl=3600)
+    try:
+        preferences = TripPreferences(destination="Lisbon")
+        first = await queue.enqueue(preferences, callback_url="https://a.example.com/hook")
+        second = await queue.enqueue(preferences, callback_url="https://b.example.com/hook")
+        silent = await queue.enqueue(preferences)
+        assert second.job_id == first.job_id == silent.job_id
+        assert first.callback_url == "https://a.example.com/hook"
+        assert second.callback_url == "https://b.example.com/hook"
+        assert silent.callback_url is None
+        assert (await queue.get(first.job_id)).callback_url is None
+
+        generate.release.set()
+        bodies = await delivered(clients, 2)
+        assert set(bodies) == {"https://a.example.com/hook", "https://b.example.com/hook"}
+        assert all(body["job_id"] == first.job_id for body in bodies.values())
+
+        # Joining a finished job still notifies the new caller
+        late = await queue.enqueue(preferences, callback_url="https://c.example.com/hook")
+        assert late.job_id == first.job_id
+        assert (await delivered(clients, 3))["https://c.example.com/hook"]["status"] == JobStatus.SUCCEEDED.value
+        assert generate.calls == 1
+    finally:
+        await queue.close()
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("url", [
+    "ftp://example.com/hook",
+    "/relative/hook",
+    "http://localhost:8000/hook",
+    "http://127.0.0.1/hook",
+    "http://10.0.0.5/hook",
+    "http://169.254.169.254/latest/meta-data",
+    "http://[::1]/hook",
+    "http://example.com:99999/hook",
+])
+async def test_internal_or_malformed_callback_urls_are_rejected(url):
+    with pytest.raises(InvalidCallbackURLError):
+        await validate_callback_url(url)
+
+@pytest.mark.asyncio
+async def test_public_and_allowed_callback_urls_are_accepted(monkeypatch):
+    await validate_callback_url("https://93.184.216.34/hook")
+
+    monkeypatch.setattr(jobs_module.settings, "JOB_WEBHOOK_ALLOWED_HOSTS", ["Hooks.Example.com"])
+    await validate_callback_url("https://hooks.example.com/hook")
+    with pytest.raises(InvalidCallbackURLError):
+        await validate_callback_url("https://93.184.216.34/hook")
+
+@pytest.mark.asyncio
+async def test_celery_callbacks_are_handed_off_exactly_once():
+    redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    assert await register_callback(redis, "job", "https://a.example.com/hook", 60) is None
+
+    job = PlanJob(job_id="job", status=JobStatus.SUCCEEDED)
+    assert await claim_callbacks(redis, job, 60) == {"https://a.example.com/hook"}
+
+    # Added after the worker notified: the caller gets the finished job to notify itself
+    late = await register_callback(redis, "job", "https://b.example.com/hook", 60)
+    assert late.job_id == "job" and late.status == JobStatus.SUCCEEDED
+    assert await redis.smembers("tripmate:plan-job-callbacks:job") == set()
+
+def test_worker_tasks_share_one_event_loop(monkeypatch):
+    redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(worker, "_get_redis", lambda: redis)
+    try:
+        first = worker.generate_itinerary_task.apply(args=[{"destination": "Lisbon"}]).get()
+        loop = worker._loop
+        second = worker.generate_itinerary_task.apply(args=[{"destination": "Porto"}]).get()
+        assert first["destination"] == "Lisbon"
+        assert second["destination"] == "Porto"
+        assert worker._loop is loop
+    finally:
+        worker._shutdown_worker_process()
+    assert loop.is_closed()
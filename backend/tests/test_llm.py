@@ -0,0 +1,28 @@
+import pytest
+
+from app.services.context_builder import approximate_tokens
+from app.services.llm.base import LLMProvider
+from app.services.llm.stub import STUB_PROFILES, StubProvider
+
+MESSAGES = [{"role": "system", "content": "You are a helpful assistant."}, {"role": "user", "content": "Hi there"}]
+
+def test_incomplete_providers_cannot_be_created():
+    class CompleteOnly(LLMProvider):
+        async def complete(self, messages, max_tokens, temperature, json_mode=False):
+            raise AssertionError
+
+    with pytest.raises(TypeError):
+        CompleteOnly("model")
+
+@pytest.mark.asyncio
+async def test_stub_usage_matches_the_shared_token_estimate():
+    provider = StubProvider(profile=STUB_PROFILES["instant"])
+    completion = await provider.complete(MESSAGES, 100, 0.7)
+    assert completion.prompt_tokens == sum(approximate_tokens(message["content"]) for message in MESSAGES)
+    assert completion.completion_tokens == approximate_tokens(completion.content)
+
+@pytest.mark.asyncio
+async def test_stub_stream_matches_completion():
+    provider = StubProvider(profile=STUB_PROFILES["instant"])
+    streamed = "".join([delta async for delta in provider.stream(MESSAGES, 100, 0.7)])
+    assert streamed == (await provider.complete(MESSAGES, 100, 0.7)).content
@@ -0,0 +1,149 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.models.chat import TripItinerary, TripPreferences
+from app.services.jobs import GENERATION_FAILED, generate_batch
+
+def make_itinerary(preferences):
+    return TripItinerary(
+        destination=preferences.destination,
+        duration=preferences.duration or "3 days",
+        daily_plans=[{"day": "1", "activities": ["Walking tour"]}],
+        total_cost={"total": 40.0},
+        transport_options=[],
+        accommodation_suggestions=[],
+        food_recommendations=[],
+        hidden_gems=[],
+        tips=[],
+    )
+
+class GatedGenerator:
+    """Generator whose calls block until their destination's gate opens."""
+
+    def __init__(self, results=None):
+        self.results = results or {}
+        self.gates = {}
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self.cancelled = 0
+
+    def gate(self, destination):
+        return self.gates.setdefault(destination, asyncio.Event())
+
+    async def __call__(self, preferences):
+        self.calls.append(preferences.destination)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await self.gate(preferences.destination).wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.active -= 1
+        result = self.results.get(preferences.destination, make_itinerary)
+        if isinstance(result, Exception):
+            raise result
+        return result(preferences) if result else None
+
+def batch(*destinations):
+    return [TripPreferences(destination=destination, duration="3 days") for destination in destinations]
+
+@pytest.mark.asyncio
+async def test_identical_preferences_are_generated_once():
+    generate = GatedGenerator()
+    for destination in ("Paris", "Rome", "Lisbon"):
+        generate.gate(destination).set()
+    results = [item async for item in generate_batch(generate, batch("Paris", "Rome", "Paris", "Lisbon", "Paris"), 4)]
+
+    assert sorted(generate.calls) == ["Lisbon", "Paris", "Rome"]
+    by_destination = {itinerary.destination: indices for indices, itinerary, _ in results}
+    assert by_destination == {"Paris": [0, 2, 4], "Rome": [1], "Lisbon": [3]}
+
+@pytest.mark.asyncio
+async def test_results_arrive_in_completion_order():
+    generate = GatedGenerator()
+    items = generate_batch(generate, batch("Paris", "Rome", "Lisbon"), 3)
+    first = asyncio.ensure_future(items.__anext__())
+    await asyncio.sleep(0)
+    generate.gate("Lisbon").set()
+    assert (await first)[0] == [2]
+    generate.gate("Paris").set()
+    assert (await items.__anext__())[0] == [0]
+    generate.gate("Rome").set()
+    assert (await items.__anext__())[0] == [1]
+
+@pytest.mark.asyncio
+async def test_concurrency_is_capped():
+    generate = GatedGenerator()
+    destinations = [f"City {i}" for i in range(6)]
+    items = generate_batch(generate, batch(*destinations), 2)
+    pending = asyncio.ensure_future(items.__anext__())
+    for _ in range(5):
+        await asyncio.sleep(0)
+    assert generate.active == 2
+    for destination in destinations:
+        generate.gate(destination).set()
+    results = [await pending] + [item async for item in items]
+    assert len(results) == 6
+    assert generate.peak == 2
+
+@pytest.mark.asyncio
+async def test_failures_are_yielded_as_errors():
+    generate = GatedGenerator({"Rome": RuntimeError("upstream exploded"), "Lisbon": None})
+    for destination in ("Paris", "Rome", "Lisbon"):
+        generate.gate(destination).set()
+    results = {indices[0]: (itinerary, error) async for indices, itinerary, error in generate_batch(
+        generate, batch("Paris", "Rome", "Lisbon"), 2
+    )}
+    assert results[0][0].destination == "Paris" and results[0][1] is None
+    assert results[1] == (None, "upstream exploded")
+    assert results[2] == (None, GENERATION_FAILED)
+
+@pytest.mark.asyncio
+async def test_closing_the_stream_cancels_pending_generations():
+    generate = GatedGenerator()
+    generate.gate("Paris").set()
+    items = generate_batch(generate, batch("Paris", "Rome", "Lisbon"), 3)
+    assert (await items.__anext__())[0] == [0]
+    await items.aclose()
+    await asyncio.sleep(0)
+    assert generate.cancelled == 2
+    assert generate.active == 0
+
+def read_lines(response):
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+def test_endpoint_streams_one_line_per_request(monkeypatch):
+    from main import app
+
+    async def generate(preferences, bypass_cache=False):
+        if preferences.destination == "Atlantis":
+            return None
+        if preferences.destination == "Rome":
+            raise RuntimeError("upstream exploded")
+        return make_itinerary(preferences)
+
+    monkeypatch.setattr(routes.ai_service, "_generate_itinerary", generate)
+    body = {"preferences": [{"destination": name} for name in ("Paris", "Atlantis", "Paris", "Rome")]}
+    with TestClient(app) as client:
+        response = client.post("/api/plan/batch", json=body)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = sorted(read_lines(response), key=lambda line: line["index"])
+
+        assert [line["index"] for line in lines] == [0, 1, 2, 3]
+        assert [line["status"] for line in lines] == ["succeeded", "failed", "succeeded", "failed"]
+        assert lines[0]["result"] == lines[2]["result"]
+        assert lines[0]["result"]["destination"] == "Paris"
+        assert lines[1] == {"index": 1, "status": "failed", "result": None, "error": GENERATION_FAILED}
+        assert lines[3]["error"] == "upstream exploded"
+
+        assert client.post("/api/plan/batch", json={"preferences": []}).status_code == 422
+        too_many = {"preferences": [{"destination": f"City {i}"} for i in range(101)]}
+        assert client.post("/api/plan/batch", json=too_many).status_code == 422
@@ -0,0 +1,48 @@
+import pytest
+
+from app.core.config import settings
+from app.services.preference_extractor import RuleBasedPreferenceExtractor
+
+THRESHOLD = settings.PREFERENCE_CONFIDENCE_THRESHOLD
+
+@pytest.fixture(scope="module")
+def extractor():
+    return RuleBasedPreferenceExtractor()
+
+@pytest.mark.parametrize("message, expected", [
+    ("I want a 3 day budget trip to Bali for 2 in May", {"destination": "Bali", "people": 2, "duration": "3 days"}),
+    ("Family of 4 wants to visit Kyoto by train with $3000", {"people": 4, "budget": "$3000"}),
+    ("Kyoto, Japan for 5 days with my husband", {"destination": "Kyoto", "people": 2}),
+    ("Is Marrakech good for 3 travelers on a moderate budget?", {"budget": "medium", "people": 3}),
+])
+def test_clear_messages_skip_the_llm(extractor, message, expected):
+    result = extractor.extract(message)
+    assert result.confidence >= THRESHOLD
+    for field, value in expected.items():
+        assert getattr(result.preferences, field) == value
+
+@pytest.mark.parametrize("message, field", [
+    ("Paris with my wife and our two kids", "people"),
+    ("Bali or maybe somewhere cheaper in Thailand", "destination"),
+    ("budget around two grand", "budget"),
+    ("Luxury hotels but cheap flights to Dubai", "budget"),
+    ("4 days in Rome then 3 days in Florence", "duration"),
+])
+def test_ambiguous_fields_fall_back_to_the_llm(extractor, message, field):
+    result = extractor.extract(message)
+    assert result.field_confidence[field] < THRESHOLD
+    assert result.confidence < THRESHOLD
+
+@pytest.mark.parametrize("message", [
+    "Taking my parents to Lisbon for 5 days",
+    "Rome with friends, five thousand dollars for a week",
+])
+def test_unresolved_cues_lower_confidence(extractor, message):
+    result = extractor.extract(message)
+    assert all(confidence >= THRESHOLD for confidence in result.field_confidence.values())
+    assert result.confidence < THRESHOLD
+
+def test_nothing_extracted_is_not_confident(extractor):
+    result = extractor.extract("Take me somewhere warm")
+    assert result.fields == set()
+    assert result.confidence < THRESHOLD
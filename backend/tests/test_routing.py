@@ -0,0 +1,144 @@
+from heapq import heappop, heappush
+import math
+import random
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.services.routing import ALL_MODES, MODES, RouteEngine, TransportGraph, mode_mask
+
+def build_graph(places, links, aliases=None):
+    """Graph from ``{name: (lat, lon)}`` and one-way ``(from, to, mode, minutes, usd)`` links."""
+    names = list(places)
+    ids = {name: i for i, name in enumerate(names)}
+    columns = list(zip(*((ids[a], ids[b], MODES.index(mode), minutes, usd) for a, b, mode, minutes, usd in links)))
+    return TransportGraph(
+        names=names,
+        lat=np.array([places[name][0] for name in names]),
+        lon=np.array([places[name][1] for name in names]),
+        sources=np.array(columns[0]),
+        targets=np.array(columns[1]),
+        modes=np.array(columns[2]),
+        durations=np.array(columns[3]),
+        costs=np.array(columns[4]),
+        aliases={alias: ids[name] for alias, name in (aliases or {}).items()}
+    )
+
+# Four towns about 111 km apart on the equator, with one direct flight and
+# two-leg train and bus routes, plus a slow and expensive route via C
+PLACES = {"A": (0.0, 0.0), "B": (0.0, 1.0), "C": (0.0, 2.0), "D": (0.0, 3.0), "Island": (10.0, 10.0)}
+LINKS = [
+    ("A", "D", "flight", 60, 300),
+    ("A", "B", "train", 80, 40),
+    ("B", "D", "train", 100, 50),
+    ("A", "C", "bus", 150, 20),
+    ("C", "D", "bus", 200, 20),
+    ("A", "C", "train", 250, 100),
+]
+
+@pytest.fixture(scope="module")
+def engine():
+    return RouteEngine(build_graph(PLACES, LINKS, aliases={"Alpha": "A"}))
+
+def node(engine, name):
+    return engine.graph.node_id(name)
+
+def summary(engine, plan):
+    graph = engine.graph
+    stops = [graph.names[graph.sources[plan.edges[0]]]] + [graph.names[graph.targets[edge]] for edge in plan.edges]
+    return "-".join(stops), plan.duration, plan.cost
+
+def test_shortest_finds_the_optimum_on_each_criterion(engine):
+    a, d = node(engine, "A"), node(engine, "D")
+    assert summary(engine, engine.shortest(a, d, "duration")) == ("A-D", 60, 300)
+    assert summary(engine, engine.shortest(a, d, "cost")) == ("A-C-D", 350, 40)
+    assert summary(engine, engine.shortest(a, d, "duration", mode_mask(["train"]))) == ("A-B-D", 180, 90)
+    assert engine.shortest(a, d, "duration", mode_mask(["flight", "bus"])).cost == 300
+
+def test_pareto_front_has_no_dominated_routes(engine):
+    plans = engine.pareto(node(engine, "A"), node(engine, "D"))
+    assert [summary(engine, plan) for plan in plans] == [("A-D", 60, 300), ("A-B-D", 180, 90), ("A-C-D", 350, 40)]
+    for plan in plans:
+        assert not any(
+            other.duration <= plan.duration and other.cost <= plan.cost and other is not plan for other in plans
+        )
+
+def test_unknown_and_unreachable_places(engine):
+    assert node(engine, "Atlantis") is None
+    assert node(engine, "  alpha ") == node(engine, "A")
+    island, a = node(engine, "Island"), node(engine, "A")
+    assert engine.shortest(a, island) is None
+    assert engine.pareto(a, island) == []
+    # Links are one-way here, so nothing leads back to A
+    assert engine.routes(node(engine, "D"), a) == []
+    assert engine.routes(a, a) == []
+    assert engine.shortest(a, node(engine, "D"), allowed=mode_mask(["bus"])).edges
+    with pytest.raises(ValueError):
+        mode_mask(["boat"])
+
+def test_short_edges_count_towards_the_heuristic_rate():
+    # S and T are under a kilometre apart; the two hops via M are faster and
+    # cheaper per km than the only long edge, so skipping them overestimates
+    places = {"S": (0.0, 0.0), "M": (0.0, 0.004), "T": (0.0, 0.008), "P": (1.0, 0.0), "Q": (2.0, 0.0)}
+    links = [
+        ("S", "T", "bus", 0.8, 0.8),
+        ("S", "M", "bus", 0.2, 0.2),
+        ("M", "T", "bus", 0.2, 0.2),
+        ("P", "Q", "flight", 1000, 1000),
+    ]
+    graph = build_graph(places, links)
+    assert graph.min_minutes_per_km == pytest.approx(0.2 / 0.4448, rel=1e-3)
+    engine = RouteEngine(graph)
+    s, t = graph.node_id("S"), graph.node_id("T")
+    for by in ("duration", "cost"):
+        plan = engine.shortest(s, t, by)
+        assert summary(engine, plan)[0] == "S-M-T"
+        assert plan.duration == pytest.approx(0.4)
+
+def dijkstra(graph, source, target, weights):
+    best = {source: 0.0}
+    heap = [(0.0, source)]
+    while heap:
+        weight, current = heappop(heap)
+        if current == target:
+            return weight
+        if weight > best[current]:
+            continue
+        for edge in range(graph.indptr[current], graph.indptr[current + 1]):
+            candidate = weight + float(weights[edge])
+            neighbour = int(graph.targets[edge])
+            if candidate < best.get(neighbour, math.inf):
+                best[neighbour] = candidate
+                heappush(heap, (candidate, neighbour))
+    return None
+
+def test_astar_matches_dijkstra_on_a_random_graph():
+    rng = random.Random(7)
+    places = {f"P{i}": (rng.uniform(35, 60), rng.uniform(-10, 30)) for i in range(40)}
+    names = list(places)
+    links = []
+    for _ in range(200):
+        a, b = rng.sample(names, 2)
+        km = float(np.hypot(places[a][0] - places[b][0], places[a][1] - places[b][1])) * 111
+        mode = rng.choice(MODES)
+        links.append((a, b, mode, km / rng.uniform(200, 800) * 60 + rng.uniform(0, 30), km * rng.uniform(0.05, 0.3)))
+    graph = build_graph(places, links)
+    engine = RouteEngine(graph)
+    for _ in range(50):
+        a, b = (graph.node_id(name) for name in rng.sample(names, 2))
+        for by, weights in (("duration", graph.durations), ("cost", graph.costs)):
+            expected = dijkstra(graph, a, b, weights)
+            plan = engine.shortest(a, b, by, ALL_MODES)
+            if expected is None:
+                assert plan is None
+            else:
+                assert getattr(plan, by) == pytest.approx(expected, rel=1e-5)
+
+def test_routes_endpoint_rejects_unknown_places():
+    from main import app
+
+    with TestClient(app) as client:
+        response = client.get("/api/routes", params={"from_location": "Atlantis", "to_location": "Paris"})
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Unknown location: Atlantis"
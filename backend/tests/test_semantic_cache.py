@@ -0,0 +1,85 @@
+import pytest
+
+from app.services import semantic_cache as semantic_cache_module
+from app.services.semantic_cache import EXACT_SCAN_LIMIT, SemanticCache, negated
+
+KEY = '{"destination": "Tokyo"}'
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(semantic_cache_module.time, "monotonic", clock)
+    return clock
+
+def make_cache(**options):
+    return SemanticCache(ttls={"chat": 60}, **options)
+
+@pytest.mark.parametrize("stored, asked", [
+    ("Where should I stay in Tokyo?", "Where should I not stay in Tokyo?"),
+    ("Where should I stay in Tokyo?", "Where shouldn't I stay in Tokyo?"),
+    ("What should I do in Bali?", "What should I avoid in Bali?"),
+    ("What should I avoid in Bali?", "What should I do in Bali?"),
+    ("I want to visit Paris", "I don't want to visit Paris"),
+    ("What should I see in Rome?", "What should I skip in Rome?"),
+])
+def test_opposite_requests_do_not_match(stored, asked):
+    cache = make_cache()
+    cache.set("chat", KEY, stored, "answer")
+    assert cache.get("chat", KEY, asked) is None
+    assert cache.stats()["call_types"]["chat"] == {"hits": 0, "misses": 1}
+
+@pytest.mark.parametrize("stored, asked", [
+    ("Where should I stay in Tokyo?", "Where should we stay in Tokyo?"),
+    ("What's the weather like in Tokyo?", "what is the weather in Tokyo like"),
+    ("Where should I not stay in Tokyo?", "Where shouldn't I stay in Tokyo?"),
+])
+def test_paraphrases_match(stored, asked):
+    cache = make_cache()
+    cache.set("chat", KEY, stored, "answer")
+    assert cache.get("chat", KEY, asked) == "answer"
+
+def test_negation_detection():
+    assert negated("Where shouldn't I stay?")
+    assert negated("I cannot eat gluten")
+    assert negated("Paris without the crowds")
+    assert not negated("Where should I stay? Nothing fancy")
+
+def test_only_equal_keys_match():
+    cache = make_cache()
+    cache.set("chat", KEY, "What food should I try?", "answer")
+    assert cache.get("chat", '{"destination": "Bali"}', "What food should I try?") is None
+    assert cache.get("itinerary", KEY, "What food should I try?") is None
+
+def test_entries_expire(clock):
+    cache = make_cache()
+    cache.set("chat", KEY, "What food should I try?", "answer")
+    clock.now += 61
+    assert cache.get("chat", KEY, "What food should I try?") is None
+    assert len(cache) == 0
+    assert cache.stats()["expirations"] == 1
+
+def test_least_recently_used_entry_is_evicted():
+    cache = make_cache(max_entries=2)
+    cache.set("chat", KEY, "What food should I try?", "food")
+    cache.set("chat", KEY, "Do I need a visa?", "visa")
+    assert cache.get("chat", KEY, "What food should I try?") == "food"
+    cache.set("chat", KEY, "Is it safe for tourists?", "safety")
+    assert cache.get("chat", KEY, "Do I need a visa?") is None
+    assert cache.get("chat", KEY, "What food should I try?") == "food"
+    assert cache.stats()["evictions"] == 1
+
+def test_large_partitions_are_searched_through_lsh():
+    # Digits are not features, so spell each index as letters
+    names = ["".join("abcdefghij"[int(digit)] for digit in f"{index:03d}") for index in range(EXACT_SCAN_LIMIT + 10)]
+    cache = make_cache()
+    for index, name in enumerate(names):
+        cache.set("chat", KEY, f"opening hours of museum {name}", index)
+    assert len(cache) == EXACT_SCAN_LIMIT + 10
+    assert cache.get("chat", KEY, f"opening hours of museum {names[7]}") == 7
@@ -0,0 +1,36 @@
+import os
+
+import pytest
+
+import serve
+
+def test_several_workers_need_celery_jobs(monkeypatch, capsys):
+    monkeypatch.setattr(serve.settings, "JOB_BACKEND", "inprocess")
+    monkeypatch.setattr(serve.settings, "CONVERSATION_STORE", "sql")
+    monkeypatch.setattr(serve.uvicorn, "run", lambda *args, **kwargs: pytest.fail("server started"))
+    with pytest.raises(SystemExit):
+        serve.main(["--workers", "2"])
+    assert "JOB_BACKEND=celery" in capsys.readouterr().err
+
+def test_several_workers_aggregate_metrics(monkeypatch, tmp_path):
+    monkeypatch.setattr(serve.settings, "JOB_BACKEND", "celery")
+    monkeypatch.setattr(serve.settings, "CONVERSATION_STORE", "sql")
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    (tmp_path / "counter_123.db").write_bytes(b"stale")
+    started = {}
+    monkeypatch.setattr(serve.uvicorn, "run", lambda app, **kwargs: started.update(kwargs))
+
+    serve.main(["--workers", "2"])
+    assert started["workers"] == 2
+    assert os.environ["PROMETHEUS_MULTIPROC_DIR"] == str(tmp_path)
+    assert list(tmp_path.iterdir()) == []
+
+def test_one_worker_by_default(monkeypatch):
+    monkeypatch.setattr(serve.settings, "JOB_BACKEND", "inprocess")
+    monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+    started = {}
+    monkeypatch.setattr(serve.uvicorn, "run", lambda app, **kwargs: started.update(kwargs))
+
+    serve.main([])
+    assert started["workers"] == 1
+    assert "PROMETHEUS_MULTIPROC_DIR" not in os.environ
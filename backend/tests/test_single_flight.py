@@ -0,0 +1,149 @@
+import asyncio
+
+import pytest
+
+from app.services.ai_service import AIService
+from app.services.single_flight import SingleFlight
+
+MESSAGES = [{"role": "system", "content": "You are a travel agent."}, {"role": "user", "content": "Lisbon"}]
+
+class Gate:
+    """An upstream call that blocks until released and counts how often it ran."""
+
+    def __init__(self, result="ok"):
+        self.result = result
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_flight():
+    flights = SingleFlight()
+    call = Gate()
+    waiters = [asyncio.create_task(flights.do("key", call, "chat")) for _ in range(3)]
+    await asyncio.sleep(0)
+    assert flights.waiters() == {"key": 3}
+
+    call.release.set()
+    assert await asyncio.gather(*waiters) == ["ok"] * 3
+    assert call.calls == 1
+    assert len(flights) == 0
+    assert flights.stats()["call_types"]["chat"] == {"calls": 1, "coalesced": 2, "max_waiters": 3, "waiting": 0}
+
+    # Finished flights are forgotten, so the next call runs again
+    assert await flights.do("key", call, "chat") == "ok"
+    assert call.calls == 2
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_waiter():
+    flights = SingleFlight()
+    call = Gate(RuntimeError("upstream down"))
+    call.release.set()
+    results = await asyncio.gather(*(flights.do("key", call) for _ in range(2)), return_exceptions=True)
+    assert [str(result) for result in results] == ["upstream down"] * 2
+    assert call.calls == 1
+
+@pytest.mark.asyncio
+async def test_call_is_cancelled_only_when_every_waiter_leaves():
+    flights = SingleFlight()
+    call = Gate()
+    first = asyncio.create_task(flights.do("key", call))
+    second = asyncio.create_task(flights.do("key", call))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    await asyncio.gather(first, return_exceptions=True)
+    call.release.set()
+    assert await second == "ok"
+
+    call = Gate()
+    waiter = asyncio.create_task(flights.do("other", call))
+    await asyncio.sleep(0)
+    (flight,) = flights._flights.values()
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+    await asyncio.sleep(0)
+    assert flight.task.cancelled()
+    assert len(flights) == 0
+
+class GatedProvider:
+    """Wraps a provider, holding every upstream call until released."""
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    def __getattr__(self, name):
+        return getattr(self.provider, name)
+
+    async def complete(self, *args, **kwargs):
+        self.calls += 1
+        await self.release.wait()
+        return await self.provider.complete(*args, **kwargs)
+
+    async def stream(self, *args, **kwargs):
+        self.calls += 1
+        await self.release.wait()
+        async for delta in self.provider.stream(*args, **kwargs):
+            yield delta
+
+@pytest.fixture
+def service():
+    service = AIService()
+    service.provider = GatedProvider(service.provider)
+    return service
+
+@pytest.mark.asyncio
+async def test_identical_completions_share_one_upstream_call(service):
+    request = {"messages": MESSAGES, "max_tokens": 100, "temperature": 0.7, "call_type": "chat"}
+    calls = [asyncio.create_task(service._create_completion(**request)) for _ in range(3)]
+    other = asyncio.create_task(service._create_completion(**{**request, "temperature": 0.2}))
+    await asyncio.sleep(0.01)
+
+    service.provider.release.set()
+    results = await asyncio.gather(*calls)
+    await other
+    assert len(set(results)) == 1
+    assert service.provider.calls == 2
+
+@pytest.mark.asyncio
+async def test_bypass_cache_does_not_coalesce(service):
+    request = {"messages": MESSAGES, "max_tokens": 100, "temperature": 0.7, "call_type": "chat", "bypass_cache": True}
+    calls = [asyncio.create_task(service._create_completion(**request)) for _ in range(2)]
+    await asyncio.sleep(0.01)
+    service.provider.release.set()
+    await asyncio.gather(*calls)
+    assert service.provider.calls == 2
+
+@pytest.mark.asyncio
+async def test_only_the_first_caller_receives_deltas(service):
+    request = {"messages": MESSAGES, "max_tokens": 100, "temperature": 0.7, "call_type": "chat"}
+    first, second = [], []
+    calls = [
+        asyncio.create_task(service._create_completion(**request, on_delta=first.append)),
+        asyncio.create_task(service._create_completion(**request, on_delta=second.append)),
+    ]
+    await asyncio.sleep(0.01)
+    service.provider.release.set()
+    content, shared = await asyncio.gather(*calls)
+    assert content == shared == "".join(first)
+    assert second == []
+    assert service.provider.calls == 1
+
+@pytest.mark.asyncio
+async def test_cached_completions_skip_the_upstream(service):
+    service.provider.release.set()
+    request = {"messages": MESSAGES, "max_tokens": 100, "temperature": 0.7, "call_type": "preferences"}
+    parsed = []
+    first = await service._create_completion(**request)
+    assert await service._create_completion(**request, parse=lambda content: parsed.append(content) or content) == first
+    assert parsed == [first]
+    assert service.provider.calls == 1
+    assert service.cache.stats()["call_types"]["preferences"]["hits"] == 1
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from app.services.structured_output import (
+    JSONArrayStreamParser, StructuredOutputError, extract_json_text, parse_json, repair_json
+)
+
+@pytest.mark.parametrize("truncated, expected", [
+    ('{"a": 1, "b": [1, 2', {"a": 1, "b": [1, 2]}),
+    ('{"a": "unfinished', {"a": "unfinished"}),
+    ('{"a": 1, "b":', {"a": 1}),
+    ('{"a": 1, "b"', {"a": 1}),
+    ('{"a": 1,', {"a": 1}),
+    ('{"a": tr', {}),
+    ('{"a": [1.', {"a": []}),
+    ('{"a": "line\\', {"a": "line"}),
+    ('{"a": "tab\\\\', {"a": "tab\\"}),
+    ('{"a": "snow \\u26', {"a": "snow "}),
+    ('{"a": "snow \\u2603', {"a": "snow ☃"}),
+    ('{"a": "quote \\"', {"a": 'quote "'}),
+    ('[{"day": "1"}, {"day": "2", "activities": ["Museum", "Din', [{"day": "1"}, {"day": "2", "activities": ["Museum", "Din"]}]),
+])
+def test_truncated_json_is_repaired(truncated, expected):
+    assert json.loads(repair_json(truncated)) == expected
+
+def test_complete_json_loses_only_trailing_commas():
+    assert repair_json('{"a": [1, 2,], "b": {"c": 3,},} trailing') == '{"a": [1, 2], "b": {"c": 3}}'
+
+@pytest.mark.parametrize("content, expected", [
+    ('```json\n{"a": 1}\n```', {"a": 1}),
+    ('Here is your plan:\n{"a": 1}\nEnjoy!', {"a": 1}),
+    ('Use {destination} and [draft] notes: {"a": [1]}', {"a": [1]}),
+    ('See note [1] for details. {"a": {"b": [2, 3]}}', {"a": {"b": [2, 3]}}),
+    ('[1, 2, 3]', [1, 2, 3]),
+])
+def test_json_is_found_in_prose(content, expected):
+    parsed = parse_json(content)
+    assert parsed.data == expected
+    assert not parsed.repaired
+
+def test_truncated_json_after_prose_brackets_is_repaired():
+    parsed = parse_json('Budget [approx]: see note [1]. {"days": [{"day": "1"}, {"day": "2"')
+    assert parsed.data == {"days": [{"day": "1"}, {"day": "2"}]}
+    assert parsed.repaired
+
+def test_prose_without_json_is_an_error():
+    with pytest.raises(StructuredOutputError):
+        extract_json_text("Sorry, I can't plan {destination} yet.")
+    with pytest.raises(StructuredOutputError):
+        parse_json("no json here")
+
+def test_stream_parser_yields_items_as_they_close():
+    output = '{"destination": "Lisbon", "daily_plans": [{"day": "1", "note": "a } in \\"text\\""}, {"day": "2"}], "tips": [{"x": 1}]}'
+    parser = JSONArrayStreamParser("daily_plans")
+    batches = [parser.feed(output[i:i + 7]) for i in range(0, len(output), 7)]
+    items = [item for batch in batches for item in batch]
+    assert items == [{"day": "1", "note": 'a } in "text"'}, {"day": "2"}]
+    assert parser.done
+    # Arrays after the key are not mistaken for more days
+    assert parser.feed('{"day": "3"}') == []
+
+def test_stream_parser_waits_for_the_key_across_chunks():
+    parser = JSONArrayStreamParser("daily_plans")
+    assert parser.feed('{"daily_') == []
+    assert parser.feed('plans": [{"day": ') == []
+    assert parser.feed('"1"}, ') == [{"day": "1"}]
+    assert not parser.done
+
+@pytest.mark.asyncio
+async def test_streamed_days_are_previews_of_the_returned_itinerary(monkeypatch):
+    from app.models.chat import TripItinerary, TripPreferences
+    from app.services.ai_service import AIService
+
+    days = [{"day": "1", "activities": ["Castle"], "cost": 10.0}, {"day": "2", "activities": ["Tram"], "cost": 5.0}]
+    final = TripItinerary(
+        destination="Lisbon", duration="3 days", daily_plans=[days[1], days[0], {"day": "3", "activities": [], "cost": 0.0}],
+        total_cost={}, transport_options=[], accommodation_suggestions=[], food_recommendations=[], hidden_gems=[], tips=[]
+    )
+
+    async def generate(preferences, bypass_cache=False, on_delta=None):
+        on_delta('{"daily_plans": [' + json.dumps(days[0]) + ", ")
+        on_delta(json.dumps(days[1]) + "]}")
+        # The optimizer reordered the days and a later day only exists in the result
+        return final
+
+    service = AIService()
+    monkeypatch.setattr(service, "_generate_itinerary", generate)
+    streamed = []
+    itinerary = await service._stream_itinerary(TripPreferences(destination="Lisbon"), streamed.append)
+    assert streamed == days
+    assert itinerary is final
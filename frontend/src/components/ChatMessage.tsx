@@ -134,12 +134,21 @@ const ChatMessage: React.FC<ChatMessageProps> = ({ message }) => {
         
         <div className="text-sm text-yellow-800">
           <p><strong>Budget Level:</strong> {costEstimate.budget_level}</p>
-          {costEstimate.estimated_total && (
-            <div className="mt-1">
-              <p><strong>Daily:</strong> {costEstimate.estimated_total.daily}</p>
-              <p><strong>Weekly:</strong> {costEstimate.estimated_total.weekly}</p>
-            </div>
-          )}
+          <div className="mt-1">
+            <p>
+              <strong>Estimated Total:</strong> ${Math.round(costEstimate.low)}-{Math.round(costEstimate.high)}
+              {' '}for {costEstimate.days} days, {costEstimate.people} {costEstimate.people === 1 ? 'person' : 'people'}
+            </p>
+            <p><strong>Daily:</strong> ${Math.round(costEstimate.per_day)}</p>
+            {costEstimate.shares && (
+              <p>
+                <strong>Breakdown:</strong>{' '}
+                {Object.entries(costEstimate.shares)
+                  .map(([category, share]) => `${category} ${Math.round(share as number)}%`)
+                  .join(', ')}
+              </p>
+            )}
+          </div>
         </div>
       </motion.div>
     );
@@ -1,64 +1,54 @@
 import React, { useState, useEffect } from 'react';
 import { Search, MapPin, Calendar, DollarSign, Star } from 'lucide-react';
 import { motion } from 'framer-motion';
-import { getDestinations, Destination } from '../services/api';
+import { getAutocomplete, getDestinations, Destination, PlaceSuggestion } from '../services/api';
+
+const RESULTS_LIMIT = 60;
+const SEARCH_DEBOUNCE_MS = 150;
 
 const DestinationsPage: React.FC = () => {
   const [destinations, setDestinations] = useState<Destination[]>([]);
-  const [filteredDestinations, setFilteredDestinations] = useState<Destination[]>([]);
+  const [total, setTotal] = useState(0);
   const [searchQuery, setSearchQuery] = useState('');
   const [selectedBudget, setSelectedBudget] = useState<string>('');
   const [selectedInterests, setSelectedInterests] = useState<string>('');
   const [isLoading, setIsLoading] = useState(true);
+  const [suggestions, setSuggestions] = useState<PlaceSuggestion[]>([]);
 
   const budgetOptions = ['low', 'medium', 'high'];
   const interestOptions = ['Beaches', 'Culture', 'Nature', 'Food', 'Adventure', 'Relaxation', 'Shopping', 'History'];
 
   useEffect(() => {
-    fetchDestinations();
-  }, []);
+    // Search runs server-side; wait for a pause in typing before querying
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      try {
+        const response = await getDestinations(searchQuery, selectedBudget, selectedInterests, RESULTS_LIMIT);
+        if (!cancelled) {
+          setDestinations(response.destinations || []);
+          setTotal(response.total || 0);
+        }
+      } catch (error) {
+        console.error('Error fetching destinations:', error);
+      } finally {
+        if (!cancelled) setIsLoading(false);
+      }
+    }, searchQuery ? SEARCH_DEBOUNCE_MS : 0);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [searchQuery, selectedBudget, selectedInterests]);
 
   useEffect(() => {
-    filterDestinations();
-  }, [destinations, searchQuery, selectedBudget, selectedInterests]);
-
-  const fetchDestinations = async () => {
-    try {
-      setIsLoading(true);
-      const response = await getDestinations();
-      setDestinations(response.destinations || []);
-    } catch (error) {
-      console.error('Error fetching destinations:', error);
-    } finally {
-      setIsLoading(false);
-    }
-  };
-
-  const filterDestinations = () => {
-    let filtered = [...destinations];
-
-    if (searchQuery) {
-      filtered = filtered.filter(dest => 
-        dest.name.toLowerCase().includes(searchQuery.toLowerCase()) ||
-        dest.country.toLowerCase().includes(searchQuery.toLowerCase()) ||
-        dest.description.toLowerCase().includes(searchQuery.toLowerCase())
-      );
-    }
-
-    if (selectedBudget) {
-      filtered = filtered.filter(dest => dest.budget_level === selectedBudget);
-    }
-
-    if (selectedInterests) {
-      filtered = filtered.filter(dest => 
-        dest.highlights.some(highlight => 
-          highlight.toLowerCase().includes(selectedInterests.toLowerCase())
-        )
-      );
-    }
-
-    setFilteredDestinations(filtered);
-  };
+    let cancelled = false;
+    getAutocomplete(searchQuery).then(results => {
+      if (!cancelled) setSuggestions(results);
+    });
+    return () => {
+      cancelled = true;
+    };
+  }, [searchQuery]);
 
   const getBudgetColor = (budget: string) => {
     switch (budget) {
@@ -124,8 +114,16 @@ const DestinationsPage: React.FC = () => {
                 placeholder="Search destinations, countries, or activities..."
                 value={searchQuery}
                 onChange={(e) => setSearchQuery(e.target.value)}
+                list="destination-suggestions"
                 className="w-full pl-10 pr-4 py-3 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500 focus:border-transparent"
               />
+              <datalist id="destination-suggestions">
+                {suggestions.map(suggestion => (
+                  <option key={suggestion.name} value={suggestion.name}>
+                    {suggestion.country}
+                  </option>
+                ))}
+              </datalist>
             </div>
           </div>
 
@@ -215,13 +213,13 @@ const DestinationsPage: React.FC = () => {
       {/* Results Count */}
       <div className="mb-6">
         <p className="text-gray-600">
-          Found {filteredDestinations.length} destination{filteredDestinations.length !== 1 ? 's' : ''}
+          Found {total} destination{total !== 1 ? 's' : ''}
         </p>
       </div>
 
       {/* Destinations Grid */}
       <div className="grid md:grid-cols-2 lg:grid-cols-3 gap-6">
-        {filteredDestinations.map((destination, index) => (
+        {destinations.map((destination, index) => (
           <motion.div
             key={destination.name}
             initial={{ opacity: 0, y: 20 }}
@@ -288,7 +286,7 @@ const DestinationsPage: React.FC = () => {
       </div>
 
       {/* No Results */}
-      {filteredDestinations.length === 0 && !isLoading && (
+      {destinations.length === 0 && !isLoading && (
         <motion.div
           initial={{ opacity: 0 }}
           animate={{ opacity: 1 }}
@@ -41,10 +41,26 @@ export interface ChatResponse {
   conversation_id: string;
   suggestions?: string[];
   itinerary?: any;
-  cost_estimate?: any;
+  cost_estimate?: CostEstimate;
   next_questions?: string[];
 }
 
+export interface CostEstimate {
+  destination?: string;
+  matched?: string;
+  days: number;
+  people: number;
+  budget_level: string;
+  currency: string;
+  total: number;
+  per_day: number;
+  per_person: number;
+  low: number;
+  high: number;
+  breakdown: Record<string, number>;
+  shares: Record<string, number>;
+}
+
 export interface TripPreferences {
   budget?: string;
   dates?: string;
@@ -61,7 +77,19 @@ export interface Destination {
   description: string;
   budget_level: string;
   best_time: string;
+  best_months?: number[];
+  interests?: string[];
   highlights: string[];
+  popularity?: number;
+}
+
+export interface RouteLeg {
+  from_location: string;
+  to_location: string;
+  mode: string;
+  operator?: string;
+  duration_minutes: number;
+  cost_usd: number;
 }
 
 export interface TravelRoute {
@@ -69,8 +97,11 @@ export interface TravelRoute {
   duration: string;
   cost: string;
   description: string;
-  airline?: string;
   operator?: string;
+  duration_minutes: number;
+  cost_usd: number;
+  labels: string[];
+  legs: RouteLeg[];
 }
 
 // Chat API
@@ -90,6 +121,59 @@ export const sendChatMessage = async (
   }
 };
 
+export type ChatStreamEvent =
+  | 'conversation'
+  | 'token'
+  | 'questions'
+  | 'cost_estimate'
+  | 'itinerary_day'
+  | 'itinerary'
+  | 'done'
+  | 'error';
+
+// Streams a chat turn from /api/chat/stream, calling onEvent for every
+// Server-Sent Event. EventSource only supports GET, so the body is read
+// from fetch directly.
+export const streamChatMessage = async (
+  message: string,
+  conversationId: string | null | undefined,
+  onEvent: (event: ChatStreamEvent, data: any) => void
+): Promise<void> => {
+  const response = await fetch(`${API_BASE_URL}/api/chat/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ message, conversation_id: conversationId }),
+  });
+  if (!response.ok || !response.body) {
+    throw new Error('Failed to send message');
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary = buffer.indexOf('\n\n');
+    while (boundary !== -1) {
+      const rawEvent = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      boundary = buffer.indexOf('\n\n');
+
+      let event = 'message';
+      let data = '';
+      for (const line of rawEvent.split('\n')) {
+        if (line.startsWith('event: ')) event = line.slice(7);
+        else if (line.startsWith('data: ')) data += line.slice(6);
+      }
+      if (data) onEvent(event as ChatStreamEvent, JSON.parse(data));
+    }
+  }
+};
+
 export const getConversation = async (conversationId: string) => {
   try {
     const response = await api.get(`/api/conversations/${conversationId}`);
@@ -100,9 +184,12 @@ export const getConversation = async (conversationId: string) => {
   }
 };
 
-export const listConversations = async () => {
+export const listConversations = async (cursor?: string, limit: number = 20) => {
   try {
-    const response = await api.get('/api/conversations');
+    const params = new URLSearchParams({ limit: limit.toString() });
+    if (cursor) params.append('cursor', cursor);
+
+    const response = await api.get(`/api/conversations?${params.toString()}`);
     return response.data;
   } catch (error) {
     console.error('Error fetching conversations:', error);
@@ -125,13 +212,15 @@ export const generateTripPlan = async (preferences: TripPreferences) => {
 export const getDestinations = async (
   query?: string,
   budget?: string,
-  interests?: string
+  interests?: string,
+  limit?: number
 ) => {
   try {
     const params = new URLSearchParams();
     if (query) params.append('query', query);
     if (budget) params.append('budget', budget);
     if (interests) params.append('interests', interests);
+    if (limit) params.append('limit', String(limit));
 
     const response = await api.get(`/api/destinations?${params.toString()}`);
     return response.data;
@@ -141,11 +230,34 @@ export const getDestinations = async (
   }
 };
 
+export interface PlaceSuggestion {
+  name: string;
+  country: string;
+  lat?: number;
+  lon?: number;
+  popularity: number;
+}
+
+// Autocomplete API; the query is normalized so repeats hit the browser cache
+export const getAutocomplete = async (query: string, limit = 8): Promise<PlaceSuggestion[]> => {
+  const normalized = query.trim().toLowerCase();
+  if (!normalized) return [];
+  try {
+    const params = new URLSearchParams({ query: normalized, limit: String(limit) });
+    const response = await api.get(`/api/autocomplete?${params.toString()}`);
+    return response.data.suggestions;
+  } catch (error) {
+    console.error('Error fetching suggestions:', error);
+    return [];
+  }
+};
+
 // Routes API
 export const getTravelRoutes = async (
   fromLocation: string,
   toLocation: string,
-  transportType?: string
+  transportType?: string,
+  optimize?: 'all' | 'fastest' | 'cheapest'
 ) => {
   try {
     const params = new URLSearchParams({
@@ -153,6 +265,7 @@ export const getTravelRoutes = async (
       to_location: toLocation,
     });
     if (transportType) params.append('transport_type', transportType);
+    if (optimize) params.append('optimize', optimize);
 
     const response = await api.get(`/api/routes?${params.toString()}`);
     return response.data;
@@ -162,6 +275,22 @@ export const getTravelRoutes = async (
   }
 };
 
+// Cost Estimate API
+export const getCostEstimates = async (
+  destinations: string[],
+  days: number[] = [7],
+  people: number[] = [2],
+  budgets: string[] = ['medium']
+): Promise<CostEstimate[]> => {
+  try {
+    const response = await api.post('/api/cost-estimate/batch', { destinations, days, people, budgets });
+    return response.data.estimates;
+  } catch (error) {
+    console.error('Error fetching cost estimates:', error);
+    throw new Error('Failed to fetch cost estimates');
+  }
+};
+
 // Budget Tips API
 export const getBudgetTips = async (destination?: string) => {
   try {